@@ -0,0 +1,7 @@
+"""Benchmarks for the presentation analysis pipeline.
+
+Run from the repository root, e.g.::
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.compare old.json bench.json
+"""
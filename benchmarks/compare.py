@@ -0,0 +1,73 @@
+"""Compare two benchmark reports produced by ``benchmarks.run``.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Exits non-zero when any stage's p95 (or the real-time factor, peak RSS, or a
+hot-path build/serialize time or allocation) regresses by more than
+``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+
+
+def pct_change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return (new - old) / old * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    regressions = []
+    print(f"{'stage':<22}{'base p95':>12}{'head p95':>12}{'change':>10}")
+    for stage in sorted(set(base["stages"]) | set(head["stages"])):
+        old = base["stages"].get(stage, {}).get("p95_ms")
+        new = head["stages"].get(stage, {}).get("p95_ms")
+        if old is None or new is None:
+            print(f"{stage:<22}{str(old):>12}{str(new):>12}{'n/a':>10}")
+            continue
+        change = pct_change(old, new)
+        print(f"{stage:<22}{old:>12.2f}{new:>12.2f}{change:>9.1f}%")
+        if change > args.threshold:
+            regressions.append(stage)
+
+    # Higher is better for throughput
+    old_rtf = base["throughput"]["realtime_factor"]
+    new_rtf = head["throughput"]["realtime_factor"]
+    rtf_change = pct_change(old_rtf, new_rtf)
+    print(f"{'realtime_factor':<22}{old_rtf:>12.2f}{new_rtf:>12.2f}{rtf_change:>9.1f}%")
+    if -rtf_change > args.threshold:
+        regressions.append("realtime_factor")
+
+    rss_change = pct_change(base["peak_rss_mb"], head["peak_rss_mb"])
+    print(f"{'peak_rss_mb':<22}{base['peak_rss_mb']:>12.1f}{head['peak_rss_mb']:>12.1f}{rss_change:>9.1f}%")
+    if rss_change > args.threshold:
+        regressions.append("peak_rss_mb")
+
+    # Reports from before the hot-path measurement have no such section
+    for key in sorted(set(base.get("hot_path", {})) & set(head.get("hot_path", {}))):
+        old, new = base["hot_path"][key], head["hot_path"][key]
+        change = pct_change(old, new)
+        print(f"{key:<22}{old:>12.2f}{new:>12.2f}{change:>9.1f}%")
+        if change > args.threshold:
+            regressions.append(key)
+
+    if regressions:
+        print(f"\nRegressed beyond {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Deterministic stand-ins for the LLM provider and the Whisper model.
+
+They keep benchmark numbers about our own code instead of network round trips or
+model weights, while still exercising the real parsing and scoring paths.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from src.metrics import LLM_FIRST_TOKEN_SECONDS, LLM_REQUEST_SECONDS
+from src.tracing import span
+
+SCRIPT = (
+    "Today I want to walk you through how our recommendation system works. "
+    "Basically it looks at what you watched before and sort of guesses what comes next. "
+    "It's complicated but the core idea is simple. We compare your history with similar users, "
+    "rank the candidates, and show the top results. Um, the ranking step is where most of the "
+    "work happens, you know what I mean."
+).split()
+
+
+class FakeLLM:
+    """LLM provider returning well-formed JSON after a configurable delay.
+
+    Responses are derived from a hash of the prompt, so repeated runs see the
+    same scores; ``jitter`` adds seeded uniform noise to the latency.
+    """
+
+    provider = "fake"
+    model = "fake"
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    async def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 800,
+                       system: Optional[str] = None, max_new_tokens: Optional[int] = None,
+                       stage: str = "llm", mode: str = "", json_schema: Optional[dict] = None) -> str:
+        self.calls += 1
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        start = time.perf_counter()
+        with span(f"llm.{stage}", provider=self.provider, model=self.model):
+            await asyncio.sleep(max(0.0, delay))
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider, mode=mode)
+        return json.dumps(self._response_for(prompt))
+
+    async def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 800,
+                     system: Optional[str] = None, max_new_tokens: Optional[int] = None,
+                     stage: str = "llm", mode: str = "", json_schema: Optional[dict] = None,
+                     chunk_chars: int = 16):
+        """Stream the same response in ``chunk_chars`` pieces spread over the latency."""
+        self.calls += 1
+        delay = max(0.0, self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0))
+        text = json.dumps(self._response_for(prompt))
+        pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        start = time.perf_counter()
+        with span(f"llm.{stage}", provider=self.provider, model=self.model, stream=True):
+            # A quarter of the latency before the first token, the rest spread over the pieces
+            await asyncio.sleep(delay / 4)
+            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider)
+            for piece in pieces:
+                yield piece
+                await asyncio.sleep(delay * 3 / 4 / len(pieces))
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider, mode=mode)
+
+    def _response_for(self, prompt: str) -> dict:
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        score = lambda i: round(0.4 + digest[i] / 255 * 0.6, 2)
+
+        if '"metaphors"' in prompt:
+            return {"metaphors": [
+                {"metaphor": "It's like a librarian who remembers every book you borrowed",
+                 "explanation": "Familiar and concrete", "confidence": score(0)}
+            ]}
+        if '"analogies"' in prompt:
+            return {"analogies": [
+                {"analogy": "It's similar to how a friend recommends a film",
+                 "explanation": "Everyday experience", "confidence": score(1)}
+            ]}
+        if '"images"' in prompt:
+            return {"images": [
+                {"description": "A flowchart from viewing history to ranked results",
+                 "explanation": "Shows the pipeline at a glance", "confidence": score(2)}
+            ]}
+        if '"questions"' in prompt:
+            return {"questions": [
+                {"question": "How would the ranking change for a brand-new user?",
+                 "category": "application", "difficulty": "medium", "context": "Cold start"},
+                {"question": "What signals besides watch history could you use?",
+                 "category": "exploration", "difficulty": "easy", "context": "Features"},
+            ]}
+        return {
+            "clarity_score": score(0),
+            "flow_score": score(1),
+            "technical_accuracy": score(2),
+            "explanation_quality": score(3),
+            "suggestions": ["Consider using more concrete examples"],
+        }
+
+
+class FakeWhisperModel:
+    """faster-whisper compatible model that "transcribes" a fixed script.
+
+    Words are laid out at ``words_per_minute`` across the audio, and each call
+    sleeps ``rtf`` seconds per second of audio to model decoding cost.
+    """
+
+    def __init__(self, rtf: float = 0.05, words_per_minute: float = 150.0):
+        self.rtf = rtf
+        self.words_per_minute = words_per_minute
+        self._offset = 0
+
+    def transcribe(self, audio, beam_size: int = 5, word_timestamps: bool = False, **kwargs):
+        if isinstance(audio, str):
+            from src.audio_ingest import load_audio
+            audio = load_audio(audio)
+        duration = len(audio) / 16000
+        time.sleep(duration * self.rtf)
+
+        words = self._words(duration)
+        segment = SimpleNamespace(
+            text=" " + " ".join(w.word for w in words),
+            start=words[0].start if words else 0.0,
+            end=words[-1].end if words else 0.0,
+            words=words if word_timestamps else None,
+        )
+        return iter([segment] if words else []), SimpleNamespace(language="en")
+
+    def _words(self, duration: float) -> List[SimpleNamespace]:
+        step = 60.0 / self.words_per_minute
+        count = int(duration / step)
+        words = []
+        for i in range(count):
+            start = i * step
+            words.append(SimpleNamespace(
+                word=SCRIPT[(self._offset + i) % len(SCRIPT)],
+                start=start,
+                end=start + step * 0.8,
+                probability=0.9,
+            ))
+        self._offset += count
+        return words
+
@@ -0,0 +1,264 @@
+"""Load generator: N concurrent presenters streaming real PCM over the WebSocket.
+
+Each simulated presenter creates a session with ``POST /api/sessions``, opens
+``/ws/{session_id}`` and streams a clip at real-time rate. Feedback latency is
+measured from the moment a window's last frame is sent to the moment its
+feedback message arrives. Run against a live server (``python main.py``)::
+
+    python -m benchmarks.load --sessions 8 --duration 60
+    python -m benchmarks.load --ramp 2:2:32 --step-seconds 45 --slo 5
+
+``--ramp start:step:max`` increases the session count step by step and reports
+the first step whose p95 feedback latency breaks ``--slo`` (or that fails to
+keep up with the audio) as the saturation point.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+import websocket
+
+from src.audio_ingest import load_audio
+from src.protocol import DOWNLINK_HEADER, encode_frame
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 5
+
+
+class Presenter:
+    """One simulated presenter streaming ``pcm`` in a loop for ``duration`` seconds."""
+
+    def __init__(self, base_url: str, ws_url: str, pcm: bytes, frame_ms: int, duration: float,
+                 framed: bool, mode: str):
+        self.base_url = base_url
+        self.ws_url = ws_url
+        self.pcm = pcm
+        self.frame_bytes = SAMPLE_RATE * 2 * frame_ms // 1000
+        self.frame_seconds = frame_ms / 1000
+        self.duration = duration
+        self.framed = framed
+        self.mode = mode
+
+        self.latencies: List[float] = []
+        self.windows_sent = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.gaps_reported = 0
+        self.errors: List[str] = []
+        self._pending = deque()
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            response = requests.post(f"{self.base_url}/api/sessions",
+                                     data={"mode": self.mode, "topic": "Load test"}, timeout=30)
+            session_id = response.json()["session_id"]
+            ws = websocket.create_connection(f"{self.ws_url}/ws/{session_id}", timeout=120)
+        except Exception as e:
+            self.errors.append(f"connect: {e}")
+            return
+
+        if self.framed:
+            ws.send(json.dumps({"protocol": 1, "encoding": "json"}))
+
+        receiver = threading.Thread(target=self._receive, args=(ws,), daemon=True)
+        receiver.start()
+        try:
+            self._stream(ws)
+            # Give the last window's feedback time to arrive
+            deadline = time.monotonic() + 30
+            while self._pending and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            self._done.set()
+            ws.close()
+            requests.delete(f"{self.base_url}/api/sessions/{session_id}", timeout=30)
+
+    def _stream(self, ws):
+        """Send frames on a real-time clock; frames we fall behind on are dropped, like a live mic."""
+        window_bytes = SAMPLE_RATE * 2 * WINDOW_SECONDS
+        start = time.monotonic()
+        buffered = 0
+        seq = 0
+        offset = 0
+
+        while time.monotonic() - start < self.duration:
+            due = start + seq * self.frame_seconds
+            now = time.monotonic()
+            if now < due:
+                time.sleep(due - now)
+            elif now - due > self.frame_seconds:
+                self.frames_dropped += 1
+                seq += 1
+                offset = (offset + self.frame_bytes) % len(self.pcm)
+                continue
+
+            frame = self.pcm[offset:offset + self.frame_bytes]
+            offset = (offset + self.frame_bytes) % len(self.pcm)
+            if self.framed:
+                ws.send_binary(encode_frame(frame, seq))
+            else:
+                ws.send_binary(frame)
+            seq += 1
+            self.frames_sent += 1
+
+            buffered += len(frame)
+            if buffered > window_bytes:
+                self._pending.append(time.monotonic())
+                self.windows_sent += 1
+                buffered = 0
+
+    def _receive(self, ws):
+        while not self._done.is_set():
+            try:
+                message = ws.recv()
+            except Exception:
+                break
+            if isinstance(message, bytes):
+                message = message[DOWNLINK_HEADER.size:]
+            try:
+                data = json.loads(message)
+            except ValueError:
+                continue
+            kind = data.get("type", "feedback")
+            if kind == "gap":
+                self.gaps_reported += data.get("missing", 0)
+            elif kind == "feedback" and self._pending:
+                self.latencies.append(time.monotonic() - self._pending.popleft())
+
+
+class CpuSampler:
+    """Samples server CPU% via psutil when the server runs on this host."""
+
+    def __init__(self, pid: Optional[int], interval: float = 1.0):
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread = None
+        if pid:
+            import psutil
+            self._process = psutil.Process(pid)
+            self._interval = interval
+            self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        self._process.cpu_percent(None)
+        while not self._stop.wait(self._interval):
+            self.samples.append(self._process.cpu_percent(None))
+
+    def __enter__(self):
+        if self._thread:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def run_step(args, pcm: bytes, sessions: int) -> Dict:
+    presenters = [
+        Presenter(args.base_url, args.ws_url, pcm, args.frame_ms, args.duration, args.framed, args.mode)
+        for _ in range(sessions)
+    ]
+    threads = [threading.Thread(target=p.run) for p in presenters]
+    with CpuSampler(args.server_pid) as cpu:
+        for thread in threads:
+            thread.start()
+            time.sleep(args.stagger)
+        for thread in threads:
+            thread.join()
+
+    latencies = np.array([l for p in presenters for l in p.latencies])
+    windows_sent = sum(p.windows_sent for p in presenters)
+    result = {
+        "sessions": sessions,
+        "windows_sent": windows_sent,
+        "feedback_received": int(latencies.size),
+        "frames_sent": sum(p.frames_sent for p in presenters),
+        "frames_dropped": sum(p.frames_dropped for p in presenters),
+        "gaps_reported": sum(p.gaps_reported for p in presenters),
+        "errors": [e for p in presenters for e in p.errors],
+    }
+    if latencies.size:
+        result.update({
+            "latency_p50_s": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p95_s": round(float(np.percentile(latencies, 95)), 3),
+            "latency_p99_s": round(float(np.percentile(latencies, 99)), 3),
+        })
+    if cpu.samples:
+        result["server_cpu_mean_pct"] = round(float(np.mean(cpu.samples)), 1)
+        result["server_cpu_max_pct"] = round(float(np.max(cpu.samples)), 1)
+    return result
+
+
+def saturated(step: Dict, slo: float) -> bool:
+    """A step is saturated when p95 latency breaks the SLO or feedback falls behind the audio."""
+    if step["errors"] or not step["windows_sent"]:
+        return True
+    if step["feedback_received"] < 0.9 * step["windows_sent"]:
+        return True
+    return step.get("latency_p95_s", float("inf")) > slo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--ws-url", default="ws://localhost:8000")
+    parser.add_argument("--clip", default="src/briskaudioclip2.wav")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60, help="seconds each presenter streams")
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--stagger", type=float, default=0.2, help="seconds between session starts")
+    parser.add_argument("--framed", action="store_true", help="use the framed protocol (server reports gaps)")
+    parser.add_argument("--mode", default="professional")
+    parser.add_argument("--server-pid", type=int, help="sample this process's CPU (same host only)")
+    parser.add_argument("--ramp", help="start:step:max session counts")
+    parser.add_argument("--step-seconds", type=float, help="duration per ramp step (defaults to --duration)")
+    parser.add_argument("--slo", type=float, default=5.0, help="p95 feedback latency limit in seconds")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    samples = load_audio(args.clip)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    if args.ramp:
+        start, step, stop = (int(x) for x in args.ramp.split(":"))
+        args.duration = args.step_seconds or args.duration
+        steps = []
+        saturation = None
+        for sessions in range(start, stop + 1, step):
+            result = run_step(args, pcm, sessions)
+            steps.append(result)
+            print(f"{sessions:>4} sessions: p95={result.get('latency_p95_s')}s "
+                  f"feedback={result['feedback_received']}/{result['windows_sent']}", file=sys.stderr)
+            if saturated(result, args.slo):
+                saturation = sessions
+                break
+
+        if saturation is None:
+            max_sustained = steps[-1]["sessions"]
+        else:
+            max_sustained = steps[-2]["sessions"] if len(steps) > 1 else 0
+        report = {"mode": "ramp", "slo_s": args.slo, "steps": steps,
+                  "saturation_sessions": saturation, "max_sustained_sessions": max_sustained}
+    else:
+        report = {"mode": "fixed", **run_step(args, pcm, args.sessions)}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
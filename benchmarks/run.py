@@ -0,0 +1,290 @@
+"""End-to-end pipeline benchmark.
+
+Drives ``PresentationAnalyzer.analyze_presentation_chunk`` (and through it the
+chunk filter, ``AudioAnalyzer``, the LLM engines and ``ScoringSystem``) plus the
+``/ws/{session_id}`` endpoint with a recorded clip, and writes per-stage latency
+percentiles (from the ``timed()`` spans of each window's trace), throughput and
+peak RSS as JSON, plus the cost of building and serializing one window's
+feedback (time and memory allocated) on its own.
+
+    python -m benchmarks.run --sessions 4 --llm-latency 0.2 --output bench.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+import anyio
+import numpy as np
+
+from src.audio_analyzer import AudioAnalyzer
+from src import tracing
+from src.audio_ingest import load_audio
+from src.metrics import timed
+from src.models import PresentationMode
+from src.presentation_analyzer import PresentationAnalyzer
+from src.serialization import dumps
+from src.speech_to_text import SpeechToText
+
+from .fakes import FakeLLM, FakeWhisperModel
+
+WINDOW_SECONDS = 5
+SAMPLE_RATE = 16000
+
+
+class StageTimer:
+    """Collects wall-clock samples per stage name."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, values in sorted(self.samples.items()):
+            arr = np.array(values) * 1000
+            result[stage] = {
+                "count": len(values),
+                "mean_ms": round(float(arr.mean()), 3),
+                "p50_ms": round(float(np.percentile(arr, 50)), 3),
+                "p95_ms": round(float(np.percentile(arr, 95)), 3),
+                "p99_ms": round(float(np.percentile(arr, 99)), 3),
+            }
+        return result
+
+
+def load_windows(clip: str, windows: int) -> List[np.ndarray]:
+    """Cut the clip into 5 s windows, looping it to get ``windows`` of them."""
+    audio = load_audio(clip)
+    size = WINDOW_SECONDS * SAMPLE_RATE
+    repeats = int(np.ceil(windows * size / max(len(audio), 1)))
+    audio = np.tile(audio, max(repeats, 1))
+    return [audio[i * size:(i + 1) * size] for i in range(windows)]
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def build_analyzer(args) -> PresentationAnalyzer:
+    if args.real_stt:
+        stt = SpeechToText(model_path=args.stt_model)
+    else:
+        stt = SpeechToText(model=FakeWhisperModel(rtf=args.stt_rtf))
+    llm = FakeLLM(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed)
+    # No analytics: benchmark chunks are not history, and SQLite writes would skew the numbers
+    return PresentationAnalyzer(audio_analyzer=AudioAnalyzer(speech_to_text=stt), llm=llm, analytics_db="")
+
+
+async def run_session(analyzer: PresentationAnalyzer, windows: List[np.ndarray], timer: StageTimer,
+                      mode: str) -> Dict[str, Any]:
+    """Process every window of one session the way the WebSocket does.
+
+    Each window is transcribed and then analyzed by the real
+    ``PresentationAnalyzer.analyze_presentation_chunk``, so the chunk filter, load
+    policy, rolling transcript and feature store are all on the timed path. Stage
+    splits come from the ``timed()`` spans recorded in the window's trace.
+
+    Returns the inputs of the last window's feedback message, for :func:`measure_hot_path`.
+    """
+    session_id = str(uuid.uuid4())
+    session = analyzer.create_session(session_id, PresentationMode(mode), "Recommendation systems")
+    load_policy = analyzer.load_policy
+
+    for window in windows:
+        with tracing.start_trace("window", session_id=session_id, mode="benchmark") as trace, \
+                load_policy.track() as tier:
+            speech_to_text = analyzer.audio_analyzer.speech_to_text_for(tier)
+            # SpeechToText.transcribe records its own "stt" span
+            stt_result = await anyio.to_thread.run_sync(functools.partial(
+                speech_to_text.transcribe, window, beam_size=tier.beam_size, word_timestamps=True
+            ))
+            transcript = stt_result["transcription"]
+
+            with timed("analyze"):
+                score = await analyzer.analyze_presentation_chunk(
+                    session_id, to_pcm16(window), transcript, stt_result, tier
+                )
+            questions, suggestions = [], []
+            if not score.skipped:
+                questions, suggestions = await asyncio.gather(
+                    analyzer.generate_questions_for_session(session_id, transcript),
+                    analyzer.generate_suggestions_for_session(session_id, transcript, tier),
+                )
+            with timed("serialize"):
+                dumps(feedback_message(transcript, score, questions, suggestions))
+
+        timer.samples["chunk"].append(trace.duration)
+        for stage_span in trace.spans[1:]:
+            if stage_span.end is not None:
+                timer.samples[stage_span.name].append(stage_span.end - stage_span.start)
+
+    analyzer.delete_session(session_id)
+    return {"scoring_system": analyzer.scoring_system, "audio_metrics": score.audio_metrics,
+            "content": score.content_analysis, "session": session, "transcript": transcript,
+            "questions": questions, "suggestions": suggestions}
+
+
+def feedback_message(transcript: str, score, questions: list, suggestions: list) -> Dict[str, Any]:
+    return {
+        "type": "feedback",
+        "transcript": transcript,
+        "score": score,
+        "questions": questions[-3:],
+        "suggestions": suggestions[-3:],
+    }
+
+
+def measure_hot_path(window: Dict[str, Any], repeats: int = 2000) -> Dict[str, float]:
+    """Time and allocations of scoring one window and serializing its feedback, without the I/O around it."""
+    scoring_system, session = window["scoring_system"], window["session"]
+
+    def build():
+        return scoring_system.calculate_overall_score(window["audio_metrics"], window["content"],
+                                                      session.mode, session.topic)
+
+    def serialize(score):
+        return dumps(feedback_message(window["transcript"], score, window["questions"], window["suggestions"]))
+
+    score = build()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        build()
+    build_seconds = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        serialize(score)
+    serialize_seconds = (time.perf_counter() - start) / repeats
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        message = serialize(build())
+        allocated = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return {
+        "build_us": round(build_seconds * 1e6, 2),
+        "serialize_us": round(serialize_seconds * 1e6, 2),
+        # Peak memory held while building and serializing one window's feedback
+        "allocated_bytes": allocated,
+        "message_bytes": len(message.encode("utf-8")),
+    }
+
+
+async def run_pipeline(analyzer: PresentationAnalyzer, windows: List[np.ndarray], sessions: int,
+                       timer: StageTimer, mode: str) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    start = time.perf_counter()
+    last_windows = await asyncio.gather(*(run_session(analyzer, windows, timer, mode) for _ in range(sessions)))
+    wall = time.perf_counter() - start
+    audio_seconds = sessions * len(windows) * WINDOW_SECONDS
+    return {
+        "sessions": sessions,
+        "audio_seconds": audio_seconds,
+        "wall_seconds": round(wall, 3),
+        # How many real-time presenters this run kept up with
+        "realtime_factor": round(audio_seconds / wall, 3),
+    }, last_windows[0]
+
+
+def load_app(analyzer: PresentationAnalyzer):
+    """Import main.py and put ``analyzer`` in place of its default (which builds nothing until used)."""
+    import main
+
+    main.analyzer = analyzer
+    main.app.state.analyzer = analyzer
+    return main.app
+
+
+def run_websocket(analyzer: PresentationAnalyzer, windows: List[np.ndarray], timer: StageTimer,
+                  mode: str, frame_ms: int = 100):
+    """Stream windows through the real endpoint; time from a window's last frame to its feedback."""
+    from fastapi.testclient import TestClient
+
+    client = TestClient(load_app(analyzer))
+    response = client.post("/api/sessions", data={"mode": mode, "topic": "Recommendation systems"})
+    session_id = response.json()["session_id"]
+    frame_bytes = SAMPLE_RATE * 2 * frame_ms // 1000
+
+    with client.websocket_connect(f"/ws/{session_id}") as ws:
+        for window in windows:
+            # One extra frame so the server's "more than 5 s" check fires on this window
+            pcm = to_pcm16(window) + b"\x00" * frame_bytes
+            last = (len(pcm) - 1) // frame_bytes * frame_bytes
+            for offset in range(0, len(pcm), frame_bytes):
+                if offset == last:
+                    start = time.perf_counter()
+                ws.send_bytes(pcm[offset:offset + frame_bytes])
+            # Questions and suggestions of earlier windows may arrive first; wait for this window's score
+            while "score" not in json.loads(ws.receive_text()):
+                pass
+            timer.samples["websocket_feedback"].append(time.perf_counter() - start)
+
+    client.delete(f"/api/sessions/{session_id}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clip", default="src/briskaudioclip2.wav")
+    parser.add_argument("--windows", type=int, default=6, help="5 s windows per session")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent sessions")
+    parser.add_argument("--mode", default="professional")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--stt-rtf", type=float, default=0.05, help="fake STT seconds per audio second")
+    parser.add_argument("--real-stt", action="store_true", help="use a real Whisper model")
+    parser.add_argument("--stt-model", default="base")
+    parser.add_argument("--skip-websocket", action="store_true")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed windows run first (numba JIT, model load)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    windows = load_windows(args.clip, args.windows)
+    analyzer = build_analyzer(args)
+    timer = StageTimer()
+
+    if args.warmup:
+        asyncio.run(run_session(analyzer, windows[:args.warmup], StageTimer(), args.mode))
+
+    throughput, last_window = asyncio.run(run_pipeline(analyzer, windows, args.sessions, timer, args.mode))
+    if not args.skip_websocket:
+        run_websocket(analyzer, windows, timer, args.mode)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "stages": timer.summary(),
+        "throughput": throughput,
+        "hot_path": measure_hot_path(last_window),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import-time guard for the server module.
+
+Imports ``main`` in a fresh interpreter (best of ``--repeat``) and reports the
+wall time, peak RSS and the modules it pulled in:
+
+    python -m benchmarks.startup --max-seconds 1.5 --max-rss-mb 250
+
+Exits non-zero when the import is slower or larger than the limits, or when
+any of the heavy dependencies that should load on first use (Whisper, the HF
+client, PyPDF2, llama.cpp, ...) was imported eagerly.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Must stay out of `import main`: they load with the component that needs them
+DEFERRED_MODULES = ["faster_whisper", "ctranslate2", "huggingface_hub", "PyPDF2", "openai", "llama_cpp",
+                    "tiktoken", "numba"]
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({
+    "seconds": seconds,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": sorted(name for name in %r if name in sys.modules),
+    "built": [name for name in ("_audio_analyzer", "_content_analyzer", "_question_generator",
+                                "_suggestion_engine") if getattr(main.analyzer, name) is not None],
+}))
+"""
+
+
+def measure() -> dict:
+    output = subprocess.check_output([sys.executable, "-c", _PROBE % (DEFERRED_MODULES,)], text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters to time (best is reported)")
+    parser.add_argument("--max-seconds", type=float, default=1.5)
+    parser.add_argument("--max-rss-mb", type=float, default=250.0)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run["seconds"])
+    report = {
+        "import_seconds": round(best["seconds"], 3),
+        "peak_rss_mb": round(best["peak_rss_mb"], 1),
+        "eager_modules": best["loaded"],
+        "built_components": best["built"],
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if best["seconds"] > args.max_seconds:
+        failures.append(f"import took {best['seconds']:.2f}s (limit {args.max_seconds}s)")
+    if best["peak_rss_mb"] > args.max_rss_mb:
+        failures.append(f"peak RSS {best['peak_rss_mb']:.0f} MB (limit {args.max_rss_mb} MB)")
+    if best["loaded"]:
+        failures.append(f"imported eagerly: {', '.join(best['loaded'])}")
+    if best["built"]:
+        failures.append(f"built at import: {', '.join(best['built'])}")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
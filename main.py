@@ -1,24 +1,55 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form, Header
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-import tempfile
+from fastapi.responses import HTMLResponse, PlainTextResponse
+import asyncio
+import functools
 import os
 import json
 import uuid
-from typing import List, Optional
+import anyio
+from typing import List, Optional, Callable, Awaitable
 from dotenv import load_dotenv
 from src.presentation_analyzer import PresentationAnalyzer
 from src.models import PresentationMode
+from src.load_policy import QualityTier
+from src.scheduler import JobDropped, QUESTIONS, SCORING, SUGGESTIONS, TRANSCRIPT
+from src.speech_to_text import StreamingTranscriber, pcm16_to_float32
+from src.protocol import FeedbackEncoder, FrameReader, ProtocolError
+from src.serialization import dumps
+from src.analyzingControllers import router as analyzing_router
+from src.questionController import router as question_router
+from src.analyticsController import router as analytics_router
+from src.metrics import ERRORS, REGISTRY, timed
+from src import tracing
+from src.profiler import profile_for
 import aiofiles
-import PyPDF2
 from io import BytesIO
 
 load_dotenv()
 
 app = FastAPI(title="AI Presentation Coach", description="AI-powered presentation skills improvement")
 
-# Initialize the presentation analyzer
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=os.getenv("CORS_ORIGINS", "http://localhost:5173").split(","),
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Initialize the presentation analyzer (shared by every router, so one Whisper model is loaded).
+# Its models are built on first use, or at startup unless PRELOAD_MODELS=false.
 analyzer = PresentationAnalyzer()
+app.state.analyzer = analyzer
+
+# Endpoints used by the React client
+app.include_router(analyzing_router)
+app.include_router(question_router)
+app.include_router(analytics_router)
+
+# Seconds a window's scoring / questions and suggestions may wait and run before they are dropped
+SCORING_DEADLINE = float(os.getenv("SCORING_DEADLINE", "30"))
+BACKGROUND_DEADLINE = float(os.getenv("BACKGROUND_DEADLINE", "60"))
 
 # Store active WebSocket connections
 active_connections: dict = {}
@@ -26,6 +57,18 @@ active_connections: dict = {}
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def preload_models():
+    """Build the Whisper model and LLM clients before the first request instead of during it."""
+    if os.getenv("PRELOAD_MODELS", "true").lower() == "true":
+        await anyio.to_thread.run_sync(analyzer.warm_up)
+
+@app.on_event("shutdown")
+async def flush_analytics():
+    """Write the analytics chunks still buffered"""
+    if analyzer.analytics is not None:
+        await anyio.to_thread.run_sync(analyzer.analytics.close)
+
 @app.get("/", response_class=HTMLResponse)
 async def get_homepage():
     """Serve the main application page"""
@@ -112,7 +155,7 @@ async def analyze_text_only(session_id: str, transcript: str = Form(...)):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Analyze content only; create empty audio metrics via zeroed bytes
+    # Analyze content only; audio metrics carry over from the last chunk (or are zeroed)
     score = await analyzer.analyze_presentation_chunk(session_id, b"", transcript)
     return {"score": score.dict()}
 
@@ -130,6 +173,7 @@ async def upload_expert_documents(
         document_contents = []
         for file in files:
             if file.content_type == "application/pdf":
+                import PyPDF2  # only needed here, so kept out of startup
                 content = await file.read()
                 pdf_reader = PyPDF2.PdfReader(BytesIO(content))
                 text = ""
@@ -154,53 +198,185 @@ async def get_session_summary(session_id: str):
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+async def _send_feedback(send: Callable[[dict], Awaitable[None]], session_id: str, audio_buffer: bytes,
+                         transcript: str, stt_result: dict = None, tier: QualityTier = None):
+    """Score a finished window and send the feedback message"""
+    tier = tier or analyzer.load_policy.tier
+    scheduler = analyzer.scheduler
+
+    # Analyze presentation (a newer window of this session replaces it while it is still queued)
+    try:
+        score = await scheduler.run(
+            session_id, SCORING,
+            lambda: analyzer.analyze_presentation_chunk(session_id, audio_buffer, transcript, stt_result, tier),
+            deadline=SCORING_DEADLINE, key="score"
+        )
+    except JobDropped:
+        return
+
+    # Generate questions and suggestions as background work (not for skipped chunks)
+    async def background(priority: int, factory: Callable[[], Awaitable[list]]) -> list:
+        try:
+            return await scheduler.run(session_id, priority, factory, deadline=BACKGROUND_DEADLINE,
+                                       key=f"background.{priority}")
+        except JobDropped:
+            return []
+
+    # Each question/suggestion is also sent on its own as soon as the model finishes writing it
+    async def send_question(question):
+        await send({"type": "question", "question": question})
+
+    async def send_suggestion(suggestion):
+        await send({"type": "suggestion", "suggestion": suggestion})
+
+    # Questions generated ahead of time are sent at once; only a cold session generates its own
+    async def ready_questions() -> list:
+        questions = analyzer.take_speculative_questions(session_id)
+        for question in questions:
+            await send_question(question)
+        return questions
+
+    questions, suggestions = [], []
+    speculated = analyzer.speculator.warm(session_id)
+    if not score.skipped:
+        questions, suggestions = await asyncio.gather(
+            ready_questions() if speculated else background(
+                QUESTIONS, lambda: analyzer.generate_questions_for_session(session_id, transcript, send_question)),
+            background(SUGGESTIONS, lambda: analyzer.generate_suggestions_for_session(
+                session_id, transcript, tier, send_suggestion)),
+        )
+
+    # Send comprehensive feedback
+    feedback = {
+        "type": "feedback",
+        "transcript": transcript,
+        "score": score,
+        "questions": questions[-3:],  # Last 3 questions
+        "suggestions": suggestions[-3:],  # Last 3 suggestions
+        "quality_tier": tier.name
+    }
+
+    await send(feedback)
+
+    # Queue questions for the next windows while the presenter pauses or the server has room
+    analyzer.speculator.note(session_id, "" if score.skipped else transcript,
+                             idle=analyzer.load_policy.tier.level == 0, paused=score.skipped == "silence",
+                             covered=not speculated)
+
+async def _traced_feedback(send: Callable[[dict], Awaitable[None]], session_id: str, audio_buffer: bytes,
+                           transcript: str, stt_result: dict = None):
+    """Run ``_send_feedback`` for a streamed window inside its own trace"""
+    with tracing.start_trace("window", session_id=session_id, mode="stream") as trace, \
+            analyzer.load_policy.track() as tier:
+        trace.root.attributes["quality_tier"] = tier.name
+        await _send_feedback(send, session_id, audio_buffer, transcript, stt_result, tier)
+
 @app.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time presentation analysis"""
+async def websocket_endpoint(websocket: WebSocket, session_id: str, stream: bool = False):
+    """WebSocket endpoint for real-time presentation analysis.
+
+    With ``?stream=true`` the socket sends ``partial`` transcript messages while
+    audio arrives, a ``final`` message per 5 s window, and then a ``feedback``
+    message once scoring finishes.
+
+    Clients may send a JSON handshake before any audio to switch to the framed
+    binary protocol (see ``src/protocol.py``); otherwise raw 16 kHz PCM16 bytes
+    are expected and feedback is sent as JSON text.
+    """
     await websocket.accept()
     active_connections[session_id] = websocket
     audio_buffer = b""
+    load_policy = analyzer.load_policy
+    load_policy.start()
+    transcriber = StreamingTranscriber(analyzer.audio_analyzer.speech_to_text) if stream else None
+    feedback_tasks = set()
+    reader = None
+    encoder = None
+    received_audio = False
+
+    async def send(message: dict):
+        with timed(f"send.{message.get('type', 'feedback')}"):
+            if encoder is not None:
+                await websocket.send_bytes(encoder.encode(message))
+            else:
+                await websocket.send_text(dumps(message))
     
     try:
         while True:
-            data = await websocket.receive_bytes()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("text") is not None:
+                # Protocol handshake; switching encodings mid-stream would corrupt frame parsing
+                if received_audio:
+                    await send({"type": "error", "detail": "Handshake must come before any audio"})
+                    continue
+                try:
+                    encoder = FeedbackEncoder.from_handshake(json.loads(message["text"]))
+                except ValueError as e:
+                    await send({"type": "error", "detail": str(e)})
+                    continue
+                reader = FrameReader()
+                await send(encoder.describe())
+                continue
+
+            data = message["bytes"]
+            received_audio = True
+            if reader is not None:
+                try:
+                    header, data, missing = reader.read(data)
+                except ProtocolError as e:
+                    await send({"type": "error", "detail": str(e)})
+                    continue
+                if missing:
+                    await send({
+                        "type": "gap",
+                        "seq": header.seq,
+                        "missing": missing,
+                        "dropped_frames": reader.dropped_frames
+                    })
+
+            if transcriber is not None:
+                # Degrade the next decodes to the current tier
+                transcriber.stt = analyzer.audio_analyzer.speech_to_text_for(load_policy.tier)
+                transcriber.final_beam_size = load_policy.tier.beam_size
+                events = await analyzer.scheduler.run(
+                    session_id, TRANSCRIPT, lambda: anyio.to_thread.run_sync(transcriber.feed, data)
+                )
+                for event in events:
+                    window_audio = event.pop("audio", None)
+                    await send(event)
+                    if event["type"] == "final":
+                        # Score in the background so partials keep flowing
+                        stt_result = {
+                            "transcription": event["transcript"],
+                            "language": event["language"],
+                            "words": event["words"],
+                        }
+                        task = asyncio.create_task(
+                            _traced_feedback(send, session_id, window_audio, event["transcript"], stt_result)
+                        )
+                        feedback_tasks.add(task)
+                        task.add_done_callback(feedback_tasks.discard)
+                continue
+
             audio_buffer += data
 
             # Process every ~5 seconds of audio
             if len(audio_buffer) > 16000 * 2 * 5:  # 16kHz * 2 bytes * 5s
-                with tempfile.NamedTemporaryFile(delete=True, suffix=".wav") as tmp:
-                    tmp.write(audio_buffer)
-                    tmp.flush()
-
+                with tracing.start_trace("window", session_id=session_id, mode="batch") as trace, \
+                        load_policy.track() as tier:
+                    trace.root.attributes["quality_tier"] = tier.name
                     # Transcribe audio
-                    transcript = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=open(tmp.name, "rb")
-                    )
-                    
-                    # Analyze presentation
-                    score = await analyzer.analyze_presentation_chunk(
-                        session_id, audio_buffer, transcript.text
-                    )
-                    
-                    # Generate questions and suggestions
-                    questions = await analyzer.generate_questions_for_session(
-                        session_id, transcript.text
+                    speech_to_text = analyzer.audio_analyzer.speech_to_text_for(tier)
+                    transcribe = functools.partial(speech_to_text.transcribe, pcm16_to_float32(audio_buffer),
+                                                   beam_size=tier.beam_size, word_timestamps=True)
+                    result = await analyzer.scheduler.run(
+                        session_id, TRANSCRIPT, lambda: anyio.to_thread.run_sync(transcribe)
                     )
-                    
-                    suggestions = await analyzer.generate_suggestions_for_session(
-                        session_id, transcript.text
-                    )
-                    
-                    # Send comprehensive feedback
-                    feedback = {
-                        "transcript": transcript.text,
-                        "score": score.dict(),
-                        "questions": [q.dict() for q in questions[-3:]],  # Last 3 questions
-                        "suggestions": [s.dict() for s in suggestions[-3:]]  # Last 3 suggestions
-                    }
-                    
-                    await websocket.send_text(json.dumps(feedback))
+
+                    await _send_feedback(send, session_id, audio_buffer, result["transcription"], result, tier)
                 
                 audio_buffer = b""  # Reset buffer
 
@@ -208,9 +384,43 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         if session_id in active_connections:
             del active_connections[session_id]
     except Exception as e:
+        ERRORS.inc(stage="websocket")
         print(f"WebSocket error: {e}")
         if session_id in active_connections:
             del active_connections[session_id]
+    finally:
+        for task in feedback_tasks:
+            task.cancel()
+        analyzer.speculator.cancel(session_id)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, LLM calls, tokens and errors"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/traces")
+async def debug_traces(format: str = "json", limit: Optional[int] = None):
+    """Recent per-window traces from the in-memory ring buffer (``format=json`` or ``chrome``)"""
+    if format == "chrome":
+        return tracing.export_chrome(limit)
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'chrome'")
+    return {"traces": tracing.export_json(limit)}
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(seconds: float = 30, interval_ms: float = 5,
+                        x_admin_token: Optional[str] = Header(None)):
+    """Sample the running server and download collapsed stacks for a flamegraph (requires ``ADMIN_TOKEN``)"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or x_admin_token != admin_token:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if not 0 < seconds <= 120 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 120] and interval_ms in [1, 1000]")
+    try:
+        collapsed = await profile_for(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(collapsed, headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
 
 @app.delete("/api/sessions/{session_id}")
 async def delete_session(session_id: str):
@@ -0,0 +1,257 @@
+"""Persisted chunk metrics and the rollups historical queries are answered from.
+
+Every analyzed chunk is stored as one row of numeric columns in SQLite
+(``ANALYTICS_DB``, default ``analytics.db``; set it empty to disable), indexed
+by mode, topic and time. In the same transaction each chunk is added to two
+rollup tables keyed by ``(week, mode, topic)``:
+
+* ``rollups`` holds counts and sums (pace, scores, filler words), so means
+  per week, mode or topic are a sum over a few rows per week;
+* ``histograms`` holds fixed-width bin counts of the overall score, pace and
+  filler count, from which distributions and percentiles are read.
+
+Queries only read the rollups, so their cost grows with the number of weeks,
+modes and topics and not with the number of chunks. Rows are buffered in
+memory and written in batches off the event loop (see :meth:`flush`).
+"""
+
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import ERRORS
+from .models import PresentationScore
+
+ANALYTICS_DB = os.getenv('ANALYTICS_DB', 'analytics.db')
+# Chunks buffered before the analyzer writes them out
+ANALYTICS_BATCH = int(os.getenv('ANALYTICS_BATCH', '50'))
+
+# metric -> (lowest bin start, bin width, number of bins); values outside land in the end bins
+HISTOGRAMS = {
+    "overall_score": (0.0, 0.01, 100),
+    "pace": (0.0, 5.0, 60),
+    "filler_count": (0.0, 1.0, 21),
+}
+
+# Sums kept per rollup row; means are reported for each
+SUMS = ["overall_score", "audio_clarity", "content_clarity", "filler_count", "speaking_time"]
+GROUPS = ("week", "mode", "topic")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    session_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    week TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    overall_score REAL NOT NULL,
+    pace REAL NOT NULL,
+    audio_clarity REAL NOT NULL,
+    content_clarity REAL NOT NULL,
+    filler_count INTEGER NOT NULL,
+    speaking_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_mode_ts ON chunks (mode, ts);
+CREATE INDEX IF NOT EXISTS chunks_topic_ts ON chunks (topic, ts);
+CREATE INDEX IF NOT EXISTS chunks_session ON chunks (session_id);
+CREATE TABLE IF NOT EXISTS rollups (
+    week TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    chunks INTEGER NOT NULL,
+    paced_chunks INTEGER NOT NULL,
+    pace REAL NOT NULL,
+    overall_score REAL NOT NULL,
+    audio_clarity REAL NOT NULL,
+    content_clarity REAL NOT NULL,
+    filler_count REAL NOT NULL,
+    speaking_time REAL NOT NULL,
+    PRIMARY KEY (week, mode, topic)
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    week TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (metric, week, mode, topic, bin)
+);
+"""
+
+_ADD_ROLLUP = """
+INSERT INTO rollups VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (week, mode, topic) DO UPDATE SET
+    chunks = chunks + 1,
+    paced_chunks = paced_chunks + excluded.paced_chunks,
+    pace = pace + excluded.pace,
+    overall_score = overall_score + excluded.overall_score,
+    audio_clarity = audio_clarity + excluded.audio_clarity,
+    content_clarity = content_clarity + excluded.content_clarity,
+    filler_count = filler_count + excluded.filler_count,
+    speaking_time = speaking_time + excluded.speaking_time
+"""
+
+_ADD_BIN = """
+INSERT INTO histograms VALUES (?, ?, ?, ?, ?, 1)
+ON CONFLICT (metric, week, mode, topic, bin) DO UPDATE SET count = count + 1
+"""
+
+
+def week_of(moment: datetime.datetime) -> str:
+    """ISO date of the Monday starting ``moment``'s week."""
+    return (moment.date() - datetime.timedelta(days=moment.weekday())).isoformat()
+
+
+def bin_of(metric: str, value: float) -> int:
+    low, width, bins = HISTOGRAMS[metric]
+    return min(max(int((value - low) // width), 0), bins - 1)
+
+
+class AnalyticsStore:
+    def __init__(self, path: str = ANALYTICS_DB, batch: int = ANALYTICS_BATCH):
+        self.path = path
+        self.batch = batch
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # Opened on first write or query; used from worker threads under ``_lock``
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def record(self, session_id: str, score: PresentationScore):
+        """Buffer an analyzed chunk (cheap; call from the event loop)."""
+        moment = datetime.datetime.fromisoformat(score.timestamp)
+        audio, content = score.audio_metrics, score.content_analysis
+        self._pending.append((
+            session_id, moment.timestamp(), week_of(moment), score.mode.value, score.topic,
+            float(score.overall_score), float(audio.pace), float(audio.clarity_score),
+            float(content.clarity_score), int(audio.filler_count), float(audio.speaking_time),
+        ))
+
+    def due(self) -> bool:
+        return len(self._pending) >= self.batch
+
+    def flush(self):
+        """Write buffered chunks and their rollups in one transaction (blocking)."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                with self.db:
+                    self.db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    self.db.executemany(_ADD_ROLLUP, [
+                        (week, mode, topic, int(pace > 0), pace, overall, audio_clarity, content_clarity,
+                         fillers, speaking_time)
+                        for _, _, week, mode, topic, overall, pace, audio_clarity, content_clarity, fillers,
+                        speaking_time in rows
+                    ])
+                    bins = []
+                    for _, _, week, mode, topic, overall, pace, _, _, fillers, _ in rows:
+                        bins.append((week, mode, topic, "overall_score", bin_of("overall_score", overall)))
+                        bins.append((week, mode, topic, "filler_count", bin_of("filler_count", fillers)))
+                        if pace > 0:
+                            bins.append((week, mode, topic, "pace", bin_of("pace", pace)))
+                    self.db.executemany(_ADD_BIN, bins)
+            except sqlite3.Error as e:
+                ERRORS.inc(stage="analytics")
+                print(f"Error writing {len(rows)} chunks to analytics: {e}")
+
+    # --- Queries (blocking; every one reads the rollup tables only) ---------
+
+    def _where(self, mode: str = None, topic: str = None, since: str = None,
+               until: str = None) -> Tuple[str, List[Any]]:
+        """Filter on the rollup keys; ``since``/``until`` are dates, matched by the week they fall in."""
+        clauses, params = [], []
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if since:
+            clauses.append("week >= ?")
+            params.append(week_of(datetime.datetime.fromisoformat(since)))
+        if until:
+            clauses.append("week <= ?")
+            params.append(week_of(datetime.datetime.fromisoformat(until)))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def summary(self, group_by: Sequence[str] = ("week",), **filters) -> List[Dict[str, Any]]:
+        """Chunk counts and mean pace, scores and filler counts per group."""
+        unknown = set(group_by) - set(GROUPS)
+        if unknown:
+            raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}; use {', '.join(GROUPS)}")
+        where, params = self._where(**filters)
+        keys = ", ".join(group_by)
+        sums = ", ".join(f"SUM({name})" for name in SUMS)
+        select = f"{keys + ', ' if keys else ''}SUM(chunks), SUM(paced_chunks), SUM(pace), {sums}"
+        query = f"SELECT {select} FROM rollups{where}"
+        if keys:
+            query += f" GROUP BY {keys} ORDER BY {keys}"
+        self.flush()
+        with self._lock:
+            rows = self.db.execute(query, params).fetchall()
+
+        result = []
+        for row in rows:
+            group = dict(zip(group_by, row))
+            chunks, paced, pace, *totals = row[len(group_by):]
+            if not chunks:
+                continue
+            group["chunks"] = chunks
+            group["mean_pace"] = pace / paced if paced else None
+            group.update({f"mean_{name}": total / chunks for name, total in zip(SUMS, totals)})
+            result.append(group)
+        return result
+
+    def distribution(self, metric: str, **filters) -> Dict[str, Any]:
+        """Bin counts of ``metric`` across the matching chunks."""
+        if metric not in HISTOGRAMS:
+            raise ValueError(f"Unknown metric {metric}; use {', '.join(HISTOGRAMS)}")
+        where, params = self._where(**filters)
+        where = f"{where} AND metric = ?" if where else " WHERE metric = ?"
+        self.flush()
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT bin, SUM(count) FROM histograms{where} GROUP BY bin ORDER BY bin", params + [metric]
+            ).fetchall()
+        low, width, _ = HISTOGRAMS[metric]
+        bins = [{"low": low + index * width, "high": low + (index + 1) * width, "count": count}
+                for index, count in rows]
+        return {"metric": metric, "count": sum(b["count"] for b in bins), "bins": bins}
+
+    def percentiles(self, metric: str, quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+                    **filters) -> Dict[str, Any]:
+        """Percentiles of ``metric``, interpolated within its histogram bins (accurate to a bin width)."""
+        histogram = self.distribution(metric, **filters)
+        total = histogram["count"]
+        values: Dict[str, Optional[float]] = {}
+        for q in quantiles:
+            if not 0 <= q <= 1:
+                raise ValueError("Quantiles must be between 0 and 1")
+            values[f"p{q * 100:g}"] = None
+            target, seen = q * total, 0
+            for b in histogram["bins"]:
+                if seen + b["count"] >= target:
+                    fraction = (target - seen) / b["count"] if b["count"] else 0.0
+                    values[f"p{q * 100:g}"] = b["low"] + fraction * (b["high"] - b["low"])
+                    break
+                seen += b["count"]
+        return {"metric": metric, "count": total, "percentiles": values if total else {}}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
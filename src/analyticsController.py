@@ -0,0 +1,50 @@
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+
+router = APIRouter(prefix="/api/analytics")
+
+
+def _store(request: Request):
+    store = request.app.state.analyzer.analytics
+    if store is None:
+        raise HTTPException(status_code=404, detail="Analytics are disabled (ANALYTICS_DB is empty)")
+    return store
+
+
+async def _query(method, *args, **kwargs):
+    try:
+        return await anyio.to_thread.run_sync(lambda: method(*args, **kwargs))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/summary")
+async def analytics_summary(request: Request, group_by: str = "week", mode: Optional[str] = None,
+                            topic: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None):
+    """Chunk counts and mean pace, scores and filler counts, grouped by any of ``week,mode,topic``"""
+    groups = [name for name in group_by.split(",") if name]
+    rows = await _query(_store(request).summary, groups, mode=mode, topic=topic, since=since, until=until)
+    return {"group_by": groups, "groups": rows}
+
+
+@router.get("/distribution/{metric}")
+async def analytics_distribution(request: Request, metric: str, mode: Optional[str] = None,
+                                 topic: Optional[str] = None, since: Optional[str] = None,
+                                 until: Optional[str] = None):
+    """Histogram of ``overall_score``, ``pace`` or ``filler_count``"""
+    return await _query(_store(request).distribution, metric, mode=mode, topic=topic, since=since, until=until)
+
+
+@router.get("/percentiles/{metric}")
+async def analytics_percentiles(request: Request, metric: str, q: str = "0.5,0.9,0.99",
+                                mode: Optional[str] = None, topic: Optional[str] = None,
+                                since: Optional[str] = None, until: Optional[str] = None):
+    """Percentiles of ``overall_score``, ``pace`` or ``filler_count`` (``q`` is a comma-separated list)"""
+    try:
+        quantiles = [float(value) for value in q.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="q must be comma-separated numbers between 0 and 1")
+    return await _query(_store(request).percentiles, metric, quantiles, mode=mode, topic=topic,
+                        since=since, until=until)
@@ -1,23 +1,12 @@
-from fastapi import FastAPI, File, UploadFile
-from fastapi.middleware.cors import CORSMiddleware
-from audio_analyzer import AudioAnalyzer
-import tempfile
+import anyio
+from fastapi import APIRouter, File, Request, UploadFile
 
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
 
-analyzer = AudioAnalyzer()
-
-@app.post("/analyze-audio")
-async def analyze_audio_endpoint(file: UploadFile = File(...)):
+@router.post("/analyze-audio")
+async def analyze_audio_endpoint(request: Request, file: UploadFile = File(...)):
+    """Transcribe and analyze an uploaded recording (WebM, WAV, FLAC...) in memory"""
     audio_bytes = await file.read()
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as tmp:
-        tmp.write(audio_bytes)
-        tmp_path = tmp.name
-    metrics = analyzer.analyze_audio(tmp_path)
-    return {"transcription": metrics.transcription}
\ No newline at end of file
+    analyzer = request.app.state.analyzer
+    metrics = await anyio.to_thread.run_sync(analyzer.audio_analyzer.analyze_audio, audio_bytes)
+    return {"transcription": metrics.transcription}
@@ -1,46 +1,96 @@
+import os
+import threading
 import librosa
 import numpy as np
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Any, Optional, Union
 import re
 from .models import AudioMetrics
 from .speech_to_text import SpeechToText
+from .audio_ingest import load_audio, normalize_audio
+from .feature_store import ChunkFeatures
+from .load_policy import QualityTier
+from .metrics import DEGRADED_STEPS, ERRORS, timed
+
+# Pause buckets in seconds: (label, lower bound, upper bound)
+PAUSE_BUCKETS = [
+    ("short", 0.25, 0.5),
+    ("medium", 0.5, 1.0),
+    ("long", 1.0, 2.0),
+    ("very_long", 2.0, float("inf")),
+]
+
+# Below this many words or seconds of speech a words-per-minute figure is noise
+PACE_MIN_WORDS = 5
+PACE_MIN_SECONDS = 2.0
 
 class AudioAnalyzer:
-    def __init__(self, stt_model_path: str = "base", device: str = "cpu"):
+    def __init__(self, stt_model_path: str = "base", device: str = "cpu", speech_to_text: SpeechToText = None):
+        """Set up the analyzer; Whisper is loaded on first transcription (or by :meth:`warm_up`).
+
+        Computing metrics from stored features (:meth:`metrics_from_features`) never loads it.
+        """
         self.filler_words = [
             'um', 'uh', 'like', 'you know', 'so', 'well', 'actually',
             'basically', 'literally', 'right', 'okay', 'alright'
         ]
-        self.speech_to_text = SpeechToText(model_path=stt_model_path, device=device)
+        self.stt_model_path = stt_model_path
+        self.device = device
+        self._speech_to_text = speech_to_text
+        # Smaller Whisper model the load policy switches to under heavy load (optional)
+        self.fast_model = os.getenv('DEGRADED_STT_MODEL')
+        self._fast_speech_to_text: Optional[SpeechToText] = None
+        self._loading = threading.Lock()
+
+    @property
+    def speech_to_text(self) -> SpeechToText:
+        if self._speech_to_text is None:
+            with self._loading:
+                if self._speech_to_text is None:
+                    self._speech_to_text = SpeechToText(model_path=self.stt_model_path, device=self.device)
+        return self._speech_to_text
+
+    @property
+    def fast_speech_to_text(self) -> Optional[SpeechToText]:
+        if self._fast_speech_to_text is None and self.fast_model:
+            with self._loading:
+                if self._fast_speech_to_text is None:
+                    self._fast_speech_to_text = SpeechToText(model_path=self.fast_model, device=self.device)
+        return self._fast_speech_to_text
+
+    def warm_up(self):
+        """Load the Whisper model(s) now (blocking)."""
+        # Reading each lazy property loads its model
+        _ = self.speech_to_text
+        _ = self.fast_speech_to_text
+
+    def speech_to_text_for(self, tier: QualityTier) -> SpeechToText:
+        """The transcriber to use at ``tier``: the fast model when degraded and one is configured."""
+        if tier.fast_stt and self.fast_model:
+            return self.fast_speech_to_text
+        return self.speech_to_text
+
+    def analyze_audio(self, audio_path: Union[str, bytes, np.ndarray], sample_rate: int = 16000,
+                      stt_result: Optional[Dict[str, Any]] = None, pitch: bool = True) -> AudioMetrics:
+        """Analyze audio for presentation metrics and transcription.
 
-    def analyze_audio(self, audio_path: str, sample_rate: int = 16000) -> AudioMetrics:
-        """Analyze audio for presentation metrics and transcription."""
+        ``audio_path`` may be a file path, encoded audio bytes (WAV, WebM, FLAC, or raw
+        16 kHz PCM16), or samples already normalized to 16 kHz mono float32. Pass
+        ``stt_result`` (the output of ``SpeechToText.transcribe`` with word timestamps)
+        to reuse a transcription that has already been run. ``pitch=False`` skips the
+        pitch tracking behind ``tone`` and ``intonation_variance`` (both left at 0).
+        """
+        return self.analyze_with_features(audio_path, sample_rate, stt_result, pitch)[0]
+
+    def analyze_with_features(self, audio_path: Union[str, bytes, np.ndarray], sample_rate: int = 16000,
+                              stt_result: Optional[Dict[str, Any]] = None,
+                              pitch: bool = True) -> Tuple[AudioMetrics, Optional[ChunkFeatures]]:
+        """:meth:`analyze_audio` that also returns the per-frame features the metrics were computed
+        from (``None`` when the analysis failed), for the feature store."""
         try:
-            # Step 1: Transcribe audio
-            transcription_result = self.speech_to_text.transcribe(audio_path)
-            transcription = transcription_result["transcription"]
-            language = transcription_result["language"]
-
-            # Step 2: Load audio data for analysis
-            audio_array, sr = librosa.load(audio_path, sr=sample_rate)
-
-            # Step 3: Extract features
-            pace = self._calculate_pace(audio_array, sr)
-            tone = self._calculate_tone(audio_array, sr)
-            filler_words, filler_count = self._detect_filler_words(transcription)
-            intonation_variance = self._calculate_intonation_variance(audio_array, sr)
-            clarity_score = self._calculate_clarity_score(audio_array, sr)
-            return AudioMetrics(
-                transcription=transcription,
-                pace=pace,
-                tone=tone,
-                filler_words=filler_words,
-                filler_count=filler_count,
-                intonation_variance=intonation_variance,
-                clarity_score=clarity_score,
-                language=language
-            )
+            features = self.extract_features(audio_path, sample_rate, stt_result, pitch)
+            return self.metrics_from_features(features), features
         except Exception as e:
+            ERRORS.inc(stage="audio")
             print(f"Error analyzing audio: {e}")
             return AudioMetrics(
                 pace=0.0,
@@ -51,45 +101,150 @@ class AudioAnalyzer:
                 clarity_score=0.0,
                 transcription="",
                 language=""
-            )
-
-    def _calculate_pace(self, audio: np.ndarray, sample_rate: int) -> float:
-        """Calculate speaking pace in words per minute"""
-        # Simple energy-based speech detection
-        frame_length = int(0.025 * sample_rate)  # 25ms frames
-        hop_length = int(0.010 * sample_rate)    # 10ms hop
-        
-        # Calculate RMS energy
-        rms = librosa.feature.rms(y=audio, frame_length=frame_length, hop_length=hop_length)[0]
-        
-        # Detect speech segments
-        speech_threshold = np.mean(rms) * 0.3
-        speech_frames = rms > speech_threshold
-        
-        # Estimate speaking time
-        speaking_time = np.sum(speech_frames) * hop_length / sample_rate
-        
-        # Rough estimate: average speaking rate is 150-160 WPM
-        # This is a simplified calculation
-        if speaking_time > 0:
-            estimated_words = len(audio) / (sample_rate * 60) * 150  # rough estimate
-            return estimated_words / (speaking_time / 60) if speaking_time > 0 else 0
-        return 0
+            ), None
+
+    def extract_features(self, audio_path: Union[str, bytes, np.ndarray], sample_rate: int = 16000,
+                         stt_result: Optional[Dict[str, Any]] = None, pitch: bool = True) -> ChunkFeatures:
+        """Decode and transcribe the audio and extract its per-frame features (the expensive part)."""
+        sr = sample_rate
+        with timed("audio.decode"):
+            if isinstance(audio_path, np.ndarray):
+                audio_array = audio_path
+            elif isinstance(audio_path, (bytes, bytearray)):
+                audio_array = normalize_audio(bytes(audio_path), target_sr=sr)
+            else:
+                audio_array = load_audio(audio_path, target_sr=sr)
+
+        # Transcribe audio (with word timings for pace)
+        if stt_result is None or "words" not in stt_result:
+            stt_result = self.speech_to_text.transcribe(audio_array, word_timestamps=True)
+        word_times = np.array([(w["start"], w["end"]) for w in stt_result["words"]], dtype=np.float64)
+
+        empty = np.zeros(0, dtype=np.float32)
+        frame_pitch, frame_pitch_var, voiced = empty, empty, np.zeros(0, dtype=np.uint16)
+        if pitch:
+            with timed("audio.tone"):
+                frame_pitch, frame_pitch_var, voiced = self._extract_pitch_frames(audio_array, sr)
+        else:
+            DEGRADED_STEPS.inc(step="pitch")
+        with timed("audio.clarity"):
+            rms = self._extract_rms(audio_array)
+
+        return ChunkFeatures(
+            sample_rate=sr,
+            n_samples=len(audio_array),
+            rms=rms,
+            pitch=frame_pitch,
+            pitch_var=frame_pitch_var,
+            voiced=voiced,
+            word_times=word_times.reshape(-1, 2),
+            transcription=stt_result["transcription"],
+            language=stt_result["language"],
+            pitch_tracked=pitch,
+        )
+
+    def metrics_from_features(self, features: ChunkFeatures) -> AudioMetrics:
+        """Compute the chunk's metrics from its features (cheap: no decoding, STT or DSP)."""
+        words = [{"start": start, "end": end} for start, end in features.word_times.tolist()]
+        with timed("audio.timing"):
+            pace, speaking_time = self._calculate_pace(words)
+            pause_distribution, mean_pause = self._calculate_pauses(words)
+            rate_curve = self._calculate_rate_curve(words, features.n_samples / features.sample_rate)
+        tone = intonation_variance = 0.0
+        if features.pitch_tracked:
+            tone, intonation_variance = self._calculate_pitch_stats(features)
+        with timed("audio.fillers"):
+            filler_words, filler_count = self._detect_filler_words(features.transcription)
+        return AudioMetrics(
+            transcription=features.transcription,
+            pace=pace,
+            tone=tone,
+            filler_words=filler_words,
+            filler_count=filler_count,
+            intonation_variance=intonation_variance,
+            clarity_score=self._calculate_clarity_score(features.rms),
+            language=features.language,
+            word_count=len(words),
+            speaking_time=speaking_time,
+            pause_distribution=pause_distribution,
+            mean_pause=mean_pause,
+            rate_curve=rate_curve
+        )
+
+    def _calculate_pace(self, words: List[Dict[str, Any]]) -> Tuple[float, float]:
+        """Calculate speaking pace in words per minute from word timestamps.
+
+        Returns the pace and the speaking time (first word start to last word end)
+        it was measured over, so leading and trailing silence do not dilute it.
+        The pace is 0 (no reading) when there are too few words or too little
+        speech to measure it.
+        """
+        if not words:
+            return 0.0, 0.0
+        speaking_time = words[-1]["end"] - words[0]["start"]
+        if speaking_time <= 0:
+            return 0.0, 0.0
+        if len(words) < PACE_MIN_WORDS or speaking_time < PACE_MIN_SECONDS:
+            return 0.0, float(speaking_time)
+        return len(words) / (speaking_time / 60), float(speaking_time)
+
+    def _calculate_pauses(self, words: List[Dict[str, Any]]) -> Tuple[Dict[str, int], float]:
+        """Bucket the gaps between consecutive words and return their mean length."""
+        distribution = {label: 0 for label, _, _ in PAUSE_BUCKETS}
+        gaps = [nxt["start"] - cur["end"] for cur, nxt in zip(words, words[1:])]
+        pauses = [gap for gap in gaps if gap >= PAUSE_BUCKETS[0][1]]
+
+        for pause in pauses:
+            for label, low, high in PAUSE_BUCKETS:
+                if low <= pause < high:
+                    distribution[label] += 1
+                    break
+
+        mean_pause = float(np.mean(pauses)) if pauses else 0.0
+        return distribution, mean_pause
+
+    def _calculate_rate_curve(self, words: List[Dict[str, Any]], duration: float,
+                              window: float = 2.0) -> List[float]:
+        """Speaking rate in WPM for each second, over a centred ``window``-second span."""
+        if not words or duration <= 0:
+            return []
+        midpoints = np.array([(w["start"] + w["end"]) / 2 for w in words])
+        centres = np.arange(0.5, duration, 1.0)
+        counts = [
+            np.count_nonzero((midpoints >= c - window / 2) & (midpoints < c + window / 2))
+            for c in centres
+        ]
+        return [float(count) * 60 / window for count in counts]
     
-    def _calculate_tone(self, audio: np.ndarray, sample_rate: int) -> float:
-        """Calculate average pitch/tone"""
+    def _extract_pitch_frames(self, audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per frame: mean and variance of the non-zero pitch estimates, and how many there were.
+
+        Enough to recover the mean and standard deviation over the whole chunk
+        (tone and intonation) without keeping every estimate.
+        """
         try:
-            # Extract pitch using librosa
             pitches, magnitudes = librosa.piptrack(y=audio, sr=sample_rate, threshold=0.1)
-            
-            # Get non-zero pitches
-            non_zero_pitches = pitches[pitches > 0]
-            
-            if len(non_zero_pitches) > 0:
-                return float(np.mean(non_zero_pitches))
-            return 0.0
-        except:
-            return 0.0
+        except Exception:
+            pitches = np.zeros((0, 0))
+        pitches = pitches.astype(np.float64)
+        voiced = np.count_nonzero(pitches, axis=0)
+        counts = np.maximum(voiced, 1)
+        mean = pitches.sum(axis=0) / counts
+        variance = np.maximum((pitches ** 2).sum(axis=0) / counts - mean ** 2, 0.0)
+        return mean.astype(np.float32), variance.astype(np.float32), voiced.astype(np.uint16)
+
+    def _calculate_pitch_stats(self, features: ChunkFeatures) -> Tuple[float, float]:
+        """Tone (mean pitch) and intonation variance (pitch standard deviation) over the chunk."""
+        counts = features.voiced.astype(np.float64)
+        total = counts.sum()
+        if total == 0:
+            return 0.0, 0.0
+        mean = features.pitch.astype(np.float64)
+        tone = float((counts * mean).sum() / total)
+        if total < 2:
+            return tone, 0.0
+        second_moment = (counts * (features.pitch_var + mean ** 2)).sum() / total
+        return tone, float(np.sqrt(max(second_moment - tone ** 2, 0.0)))
     
     def _detect_filler_words(self, transcription: str) -> Tuple[List[str], int]:
         """Detect filler words in transcription."""
@@ -104,30 +259,22 @@ class AudioAnalyzer:
 
         return detected_fillers, filler_count
     
-    def _calculate_intonation_variance(self, audio: np.ndarray, sample_rate: int) -> float:
-        """Calculate variance in intonation"""
+    def _extract_rms(self, audio: np.ndarray) -> np.ndarray:
         try:
-            pitches, magnitudes = librosa.piptrack(y=audio, sr=sample_rate, threshold=0.1)
-            non_zero_pitches = pitches[pitches > 0]
-            
-            if len(non_zero_pitches) > 1:
-                return float(np.std(non_zero_pitches))
-            return 0.0
-        except:
-            return 0.0
-    
-    def _calculate_clarity_score(self, audio: np.ndarray, sample_rate: int) -> float:
+            return librosa.feature.rms(y=audio)[0].astype(np.float32)
+        except Exception:
+            return np.zeros(0, dtype=np.float32)
+
+    def _calculate_clarity_score(self, rms: np.ndarray) -> float:
         """Calculate clarity score based on audio quality"""
-        try:
-            # Calculate signal-to-noise ratio
-            rms = librosa.feature.rms(y=audio)[0]
-            noise_floor = np.percentile(rms, 10)
-            signal_level = np.percentile(rms, 90)
-            
-            if noise_floor > 0:
-                snr = 20 * np.log10(signal_level / noise_floor)
-                # Normalize to 0-1 scale
-                return min(1.0, max(0.0, (snr + 10) / 30))
-            return 0.5
-        except:
+        if len(rms) == 0:
             return 0.5
+        # Calculate signal-to-noise ratio
+        noise_floor = np.percentile(rms, 10)
+        signal_level = np.percentile(rms, 90)
+
+        if noise_floor > 0:
+            snr = 20 * np.log10(signal_level / noise_floor)
+            # Normalize to 0-1 scale
+            return float(min(1.0, max(0.0, (snr + 10) / 30)))
+        return 0.5
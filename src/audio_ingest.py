@@ -0,0 +1,232 @@
+"""Ingest normalizer: any client audio in, 16 kHz mono float32 out.
+
+Clients send WAV at 48 kHz (``client/src/lib/wavEncoder.js``), WebM/Opus from
+``MediaRecorder``, FLAC, or raw 16-bit PCM over the WebSocket. Everything is
+sniffed from its header, decoded in memory, and resampled exactly once.
+"""
+
+import io
+import subprocess
+import wave
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+
+import numpy as np
+
+try:
+    import soxr
+except ImportError:  # optional: falls back to scipy's polyphase resampler
+    soxr = None
+
+TARGET_SAMPLE_RATE = 16000
+
+
+def sniff_format(data: bytes) -> str:
+    """Identify the container from its magic bytes; headerless data is raw PCM16."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:4] == b"fLaC":
+        return "flac"
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if data[4:8] == b"ftyp":
+        return "mp4"
+    # A bare MPEG frame sync is not checked: it collides with ordinary negative PCM16 samples
+    if data[:3] == b"ID3":
+        return "mp3"
+    return "pcm16"
+
+
+def _decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    try:
+        with wave.open(io.BytesIO(data)) as wav:
+            sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            frames = wav.readframes(wav.getnframes())
+    except wave.Error:
+        # Float or extensible WAVs are not handled by the stdlib reader
+        return _decode_soundfile(data)
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    else:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    return samples, sample_rate
+
+
+def _decode_soundfile(data: bytes) -> Tuple[np.ndarray, int]:
+    import soundfile
+    samples, sample_rate = soundfile.read(io.BytesIO(data), dtype="float32")
+    return samples, sample_rate
+
+
+def _decode_compressed(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode WebM/MP4/MP3 in memory with PyAV, or by piping through ffmpeg."""
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        chunks = []
+        sample_rate = TARGET_SAMPLE_RATE
+        with av.open(io.BytesIO(data)) as container:
+            stream = container.streams.audio[0]
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=stream.rate)
+            sample_rate = stream.rate
+            for frame in container.decode(stream):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+        samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        return samples.astype(np.float32, copy=False), sample_rate
+
+    # ffmpeg resamples while decoding, so the result is already at the target rate
+    proc = subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-f", "f32le", "-ac", "1",
+         "-ar", str(TARGET_SAMPLE_RATE), "pipe:1"],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    return np.frombuffer(proc.stdout, dtype="<f4"), TARGET_SAMPLE_RATE
+
+
+def decode_audio(data: bytes, sample_rate: int = TARGET_SAMPLE_RATE) -> Tuple[np.ndarray, int]:
+    """Decode ``data`` to float32 samples (possibly multi-channel) and their rate.
+
+    ``sample_rate`` is only used for headerless raw PCM16.
+    """
+    fmt = sniff_format(data)
+    if fmt == "pcm16":
+        usable = len(data) - (len(data) % 2)
+        return np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0, sample_rate
+    if fmt == "wav":
+        return _decode_wav(data)
+    if fmt in ("flac", "ogg"):
+        try:
+            return _decode_soundfile(data)
+        except Exception:
+            # libsndfile cannot read Ogg/Opus on older builds
+            return _decode_compressed(data)
+    return _decode_compressed(data)
+
+
+@lru_cache(maxsize=32)
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing FIR for one up/down ratio, designed once and reused for every chunk.
+
+    Unity gain: ``resample_poly`` multiplies the coefficients by ``up`` itself.
+    """
+    from scipy.signal import firwin
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    return firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+
+
+def resample(samples: np.ndarray, orig_sr: int, target_sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Resample mono float32 audio in a single pass."""
+    if orig_sr == target_sr or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    if soxr is not None:
+        return soxr.resample(samples, orig_sr, target_sr, quality="HQ").astype(np.float32, copy=False)
+
+    from scipy.signal import resample_poly
+    divisor = gcd(orig_sr, target_sr)
+    up, down = target_sr // divisor, orig_sr // divisor
+    return resample_poly(samples, up, down, window=_polyphase_filter(up, down)).astype(np.float32)
+
+
+class StreamResampler:
+    """Resampler for audio that arrives in pieces (one per network frame).
+
+    Resampling each piece on its own restarts the filter at every boundary and
+    leaves a click there; this keeps the filter state between pieces, so the
+    concatenated output matches resampling the whole stream at once.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int = TARGET_SAMPLE_RATE):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self._soxr = None
+        if orig_sr == target_sr:
+            return
+        if soxr is not None:
+            self._soxr = soxr.ResampleStream(orig_sr, target_sr, 1, dtype="float32", quality="HQ")
+            return
+        divisor = gcd(orig_sr, target_sr)
+        self._up, self._down = target_sr // divisor, orig_sr // divisor
+        self._taps = _polyphase_filter(self._up, self._down) * self._up
+        self._half = (len(self._taps) - 1) // 2
+        # Output m is sample m * down + half of the filtered, up-sampled stream. ``_history``
+        # starts at input index ``_start``, kept at a residue where that grid lines up with
+        # upfirdn's output grid; the stream is zero before index 0.
+        self._phase = self._half * pow(self._up, -1, self._down) % self._down
+        self._start = self._aligned(-(self._half // self._up) - 1)
+        self._history = np.zeros(-self._start, dtype=np.float64)
+        self._next = 0
+
+    def _aligned(self, index: int) -> int:
+        """The largest aligned input index not after ``index``."""
+        return index - (index - self._phase) % self._down
+
+    def push(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next piece of mono float32 audio."""
+        if self.orig_sr == self.target_sr:
+            return samples.astype(np.float32, copy=False)
+        if self._soxr is not None:
+            return self._soxr.resample_chunk(np.ascontiguousarray(samples, dtype=np.float32))
+        if samples.size == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        from scipy.signal import upfirdn
+        up, down, half = self._up, self._down, self._half
+        self._history = np.concatenate([self._history, samples])
+        end = self._start + len(self._history)
+        # Outputs whose filter window lies entirely within the samples received so far
+        last = (end * up - 1 - half) // down
+        if last < self._next:
+            return np.zeros(0, dtype=np.float32)
+        first_j = (self._start * up - half) // down
+        filtered = upfirdn(self._taps, self._history, up, down)
+        out = filtered[self._next - first_j:last - first_j + 1].astype(np.float32)
+        self._next = last + 1
+
+        # Keep only the inputs the next output still reaches back to
+        keep_from = self._aligned(-((half - self._next * down) // up))
+        if keep_from > self._start:
+            self._history = self._history[keep_from - self._start:]
+            self._start = keep_from
+        return out
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """Average interleaved channels (frames x channels) down to one."""
+    if samples.ndim > 1:
+        return samples.mean(axis=1)
+    return samples
+
+
+def normalize_audio(data: bytes, sample_rate: int = TARGET_SAMPLE_RATE,
+                    target_sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Sniff, decode and resample any supported input to mono float32 at ``target_sr``."""
+    samples, orig_sr = decode_audio(data, sample_rate)
+    return resample(to_mono(samples), orig_sr, target_sr)
+
+
+def load_audio(path: str, target_sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Read a file from disk and normalize it."""
+    with open(path, "rb") as f:
+        return normalize_audio(f.read(), target_sr=target_sr)
@@ -0,0 +1,102 @@
+"""Cheap pre-filter deciding whether a chunk is worth a full LLM analysis.
+
+A window is skipped when its transcript is empty, when the audio is almost all
+silence, or when its word shingles are nearly identical (MinHash estimate of
+Jaccard similarity) to the last window that was analyzed. A window with only a
+few words is not analyzed on its own; its text is merged into the next window
+that is.
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import CHUNKS_SKIPPED
+
+NUM_PERM = 64
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, k: int = 3) -> List[str]:
+    """Word k-grams of the lower-cased text (the whole text when it is shorter than ``k``)."""
+    words = re.findall(r"\b\w+\b", text.lower())
+    if len(words) <= k:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+
+def minhash(items: List[str]) -> Optional[np.ndarray]:
+    """``NUM_PERM``-value MinHash signature of a set of strings."""
+    if not items:
+        return None
+    hashes = np.array(sorted({zlib.crc32(item.encode()) % _PRIME for item in items}), dtype=np.uint64)
+    # Universal hashing (a*x + b) mod p; with p < 2**31 the product cannot overflow 64 bits
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if a is None or b is None:
+        return 0.0
+    return float(np.mean(a == b))
+
+
+def silence_ratio(samples: np.ndarray, frame: int = 400, threshold_db: float = -40.0) -> float:
+    """Fraction of 25 ms frames (at 16 kHz) whose RMS is below ``threshold_db`` dBFS."""
+    frames = len(samples) // frame
+    if frames == 0:
+        return 1.0
+    blocks = samples[:frames * frame].reshape(frames, frame).astype(np.float64)
+    rms = np.sqrt(np.mean(blocks ** 2, axis=1))
+    return float(np.mean(rms < 10 ** (threshold_db / 20)))
+
+
+class ChunkFilter:
+    def __init__(self):
+        self.min_words = int(os.getenv('CHUNK_MIN_WORDS', '4'))
+        self.max_similarity = float(os.getenv('CHUNK_MAX_SIMILARITY', '0.85'))
+        self.max_silence = float(os.getenv('CHUNK_MAX_SILENCE', '0.95'))
+        # Per session: signature of the last analyzed window, and held-back short text
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, str] = {}
+
+    def check(self, session_id: str, transcript: str, samples: Optional[np.ndarray] = None,
+              can_skip: bool = True) -> Tuple[Optional[str], str]:
+        """Return ``(skip_reason, transcript)``.
+
+        ``skip_reason`` is ``None`` when the window should be analyzed; the transcript
+        then includes any short text merged in from skipped windows. With ``can_skip``
+        false (nothing to carry forward yet) the window is always analyzed.
+        """
+        merged = " ".join(filter(None, [self._pending.get(session_id), transcript]))
+        signature = minhash(shingles(merged))
+        if can_skip:
+            if not transcript.split():
+                return self._skip("empty"), transcript
+            if samples is not None and len(samples) and silence_ratio(samples) > self.max_silence:
+                return self._skip("silence"), transcript
+            if len(merged.split()) < self.min_words:
+                self._pending[session_id] = merged
+                return self._skip("few_words"), transcript
+            if similarity(signature, self._signatures.get(session_id)) >= self.max_similarity:
+                self._pending.pop(session_id, None)
+                return self._skip("duplicate"), transcript
+
+        self._pending.pop(session_id, None)
+        if signature is not None:
+            self._signatures[session_id] = signature
+        return None, merged
+
+    def forget(self, session_id: str):
+        self._signatures.pop(session_id, None)
+        self._pending.pop(session_id, None)
+
+    def _skip(self, reason: str) -> str:
+        CHUNKS_SKIPPED.inc(reason=reason)
+        return reason
@@ -1,17 +1,14 @@
-import os
-from huggingface_hub import InferenceClient
 import re
 from typing import List, Dict, Any
 from .models import ContentAnalysis, PresentationMode
+from .llm_client import LLMClient
+from .prompt_builder import build_prompt, keep_tail
+from .structured_output import ContentAnalysisResponse, complete_structured
+from .metrics import ERRORS
 
 class ContentAnalyzer:
-    def __init__(self):
-        self.use_hf = os.getenv('USE_HF', 'false').lower() == 'true'
-        self.hf_model = os.getenv('HF_CHAT_MODEL', 'deepseek-ai/DeepSeek-V3.2-Exp')
-        self.hf_token = os.getenv('HF_TOKEN') or os.getenv('HUGGINGFACEHUB_API_TOKEN')
-        self.hf_task = os.getenv('HF_TASK', 'conversational')  # 'text-generation' or 'conversational'
-        self.hf_client = (InferenceClient(model=self.hf_model, token=self.hf_token)
-                          if self.use_hf else None)
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or LLMClient(default_hf_model='deepseek-ai/DeepSeek-V3.2-Exp')
     
     async def analyze_content(self, transcript: str, topic: str, mode: PresentationMode, custom_context: str = None) -> ContentAnalysis:
         """Analyze presentation content for clarity and flow"""
@@ -19,11 +16,11 @@ class ContentAnalyzer:
         # Create context based on mode
         context_prompt = self._get_context_prompt(mode, custom_context)
         
-        analysis_prompt = f"""
+        analysis_prompt = build_prompt("content", """
         Analyze this presentation transcript for clarity, flow, and explanation quality.
         
         Topic: {topic}
-        Mode: {mode.value}
+        Mode: {mode}
         {context_prompt}
         
         Transcript: {transcript}
@@ -46,44 +43,26 @@ class ContentAnalyzer:
                 "The transition between topics could be smoother"
             ]
         }}
-        """
+        """, shrink={"transcript": keep_tail}, topic=topic, mode=mode.value, context_prompt=context_prompt,
+            transcript=transcript)
         
         try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[
-                                {"role": "system", "content": "You analyze presentation transcripts and return strict JSON."},
-                                {"role": "user", "content": analysis_prompt}
-                            ],
-                            max_tokens=800,
-                            temperature=0.3
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf_text():
-                        return self.hf_client.text_generation(analysis_prompt, max_new_tokens=500, temperature=0.3)
-                    raw = await anyio.to_thread.run_sync(_run_hf_text)
-                    content = raw
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": analysis_prompt}],
-                        temperature=0.3
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
+            # Schema-constrained; fenced/prefixed or cut-off JSON is recovered, with one repair call
+            result = await complete_structured(
+                self.llm,
+                analysis_prompt,
+                ContentAnalysisResponse,
+                temperature=0.3,
+                max_tokens=800,
+                max_new_tokens=500,
+                system="You analyze presentation transcripts and return strict JSON.",
+                stage="content",
+                mode=mode.value
+            )
             
-            try:
-                result = json.loads(content)
-            except json.JSONDecodeError as json_error:
-                print(f"JSON parsing error: {json_error}")
-                print(f"Raw content received: {content}")
+            if result is None:
+                ERRORS.inc(stage="content.parse")
+                print("JSON parsing error: no valid content analysis, even after repair")
                 return ContentAnalysis(
                     clarity_score=0.5,
                     flow_score=0.5,
@@ -93,13 +72,14 @@ class ContentAnalyzer:
                 )
             
             return ContentAnalysis(
-                clarity_score=result.get("clarity_score", 0.5),
-                flow_score=result.get("flow_score", 0.5),
-                technical_accuracy=result.get("technical_accuracy", 0.5),
-                explanation_quality=result.get("explanation_quality", 0.5),
-                suggested_improvements=result.get("suggestions", [])
+                clarity_score=result.clarity_score,
+                flow_score=result.flow_score,
+                technical_accuracy=result.technical_accuracy,
+                explanation_quality=result.explanation_quality,
+                suggested_improvements=result.suggestions
             )
         except Exception as e:
+            ERRORS.inc(stage="content")
             print(f"Error analyzing content: {e}")
             return ContentAnalysis(
                 clarity_score=0.5,
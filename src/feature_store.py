@@ -0,0 +1,136 @@
+"""Per-frame audio features of analyzed chunks, stored for re-scoring.
+
+With ``FEATURE_STORE_DIR`` set, ``PresentationAnalyzer`` writes the features
+each chunk's audio metrics were computed from to
+``<dir>/<session_id>/<chunk>.feat``. ``python -m src.rescore`` recomputes every
+metric and score from them after the scoring bands or weights change, without
+decoding, transcribing or pitch-tracking the audio again.
+
+A file is a fixed header, a JSON block, then the arrays back to back::
+
+    magic "PFEA" | version u16 | flags u16 | sample_rate u32 | samples u32
+    | rms frames u32 | pitch frames u32 | words u32 | json length u32
+
+    json (transcription, language, chunk context) padded to 8 bytes
+    word times  float64[words, 2]   start/end in seconds
+    rms         float32[rms frames]
+    pitch       float32[pitch frames]  mean non-zero pitch estimate per frame
+    pitch_var   float32[pitch frames]  their variance
+    voiced      uint16[pitch frames]   how many estimates (0: unvoiced)
+
+:meth:`FeatureStore.read` maps the file and returns array views into it, so
+reading a chunk copies nothing until the values are used.
+"""
+
+import json
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR')
+
+MAGIC = b"PFEA"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIIII")
+
+# Header flags
+FLAG_PITCH = 0x01  # pitch was tracked (not skipped under load)
+
+
+@dataclass(slots=True)
+class ChunkFeatures:
+    sample_rate: int
+    n_samples: int
+    rms: np.ndarray
+    pitch: np.ndarray
+    pitch_var: np.ndarray
+    voiced: np.ndarray
+    word_times: np.ndarray
+    transcription: str
+    language: str
+    pitch_tracked: bool = True
+    # Chunk context written alongside (mode, topic, timestamp, content analysis, ...)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class FeatureStore:
+    def __init__(self, root: str = FEATURE_STORE_DIR):
+        self.root = root
+
+    def path(self, session_id: str, chunk: int) -> str:
+        return os.path.join(self.root, session_id, f"{chunk:06d}.feat")
+
+    def write(self, session_id: str, chunk: int, features: ChunkFeatures):
+        """Write a chunk's features (blocking); the file appears complete or not at all."""
+        meta = json.dumps({"transcription": features.transcription, "language": features.language,
+                           **features.meta}).encode("utf-8")
+        header = HEADER.pack(MAGIC, VERSION, FLAG_PITCH if features.pitch_tracked else 0, features.sample_rate,
+                             features.n_samples, len(features.rms), len(features.pitch), len(features.word_times),
+                             len(meta))
+        path = self.path(session_id, chunk)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(header)
+            f.write(meta.ljust(_padded(HEADER.size + len(meta)) - HEADER.size, b" "))
+            f.write(np.ascontiguousarray(features.word_times, dtype="<f8").tobytes())
+            f.write(np.ascontiguousarray(features.rms, dtype="<f4").tobytes())
+            f.write(np.ascontiguousarray(features.pitch, dtype="<f4").tobytes())
+            f.write(np.ascontiguousarray(features.pitch_var, dtype="<f4").tobytes())
+            f.write(np.ascontiguousarray(features.voiced, dtype="<u2").tobytes())
+        os.replace(path + ".tmp", path)
+
+    def read(self, session_id: str, chunk: int) -> ChunkFeatures:
+        """Map a chunk's file; the arrays are read-only views into it."""
+        data = np.memmap(self.path(session_id, chunk), dtype=np.uint8, mode="r")
+        magic, version, flags, sample_rate, n_samples, n_rms, n_pitch, n_words, meta_size = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path(session_id, chunk)} is not a feature file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported feature file version {version}")
+        meta = json.loads(bytes(data[HEADER.size:HEADER.size + meta_size]))
+
+        offset = _padded(HEADER.size + meta_size)
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        word_times = take("<f8", n_words * 2).reshape(n_words, 2)
+        rms = take("<f4", n_rms)
+        pitch = take("<f4", n_pitch)
+        pitch_var = take("<f4", n_pitch)
+        voiced = take("<u2", n_pitch)
+        return ChunkFeatures(
+            sample_rate=sample_rate,
+            n_samples=n_samples,
+            rms=rms,
+            pitch=pitch,
+            pitch_var=pitch_var,
+            voiced=voiced,
+            word_times=word_times,
+            transcription=meta.pop("transcription"),
+            language=meta.pop("language"),
+            pitch_tracked=bool(flags & FLAG_PITCH),
+            meta=meta,
+        )
+
+    def sessions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def chunks(self, session_id: str) -> List[int]:
+        directory = os.path.join(self.root, session_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name[:-len(".feat")]) for name in os.listdir(directory) if name.endswith(".feat"))
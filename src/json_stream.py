@@ -0,0 +1,165 @@
+"""Incremental and tolerant JSON handling for LLM responses.
+
+:class:`IncrementalJSONParser` is fed a streamed completion piece by piece and
+hands back each object of a top-level list (``{"questions": [{...}, {...}]}``
+or a bare ``[{...}]``) as soon as its closing brace arrives. :func:`parse_json`
+parses the full text, skipping code fences or prose around the document, and
+repairs a truncated document by closing it at the last complete value instead
+of discarding it.
+"""
+
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from .metrics import LLM_PARSE
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._item_depth = 0
+
+    def feed(self, chunk: str) -> List[Tuple[Optional[str], Any]]:
+        """Consume ``chunk`` and return ``(list key, object)`` for every list item it completed."""
+        self.text += chunk
+        items = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+            if not self._started:
+                if ch in "{[":
+                    self._started = True
+                else:
+                    continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "{" and self._stack and self._stack[-1] == "[" and len(self._stack) <= 2:
+                    self._item_start = i
+                    self._item_depth = len(self._stack)
+                if ch == "[" and self._stack == ["{"]:
+                    self._array_key = self._last_string
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._item_start is not None and len(self._stack) == self._item_depth:
+                    try:
+                        items.append((self._array_key, json.loads(text[self._item_start:i + 1])))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+        self._pos = len(text)
+        return items
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse the first JSON document in ``text``, closing it at the last complete value if it is cut off."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):]
+
+    stack: List[str] = []
+    in_string = escape = False
+    cuts: List[Tuple[int, str]] = []  # (end index, open containers) where the prefix is complete
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                try:
+                    return json.loads(text[:i + 1])
+                except ValueError:
+                    break
+            cuts.append((i + 1, "".join(stack)))
+        elif ch == "," and stack:
+            cuts.append((i, "".join(stack)))
+
+    # Cut off mid-document: first try finishing the open string, then fall back to complete prefixes
+    candidates = []
+    if stack:
+        candidates.append(text.rstrip().rstrip(",") + ('"' if in_string else "")
+                          + "".join(_CLOSERS[c] for c in reversed(stack)))
+    candidates.extend(text[:end] + "".join(_CLOSERS[c] for c in reversed(state)) for end, state in reversed(cuts))
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_json(text: str, stage: str = "llm") -> Optional[Any]:
+    """Parse an LLM response, repairing it when needed; counts the outcome per stage."""
+    try:
+        result = json.loads(text)
+        outcome = "ok"
+    except ValueError:
+        result = repair_json(text or "")
+        outcome = "failed" if result is None else "repaired"
+    LLM_PARSE.inc(stage=stage, outcome=outcome)
+    return result
+
+
+def list_items(result: Any, key: str) -> list:
+    """The objects under ``key`` (or the document itself when the model returned a bare list)."""
+    if isinstance(result, dict):
+        items = result.get(key, [])
+    else:
+        items = result
+    return [item for item in items or [] if isinstance(item, dict)]
+
+
+async def stream_json(llm, prompt: str, on_item: Callable[[Any], Awaitable[None]] = None,
+                      **kwargs) -> Tuple[Optional[Any], str]:
+    """Stream a completion, awaiting ``on_item`` for each list item as it closes.
+
+    Returns the parsed (possibly repaired) document and the raw response text.
+    Providers without a ``stream`` method fall back to a single ``complete`` call.
+    """
+    stream = getattr(llm, "stream", None)
+    if stream is None:
+        text = await llm.complete(prompt, **kwargs)
+    else:
+        parser = IncrementalJSONParser()
+        async for chunk in stream(prompt, **kwargs):
+            for _, item in parser.feed(chunk):
+                if on_item is not None and isinstance(item, dict):
+                    await on_item(item)
+        text = parser.text
+    return parse_json(text, kwargs.get("stage", "llm")), text
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import AsyncIterator, Optional
+
+import anyio
+
+from .metrics import (ERRORS, LLM_CACHE_HITS, LLM_FIRST_TOKEN_SECONDS, LLM_CALL_TOKENS, LLM_REQUEST_SECONDS,
+                      LLM_TOKENS)
+from .prompt_builder import count_tokens
+from .tracing import span
+
+
+class LLMClient:
+    """Chat completion client shared by the content, question and suggestion engines.
+
+    The provider is picked from the environment: ``USE_HF`` (HuggingFace Inference),
+    ``USE_GROK`` (xAI, OpenAI-compatible), ``USE_LOCAL`` (a GGUF model run in-process
+    by llama.cpp, see ``local_llm.py``), otherwise OpenAI. Any object with the same
+    ``provider`` attribute and ``complete`` coroutine can be passed to the engines
+    instead (the benchmarks use a deterministic fake).
+
+    A ``json_schema`` passed to ``complete``/``stream`` is enforced with the provider's
+    structured-output feature (OpenAI/xAI ``response_format``, HF grammars) unless
+    ``LLM_STRUCTURED_OUTPUT=false``.
+
+    Every call exports its prompt and completion token counts (local tokenizer) to
+    ``/metrics``; ``LLM_LOG_TOKENS=true`` also prints them, for debugging.
+    """
+
+    def __init__(self, default_hf_model: str = 'mistralai/Mistral-7B-Instruct-v0.2'):
+        self.use_hf = os.getenv('USE_HF', 'false').lower() == 'true'
+        self.use_grok = os.getenv('USE_GROK', 'false').lower() == 'true'
+        self.use_local = os.getenv('USE_LOCAL', 'false').lower() == 'true'
+        self.hf_model = os.getenv('HF_CHAT_MODEL', default_hf_model)
+        self.hf_token = os.getenv('HF_TOKEN') or os.getenv('HUGGINGFACEHUB_API_TOKEN')
+        self.hf_task = os.getenv('HF_TASK', 'conversational')  # 'text-generation' or 'conversational'
+        self.grok_model = os.getenv('GROK_MODEL', 'grok-2-latest')
+        self.openai_model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        self.structured_output = os.getenv('LLM_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+        self.log_tokens = os.getenv('LLM_LOG_TOKENS', 'false').lower() == 'true'
+
+        if self.use_hf:
+            from huggingface_hub import InferenceClient
+            self.provider = 'hf'
+            self.model = self.hf_model
+            self.hf_client = InferenceClient(model=self.hf_model, token=self.hf_token)
+        elif self.use_grok:
+            from openai import OpenAI
+            self.provider = 'grok'
+            self.model = self.grok_model
+            self.client = OpenAI(
+                api_key=os.getenv('GROK_API_KEY'),
+                base_url=os.getenv('GROK_BASE_URL', 'https://api.x.ai/v1')
+            )
+        elif self.use_local:
+            from .local_llm import LocalLLM
+            self.provider = 'local'
+            model_path = os.getenv('LOCAL_MODEL_PATH', 'models/qwen2.5-3b-instruct-q4_k_m.gguf')
+            self.model = os.path.basename(model_path)
+            # Shared by every client in the process: one copy of the weights, one request queue
+            self.local = LocalLLM.shared(model_path)
+        else:
+            from openai import OpenAI
+            self.provider = 'openai'
+            self.model = self.openai_model
+            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+
+    async def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 800,
+                       system: Optional[str] = None, max_new_tokens: Optional[int] = None,
+                       stage: str = "llm", mode: str = "", json_schema: Optional[dict] = None) -> str:
+        """Run one completion in a worker thread and return the response text.
+
+        ``max_new_tokens`` overrides ``max_tokens`` for HF text-generation models.
+        ``stage`` and ``mode`` only label the call's metrics.
+        """
+        start = time.perf_counter()
+        try:
+            with span(f"llm.{stage}", provider=self.provider, model=self.model):
+                text = await self._complete(prompt, temperature, max_tokens, system, max_new_tokens, stage,
+                                            json_schema)
+            self._log_tokens(stage, prompt, system, text)
+            return text
+        except Exception:
+            ERRORS.inc(stage=f"llm.{stage}")
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider, mode=mode)
+
+    async def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 800,
+                     system: Optional[str] = None, max_new_tokens: Optional[int] = None,
+                     stage: str = "llm", mode: str = "", json_schema: Optional[dict] = None) -> AsyncIterator[str]:
+        """Like :meth:`complete`, but yield the response text as the provider streams it.
+
+        The blocking provider iterator runs in a worker thread and hands pieces to the
+        event loop; closing the generator early stops the worker at the next piece.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for piece in self._iter_stream(prompt, temperature, max_tokens, system, max_new_tokens, stage,
+                                               json_schema):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, piece)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        start = time.perf_counter()
+        first = True
+        pieces = []
+        try:
+            with span(f"llm.{stage}", provider=self.provider, model=self.model, stream=True):
+                worker = asyncio.ensure_future(anyio.to_thread.run_sync(produce))
+                try:
+                    while True:
+                        piece = await queue.get()
+                        if piece is done:
+                            break
+                        if first:
+                            first = False
+                            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider)
+                        pieces.append(piece)
+                        yield piece
+                    await worker  # re-raise provider errors
+                    self._log_tokens(stage, prompt, system, "".join(pieces))
+                finally:
+                    stop.set()
+                    # Abandoned early: nobody awaits the worker, so retrieve its outcome here
+                    worker.add_done_callback(lambda f: f.cancelled() or f.exception())
+        except Exception:
+            ERRORS.inc(stage=f"llm.{stage}")
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, stage=stage, provider=self.provider, mode=mode)
+
+    def _iter_stream(self, prompt: str, temperature: float, max_tokens: int, system: Optional[str],
+                     max_new_tokens: Optional[int], stage: str, json_schema: Optional[dict] = None):
+        if self.provider == 'local':
+            usage = yield from self.local.iter_stream(
+                self.local.messages(prompt, system), temperature=temperature, max_tokens=max_tokens,
+                **self._format_args(json_schema)
+            )
+            self._record_usage(SimpleNamespace(**usage) if usage else None, stage)
+            return
+
+        if self.provider == 'hf' and self.hf_task != 'conversational':
+            yield from self.hf_client.text_generation(
+                prompt, max_new_tokens=max_new_tokens or max_tokens, temperature=temperature, stream=True,
+                **self._format_args(json_schema)
+            )
+            return
+
+        client = self.hf_client if self.provider == 'hf' else self.client
+        # OpenAI only reports usage for streams when asked to, in a final chunk without choices
+        extra = {"stream_options": {"include_usage": True}} if self.provider == 'openai' else {}
+        extra.update(self._format_args(json_schema))
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **extra
+        )
+        for chunk in response:
+            if getattr(chunk, "usage", None):
+                self._record_usage(chunk.usage, stage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _messages(self, prompt: str, system: Optional[str]) -> list:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    def _format_args(self, json_schema: Optional[dict]) -> dict:
+        """Provider arguments constraining the output to ``json_schema``."""
+        if json_schema is None or not self.structured_output:
+            return {}
+        if self.provider == 'local':
+            # llama-cpp-python compiles the schema to a grammar
+            return {"response_format": {"type": "json_object", "schema": json_schema}}
+        if self.provider == 'hf':
+            grammar = {"type": "json", "value": json_schema}
+            return {"grammar": grammar} if self.hf_task != 'conversational' else {"response_format": grammar}
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": json_schema.get("title", "response"), "schema": json_schema}
+        }}
+
+    async def _complete(self, prompt: str, temperature: float, max_tokens: int, system: Optional[str],
+                        max_new_tokens: Optional[int], stage: str, json_schema: Optional[dict] = None) -> str:
+        messages = self._messages(prompt, system)
+        format_args = self._format_args(json_schema)
+
+        if self.provider == 'local':
+            future = self.local.submit(self.local.messages(prompt, system), temperature=temperature,
+                                       max_tokens=max_tokens, **format_args)
+            response = await asyncio.wrap_future(future)
+            usage = response.get("usage")
+            self._record_usage(SimpleNamespace(**usage) if usage else None, stage)
+            return response["choices"][0]["message"]["content"]
+
+        if self.provider == 'hf' and self.hf_task != 'conversational':
+            def _run_hf_text():
+                return self.hf_client.text_generation(
+                    prompt, max_new_tokens=max_new_tokens or max_tokens, temperature=temperature, **format_args
+                )
+            return await anyio.to_thread.run_sync(_run_hf_text)
+
+        client = self.hf_client if self.provider == 'hf' else self.client
+
+        def _run_chat():
+            return client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **format_args
+            )
+        response = await anyio.to_thread.run_sync(_run_chat)
+        self._record_usage(getattr(response, "usage", None), stage)
+        return response.choices[0].message.content
+
+    def _log_tokens(self, stage: str, prompt: str, system: Optional[str], text: Optional[str]):
+        prompt_tokens = count_tokens(prompt) + count_tokens(system or "")
+        completion_tokens = count_tokens(text or "")
+        LLM_CALL_TOKENS.observe(prompt_tokens, stage=stage, kind="prompt")
+        LLM_CALL_TOKENS.observe(completion_tokens, stage=stage, kind="completion")
+        if self.log_tokens:
+            print(f"LLM {stage} ({self.provider}/{self.model}): "
+                  f"{prompt_tokens} prompt tokens, {completion_tokens} completion tokens")
+
+    def _record_usage(self, usage, stage: str):
+        """Export token counts and prompt-cache hits when the provider reports them."""
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        LLM_TOKENS.inc(prompt_tokens, stage=stage, provider=self.provider, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, stage=stage, provider=self.provider, kind="completion")
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        if cached:
+            LLM_CACHE_HITS.inc(stage=stage, provider=self.provider)
+            LLM_TOKENS.inc(cached, stage=stage, provider=self.provider, kind="cached")
@@ -0,0 +1,132 @@
+"""Load-aware quality degradation for the chunk pipeline.
+
+Two pressure signals are watched: how many windows are being analyzed at once
+(the pipeline depth) and how late the event loop runs a scheduled wakeup (loop
+lag, sampled by a background task). Each maps to a target tier; the policy steps
+down to a cheaper tier as soon as the target rises, and only steps back up one
+tier at a time after the target has stayed lower for ``recover_seconds``, so a
+brief lull does not make quality flap.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .metrics import EVENT_LOOP_LAG, PIPELINE_DEPTH, QUALITY_TIER
+
+
+class QualityTier:
+    def __init__(self, level: int, name: str, beam_size: int, pitch: bool, content_every: int,
+                 defer_suggestions: bool, fast_stt: bool):
+        self.level = level
+        self.name = name
+        self.beam_size = beam_size              # Whisper beam for final transcripts
+        self.pitch = pitch                      # run the piptrack tone/intonation features
+        self.content_every = content_every      # LLM content analysis on every n-th window
+        self.defer_suggestions = defer_suggestions  # hold suggestions until load drops
+        self.fast_stt = fast_stt                # use DEGRADED_STT_MODEL when one is configured
+
+
+TIERS = [
+    QualityTier(0, "full", beam_size=5, pitch=True, content_every=1, defer_suggestions=False, fast_stt=False),
+    QualityTier(1, "reduced", beam_size=2, pitch=False, content_every=1, defer_suggestions=True, fast_stt=False),
+    QualityTier(2, "minimal", beam_size=1, pitch=False, content_every=2, defer_suggestions=True, fast_stt=True),
+]
+
+
+class LoadPolicy:
+    def __init__(self):
+        # (reduced, minimal) thresholds for each signal
+        self.depth_thresholds = (int(os.getenv('LOAD_DEPTH_REDUCED', '4')),
+                                 int(os.getenv('LOAD_DEPTH_MINIMAL', '8')))
+        self.lag_thresholds = (float(os.getenv('LOAD_LAG_REDUCED', '0.1')),
+                               float(os.getenv('LOAD_LAG_MINIMAL', '0.5')))
+        self.recover_seconds = float(os.getenv('LOAD_RECOVER_SECONDS', '10'))
+        # Words of deferred transcript kept per session (the most recent); older windows are dropped
+        self.defer_max_words = int(os.getenv('LOAD_DEFER_MAX_WORDS', '300'))
+        self.lag_interval = 0.25
+
+        self.depth = 0
+        self.lag = 0.0
+        self.level = 0
+        self._calm_since: Optional[float] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._deferred: Dict[str, Deque[str]] = {}
+        self._deferred_words: Dict[str, int] = {}
+
+    @property
+    def tier(self) -> QualityTier:
+        return TIERS[self.level]
+
+    def start(self):
+        """Start the loop-lag monitor on the running loop (idempotent)."""
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.get_running_loop().create_task(self._watch_loop_lag())
+
+    async def _watch_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, loop.time() - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            # Smooth so one slow callback does not drop the tier on its own
+            self.lag = 0.7 * self.lag + 0.3 * lag
+            self.update()
+
+    @contextmanager
+    def track(self):
+        """Count a window as in flight for the duration of the block."""
+        self.depth += 1
+        PIPELINE_DEPTH.set(self.depth)
+        self.update()
+        try:
+            yield self.tier
+        finally:
+            self.depth -= 1
+            PIPELINE_DEPTH.set(self.depth)
+
+    def _target(self) -> int:
+        target = 0
+        for level, (depth, lag) in enumerate(zip(self.depth_thresholds, self.lag_thresholds), start=1):
+            if self.depth > depth or self.lag > lag:
+                target = level
+        return target
+
+    def update(self, now: Optional[float] = None) -> QualityTier:
+        now = time.monotonic() if now is None else now
+        target = self._target()
+        if target > self.level:
+            self.level = target
+            self._calm_since = None
+        elif target < self.level:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.recover_seconds:
+                self.level -= 1
+                self._calm_since = now if target < self.level else None
+        else:
+            self._calm_since = None
+        QUALITY_TIER.set(self.level)
+        return self.tier
+
+    def defer(self, session_id: str, transcript: str):
+        """Hold a window's transcript until suggestions can run again (the last ``defer_max_words``)."""
+        windows = self._deferred.setdefault(session_id, deque())
+        windows.append(transcript)
+        words = self._deferred_words.get(session_id, 0) + len(transcript.split())
+        # A long overload must not turn into one huge prompt when it ends
+        while len(windows) > 1 and words > self.defer_max_words:
+            words -= len(windows.popleft().split())
+        self._deferred_words[session_id] = words
+
+    def take_deferred(self, session_id: str) -> List[str]:
+        self._deferred_words.pop(session_id, None)
+        return list(self._deferred.pop(session_id, ()))
+
+    def forget(self, session_id: str):
+        self._deferred.pop(session_id, None)
+        self._deferred_words.pop(session_id, None)
@@ -0,0 +1,122 @@
+"""In-process GGUF model (llama.cpp) for running the LLM stages offline.
+
+One :class:`LocalLLM` is kept per model file and shared by every ``LLMClient``
+in the process, so the content, question and suggestion engines use a single
+copy of the weights. llama.cpp is not thread-safe, so calls go through a FIFO
+request queue served by one worker thread; the queue depth is exported to
+``/metrics``. Every prompt starts with the same system prefix, and a RAM cache
+of model states lets a call that shares a prefix with an earlier one (the
+common system prompt, or a stage's own instructions) resume from the cached
+state instead of evaluating those tokens again.
+
+Requires ``llama-cpp-python``.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Generator, List, Optional
+
+from .metrics import LOCAL_LLM_QUEUE_DEPTH
+
+# Shared by every stage so the cached state of its tokens is reused across calls
+SYSTEM_PREFIX = ("You are an assistant inside a presentation coaching tool. You evaluate presentation "
+                 "transcripts and help speakers explain their material. Answer with JSON only.")
+
+_done = object()
+
+
+class _Request:
+    __slots__ = ("messages", "params", "future", "pieces", "cancelled")
+
+    def __init__(self, messages: List[Dict[str, str]], params: Dict[str, Any], stream: bool):
+        self.messages = messages
+        self.params = params
+        self.future: Future = Future()
+        self.pieces: Optional[queue.Queue] = queue.Queue() if stream else None
+        self.cancelled = False
+
+
+class LocalLLM:
+    _instances: Dict[str, "LocalLLM"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, model_path: str):
+        from llama_cpp import Llama, LlamaRAMCache
+
+        self.model_path = model_path
+        self.llama = Llama(
+            model_path=model_path,
+            n_ctx=int(os.getenv('LOCAL_N_CTX', '8192')),
+            n_threads=int(os.getenv('LOCAL_N_THREADS', str(os.cpu_count() or 4))),
+            n_gpu_layers=int(os.getenv('LOCAL_N_GPU_LAYERS', '0')),
+            verbose=False,
+        )
+        self.llama.set_cache(LlamaRAMCache(capacity_bytes=int(os.getenv('LOCAL_CACHE_MB', '512')) << 20))
+        self._requests: "queue.Queue[_Request]" = queue.Queue()
+        threading.Thread(target=self._serve, name="local-llm", daemon=True).start()
+
+    @classmethod
+    def shared(cls, model_path: str) -> "LocalLLM":
+        """The process-wide instance for ``model_path``, loaded on first use."""
+        with cls._instances_lock:
+            if model_path not in cls._instances:
+                cls._instances[model_path] = cls(model_path)
+            return cls._instances[model_path]
+
+    def messages(self, prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        content = f"{SYSTEM_PREFIX}\n{system}" if system else SYSTEM_PREFIX
+        return [{"role": "system", "content": content}, {"role": "user", "content": prompt}]
+
+    def submit(self, messages: List[Dict[str, str]], **params) -> Future:
+        """Queue a completion; the future resolves to llama.cpp's response dict."""
+        return self._enqueue(_Request(messages, params, stream=False)).future
+
+    def iter_stream(self, messages: List[Dict[str, str]], **params) -> Generator[str, None, Optional[dict]]:
+        """Queue a streamed completion and yield its text as it is generated (blocking).
+
+        Returns the usage dict when the model reports one.
+        """
+        request = self._enqueue(_Request(messages, params, stream=True))
+        try:
+            while True:
+                piece = request.pieces.get()
+                if piece is _done:
+                    break
+                yield piece
+            return request.future.result()["usage"]  # re-raises generation errors
+        finally:
+            # Stops generation at the next token when the caller goes away early
+            request.cancelled = True
+
+    def _enqueue(self, request: _Request) -> _Request:
+        self._requests.put(request)
+        LOCAL_LLM_QUEUE_DEPTH.set(self._requests.qsize())
+        return request
+
+    def _serve(self):
+        while True:
+            request = self._requests.get()
+            LOCAL_LLM_QUEUE_DEPTH.set(self._requests.qsize())
+            # Skip work whose caller already gave up (cancelled or deadline passed)
+            if request.cancelled or not request.future.set_running_or_notify_cancel():
+                continue
+            try:
+                if request.pieces is None:
+                    request.future.set_result(self.llama.create_chat_completion(request.messages, **request.params))
+                    continue
+                usage = None
+                for chunk in self.llama.create_chat_completion(request.messages, stream=True, **request.params):
+                    if request.cancelled:
+                        break
+                    usage = chunk.get("usage") or usage
+                    text = chunk["choices"][0]["delta"].get("content") if chunk["choices"] else None
+                    if text:
+                        request.pieces.put(text)
+                request.future.set_result({"usage": usage})
+            except Exception as e:
+                request.future.set_exception(e)
+            finally:
+                if request.pieces is not None:
+                    request.pieces.put(_done)
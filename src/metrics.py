@@ -0,0 +1,211 @@
+"""In-process counters and histograms exported in the Prometheus text format.
+
+Deliberately dependency-free: a handful of metric families shared by every
+module, rendered by ``GET /metrics`` in main.py.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Sequence, Tuple
+
+from .tracing import span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> Iterator[str]:
+        for line in super().render():
+            yield line.replace(" counter", " gauge") if line.startswith("# TYPE") else line
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            labels = _format_labels(self.labelnames, key)
+            for bound, count in zip(self.buckets, state):
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{bucket_labels} {count}"
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{inf_labels} {state[-1]}"
+            yield f"{self.name}_sum{labels} {state[-2]}"
+            yield f"{self.name}_count{labels} {state[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "presentation_stage_seconds", "Time spent in each pipeline stage", ("stage", "mode")
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "presentation_llm_request_seconds", "LLM completion latency", ("stage", "provider", "mode")
+)
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "presentation_llm_first_token_seconds", "Time to the first streamed LLM token", ("stage", "provider")
+)
+LLM_PARSE = REGISTRY.counter(
+    "presentation_llm_parse_total", "LLM responses by parse outcome (ok, repaired, failed)", ("stage", "outcome")
+)
+LLM_REPAIRS = REGISTRY.counter(
+    "presentation_llm_repairs_total", "Repair calls for responses that failed schema validation", ("stage", "outcome")
+)
+LLM_WASTED_CALLS = REGISTRY.counter(
+    "presentation_llm_wasted_calls_total", "LLM calls whose output was unusable even after repair", ("stage",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "presentation_llm_tokens_total", "Tokens reported by the LLM provider", ("stage", "provider", "kind")
+)
+LLM_CALL_TOKENS = REGISTRY.histogram(
+    "presentation_llm_call_tokens", "Prompt and completion tokens per LLM call, counted locally", ("stage", "kind"),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+LLM_CACHE_HITS = REGISTRY.counter(
+    "presentation_llm_cache_hits_total", "LLM calls whose prompt prefix was served from the provider cache",
+    ("stage", "provider")
+)
+ERRORS = REGISTRY.counter(
+    "presentation_errors_total", "Errors caught and handled per stage", ("stage",)
+)
+
+QUALITY_TIER = REGISTRY.gauge(
+    "presentation_quality_tier", "Current load-shedding quality tier (0 = full quality)"
+)
+PIPELINE_DEPTH = REGISTRY.gauge(
+    "presentation_pipeline_depth", "Windows currently being analyzed"
+)
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    "presentation_event_loop_lag_seconds", "How late the event loop ran a scheduled wakeup",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+DEGRADED_STEPS = REGISTRY.counter(
+    "presentation_degraded_steps_total", "Pipeline steps skipped or reduced by the load policy", ("step",)
+)
+
+LOCAL_LLM_QUEUE_DEPTH = REGISTRY.gauge(
+    "presentation_local_llm_queue_depth", "Completions waiting for the in-process model"
+)
+
+SCHEDULER_WAIT_SECONDS = REGISTRY.histogram(
+    "presentation_scheduler_wait_seconds", "Time jobs spent queued in the scheduler", ("priority",)
+)
+SCHEDULER_DROPPED = REGISTRY.counter(
+    "presentation_scheduler_dropped_total", "Scheduler jobs dropped before finishing", ("priority", "reason")
+)
+
+SPECULATIVE_QUESTIONS = REGISTRY.counter(
+    "presentation_speculative_questions_total",
+    "Questions generated ahead of time, and how many of them were sent or thrown away", ("outcome",)
+)
+
+CHUNKS_SKIPPED = REGISTRY.counter(
+    "presentation_chunks_skipped_total", "Windows whose analysis was skipped by the pre-filter", ("reason",)
+)
+
+
+@contextmanager
+def timed(stage: str, mode: str = ""):
+    """Record the duration of the ``with`` block under ``stage``, and as a span of the current trace."""
+    start = time.perf_counter()
+    try:
+        with span(stage, **({"mode": mode} if mode else {})):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, mode=mode)
@@ -1,6 +1,8 @@
+from dataclasses import dataclass, field, replace
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from enum import Enum
+from .serialization import to_dict
 
 class PresentationMode(str, Enum):
     PROFESSIONAL = "professional"
@@ -9,7 +11,23 @@ class PresentationMode(str, Enum):
     CASUAL = "casual"
     CUSTOM = "custom"
 
-class AudioMetrics(BaseModel):
+class Record:
+    """Base of the per-window results: slotted dataclasses built without validation.
+
+    They are created for every window, so they skip pydantic; data is validated where
+    it enters (LLM responses in ``structured_output``, API request models).
+    ``dict()`` and ``copy(update=...)`` match the pydantic methods used elsewhere.
+    """
+    __slots__ = ()
+
+    def dict(self) -> Dict[str, Any]:
+        return to_dict(self)
+
+    def copy(self, update: Dict[str, Any] = None):
+        return replace(self, **(update or {}))
+
+@dataclass(slots=True)
+class AudioMetrics(Record):
     transcription: str
     pace: float  # words per minute
     tone: float  # average pitch
@@ -17,29 +35,40 @@ class AudioMetrics(BaseModel):
     filler_count: int
     intonation_variance: float
     clarity_score: float
+    language: str = ""
+    word_count: int = 0
+    speaking_time: float = 0.0  # seconds from first to last word
+    pause_distribution: Dict[str, int] = field(default_factory=dict)  # pause-length bucket -> count
+    mean_pause: float = 0.0  # seconds
+    rate_curve: List[float] = field(default_factory=list)  # words per minute per second of audio
 
-class ContentAnalysis(BaseModel):
+@dataclass(slots=True)
+class ContentAnalysis(Record):
     clarity_score: float
     flow_score: float
     technical_accuracy: float
     explanation_quality: float
     suggested_improvements: List[str]
 
-class PresentationScore(BaseModel):
+@dataclass(slots=True)
+class PresentationScore(Record):
     overall_score: float
     audio_metrics: AudioMetrics
     content_analysis: ContentAnalysis
     mode: PresentationMode
     topic: str
     timestamp: str
+    skipped: Optional[str] = None  # pre-filter reason when the previous scores were carried forward
 
-class Question(BaseModel):
+@dataclass(slots=True)
+class Question(Record):
     question: str
     category: str
     difficulty: str
     context: Optional[str] = None
 
-class Suggestion(BaseModel):
+@dataclass(slots=True)
+class Suggestion(Record):
     type: str  # metaphor, analogy, image
     suggestion: str
     context: str
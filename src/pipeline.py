@@ -1,15 +1,65 @@
-from speech_to_text import SpeechToText
-from content_analyzer import ContentAnalyzer
-from scoring_system import ScoringSystem
-from models import PresentationMode, ContentAnalysis
+"""Offline scoring of recorded presentations.
+
+``FeedbackPipeline`` scores a single recording. Run as a module, it scores a
+directory or manifest of recordings in bulk:
+
+    python -m src.pipeline recordings/ --topic "Distributed systems" --mode technical --output scores.jsonl
+
+Transcription and audio features run in a process pool (one Whisper model per
+worker, ``--workers`` defaults to the number of cores) while content analysis
+runs as soon as each file's transcript is ready, with at most
+``--llm-concurrency`` LLM calls in flight. Every result is appended to the JSONL
+output as it completes, and a restarted run skips the files already scored
+there. ``--parquet`` also writes the results as Parquet at the end (requires
+``pyarrow``).
+
+A manifest is a ``.jsonl`` or ``.csv`` file with a ``path`` per recording and
+optional ``topic`` and ``mode`` overriding the command-line defaults; relative
+paths are resolved against the manifest's directory.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import anyio
+
+from .audio_analyzer import AudioAnalyzer
+from .audio_ingest import load_audio
+from .content_analyzer import ContentAnalyzer
+from .metrics import ERRORS
+from .models import AudioMetrics, ContentAnalysis, PresentationMode
+from .scoring_system import ScoringSystem
+from .speech_to_text import SpeechToText
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".webm", ".m4a")
+
 
 class FeedbackPipeline:
     def __init__(self, stt_model_path="base", device="cpu"):
-        """Initialize the pipeline components."""
-        self.speech_to_text = SpeechToText(model_path=stt_model_path, device=device)
+        """Initialize the pipeline components.
+
+        The Whisper model is loaded on first use, so a pipeline that only scores
+        audio analyzed elsewhere (the batch workers) never loads it.
+        """
+        self.stt_model_path = stt_model_path
+        self.device = device
+        self._audio_analyzer: Optional[AudioAnalyzer] = None
         self.content_analyzer = ContentAnalyzer()
         self.scoring_system = ScoringSystem()
 
+    @property
+    def audio_analyzer(self) -> AudioAnalyzer:
+        if self._audio_analyzer is None:
+            self._audio_analyzer = AudioAnalyzer(stt_model_path=self.stt_model_path, device=self.device)
+        return self._audio_analyzer
+
     async def process_audio(self, audio_path: str, topic: str, mode: PresentationMode):
         """Process the audio file and provide feedback.
 
@@ -21,25 +71,27 @@ class FeedbackPipeline:
         Returns:
             dict: Feedback report including transcription, analysis, and scores.
         """
-        # Step 1: Transcribe audio
-        transcription_result = self.speech_to_text.transcribe(audio_path)
-        transcription = transcription_result["transcription"]
-        language = transcription_result["language"]
+        # Step 1: Transcribe audio and extract features
+        audio_metrics = await anyio.to_thread.run_sync(analyze_file, self.audio_analyzer, audio_path)
+
+        # Steps 2-4: analyze the transcription, score and compile feedback
+        return await self.score(audio_metrics, topic, mode)
 
-        # Step 2: Analyze transcription
+    async def score(self, audio_metrics: AudioMetrics, topic: str, mode: PresentationMode) -> Dict[str, Any]:
+        """Analyze the transcription of already analyzed audio and score it."""
         analysis: ContentAnalysis = await self.content_analyzer.analyze_content(
-            transcript=transcription,
+            transcript=audio_metrics.transcription,
             topic=topic,
             mode=mode
         )
 
-        # Step 3: Score the analysis
-        scores = self.scoring_system.calculate_scores(analysis)
+        score = self.scoring_system.calculate_overall_score(audio_metrics, analysis, mode, topic)
 
-        # Step 4: Compile feedback
-        feedback = {
-            "transcription": transcription,
-            "language": language,
+        return {
+            "transcription": audio_metrics.transcription,
+            "language": audio_metrics.language,
+            "audio": {key: value for key, value in audio_metrics.dict().items()
+                      if key not in ("transcription", "language")},
             "analysis": {
                 "clarity_score": analysis.clarity_score,
                 "flow_score": analysis.flow_score,
@@ -47,21 +99,167 @@ class FeedbackPipeline:
                 "explanation_quality": analysis.explanation_quality,
                 "suggestions": analysis.suggested_improvements
             },
-            "scores": scores
+            "scores": self.scoring_system.get_score_breakdown(score)
         }
 
-        return feedback
 
-# Example usage
-if __name__ == "__main__":
-    import asyncio
-    from models import PresentationMode
+def analyze_file(audio_analyzer: AudioAnalyzer, audio_path: str) -> AudioMetrics:
+    """Transcribe and extract audio features; unreadable files raise instead of scoring as silence."""
+    return audio_analyzer.analyze_audio(load_audio(audio_path))
+
+
+# --- Batch scoring -----------------------------------------------------------
+
+class Recording(NamedTuple):
+    path: str
+    topic: str
+    mode: PresentationMode
+
+
+_worker_analyzer: Optional[AudioAnalyzer] = None
+
+
+def _init_worker(stt_model_path: str, device: str):
+    global _worker_analyzer
+    # One model per process, each decoding on a single thread, so workers == cores
+    speech_to_text = SpeechToText(model_path=stt_model_path, device=device, cpu_threads=1)
+    _worker_analyzer = AudioAnalyzer(speech_to_text=speech_to_text)
+
 
-    pipeline = FeedbackPipeline()
-    feedback = asyncio.run(pipeline.process_audio(
-        audio_path="path_to_audio_file.wav",
-        topic="Artificial Intelligence",
-        mode=PresentationMode.TECHNICAL
-    ))
+def _analyze_in_worker(audio_path: str) -> AudioMetrics:
+    return analyze_file(_worker_analyzer, audio_path)
 
-    print("Feedback Report:", feedback)
\ No newline at end of file
+
+def find_recordings(source: str, topic: str, mode: PresentationMode) -> List[Recording]:
+    """Recordings under a directory (recursively) or listed in a ``.jsonl``/``.csv`` manifest."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(AUDIO_EXTENSIONS))
+        return [Recording(path, topic, mode) for path in sorted(paths)]
+
+    with open(source, newline="") as f:
+        if source.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    base = os.path.dirname(os.path.abspath(source))
+    return [
+        Recording(
+            os.path.join(base, row["path"]),
+            row.get("topic") or topic,
+            PresentationMode(row["mode"]) if row.get("mode") else mode
+        )
+        for row in rows
+    ]
+
+
+def completed_paths(output: str) -> Set[str]:
+    """Paths already scored in ``output`` (failed files and a torn last line are retried)."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                done.add(record["path"])
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+async def score_batch(recordings: List[Recording], output: str, workers: int, llm_concurrency: int,
+                      stt_model_path: str = "base", device: str = "cpu") -> Dict[str, int]:
+    """Score ``recordings`` not yet in ``output``, appending one JSON line per file as it finishes."""
+    done = completed_paths(output)
+    todo = [recording for recording in recordings if recording.path not in done]
+    counts = {"skipped": len(recordings) - len(todo), "scored": 0, "failed": 0}
+    print(f"{len(todo)} recordings to score ({counts['skipped']} already in {output})", file=sys.stderr)
+    if not todo:
+        return counts
+
+    pipeline = FeedbackPipeline(stt_model_path=stt_model_path, device=device)
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stt_model_path, device)) as pool, \
+            open(output, "a") as out:
+        if out.tell() and not _ends_with_newline(output):
+            out.write("\n")  # a run killed mid-write left a torn last line
+
+        async def run(recording: Recording):
+            record: Dict[str, Any] = {"path": recording.path, "topic": recording.topic, "mode": recording.mode.value}
+            try:
+                audio_metrics = await loop.run_in_executor(pool, _analyze_in_worker, recording.path)
+                async with llm_slots:
+                    record.update(await pipeline.score(audio_metrics, recording.topic, recording.mode))
+                counts["scored"] += 1
+            except Exception as e:
+                ERRORS.inc(stage="batch")
+                print(f"Error scoring {recording.path}: {e}", file=sys.stderr)
+                record["error"] = str(e)
+                counts["failed"] += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            finished = counts["scored"] + counts["failed"]
+            if finished % 10 == 0 or finished == len(todo):
+                rate = finished / (time.perf_counter() - start)
+                print(f"{finished}/{len(todo)} done ({rate:.2f} files/s)", file=sys.stderr)
+
+        await asyncio.gather(*(run(recording) for recording in todo))
+    return counts
+
+
+def write_parquet(output: str, parquet_path: str):
+    """Write the latest successful result per file in ``output`` as Parquet."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed; skipping Parquet output", file=sys.stderr)
+        return
+    records: Dict[str, Dict[str, Any]] = {}
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "error" not in record:
+                records[record["path"]] = record
+    pq.write_table(pa.Table.from_pylist(list(records.values())), parquet_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of recordings or a .jsonl/.csv manifest")
+    parser.add_argument("--output", default="scores.jsonl", help="JSONL results, appended to and resumed from")
+    parser.add_argument("--parquet", help="also write the results to this Parquet file")
+    parser.add_argument("--topic", default="General presentation")
+    parser.add_argument("--mode", default=PresentationMode.PROFESSIONAL.value,
+                        choices=[mode.value for mode in PresentationMode])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="STT/feature processes")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="content-analysis calls in flight")
+    parser.add_argument("--stt-model", default="base")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.source, args.topic, PresentationMode(args.mode))
+    counts = asyncio.run(score_batch(recordings, args.output, args.workers, args.llm_concurrency,
+                                     args.stt_model, args.device))
+    print(json.dumps(counts), file=sys.stderr)
+    if args.parquet:
+        write_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
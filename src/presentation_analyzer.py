@@ -1,23 +1,99 @@
 import asyncio
+import datetime
+import functools
 import tempfile
+import threading
 import os
 from typing import List, Optional, Dict, Any
-from .models import PresentationSession, PresentationMode, PresentationScore, Question, Suggestion
+import anyio
+from .models import AudioMetrics, PresentationSession, PresentationMode, PresentationScore, Question, Suggestion
+from .analytics import ANALYTICS_DB, AnalyticsStore
 from .audio_analyzer import AudioAnalyzer
+from .audio_ingest import TARGET_SAMPLE_RATE, normalize_audio
+from .chunk_filter import ChunkFilter
+from .feature_store import FEATURE_STORE_DIR, FeatureStore
 from .content_analyzer import ContentAnalyzer
-from .question_generator import QuestionGenerator
-from .suggestion_engine import SuggestionEngine
+from .question_generator import QuestionCallback, QuestionGenerator
+from .suggestion_engine import SuggestionCallback, SuggestionEngine
 from .scoring_system import ScoringSystem
+from .llm_client import LLMClient
+from .load_policy import LoadPolicy, QualityTier
+from .scheduler import JobScheduler
+from .speculation import QuestionSpeculator
+from .transcript_buffer import TranscriptBuffer
+from .metrics import DEGRADED_STEPS, ERRORS, timed
+
+# Assumed length of a chunk that has neither audio nor word timings
+CHUNK_SECONDS = 5.0
 
 class PresentationAnalyzer:
-    def __init__(self):
-        self.audio_analyzer = AudioAnalyzer()
-        self.content_analyzer = ContentAnalyzer()
-        self.question_generator = QuestionGenerator()
-        self.suggestion_engine = SuggestionEngine()
+    def __init__(self, audio_analyzer: AudioAnalyzer = None, llm: LLMClient = None,
+                 analytics_db: Optional[str] = ANALYTICS_DB):
+        """Set up the analyzer; the model-backed components are built on first use.
+
+        ``audio_analyzer`` and ``llm`` can be injected (e.g. with fakes for benchmarks);
+        when ``llm`` is given it is shared by all three LLM-backed engines. ``analytics_db``
+        is the SQLite file analyzed chunks are stored in (empty: no analytics). Call
+        :meth:`warm_up` to build everything up front instead (the server does on startup).
+        """
+        self._llm = llm
+        self._audio_analyzer = audio_analyzer
+        self._content_analyzer: Optional[ContentAnalyzer] = None
+        self._question_generator: Optional[QuestionGenerator] = None
+        self._suggestion_engine: Optional[SuggestionEngine] = None
+        self._building = threading.Lock()
         self.scoring_system = ScoringSystem()
         self.sessions: Dict[str, PresentationSession] = {}
+        self.load_policy = LoadPolicy()
+        self.chunk_filter = ChunkFilter()
+        self.transcripts: Dict[str, TranscriptBuffer] = {}
+        # Analyzed chunks are persisted for the historical queries (disabled with ANALYTICS_DB=)
+        self.analytics: Optional[AnalyticsStore] = AnalyticsStore(analytics_db) if analytics_db else None
+        # Per-frame audio features kept for re-scoring (src/rescore.py) when FEATURE_STORE_DIR is set
+        self.feature_store: Optional[FeatureStore] = FeatureStore() if FEATURE_STORE_DIR else None
+        # Chunks started per session; numbers the feature files even when windows are analyzed concurrently
+        self._chunk_counts: Dict[str, int] = {}
+        # Fair, prioritized execution of every session's transcript/scoring/LLM work
+        self.scheduler = JobScheduler()
+        # Questions generated at low priority ahead of the windows that will show them
+        self.speculator = QuestionSpeculator(self.scheduler, self._speculative_questions)
     
+    def _component(self, name: str, build):
+        # Components are first touched from worker threads too; build each exactly once
+        component = getattr(self, name)
+        if component is None:
+            with self._building:
+                component = getattr(self, name)
+                if component is None:
+                    component = build()
+                    setattr(self, name, component)
+        return component
+
+    @property
+    def audio_analyzer(self) -> AudioAnalyzer:
+        """Loads the Whisper model on first transcription."""
+        return self._component("_audio_analyzer", AudioAnalyzer)
+
+    @property
+    def content_analyzer(self) -> ContentAnalyzer:
+        return self._component("_content_analyzer", lambda: ContentAnalyzer(self._llm))
+
+    @property
+    def question_generator(self) -> QuestionGenerator:
+        return self._component("_question_generator", lambda: QuestionGenerator(self._llm))
+
+    @property
+    def suggestion_engine(self) -> SuggestionEngine:
+        return self._component("_suggestion_engine", lambda: SuggestionEngine(self._llm))
+
+    def warm_up(self):
+        """Build every component now (blocking: loads the Whisper model and LLM clients)."""
+        self.audio_analyzer.warm_up()
+        # Reading each lazy property builds it
+        _ = self.content_analyzer
+        _ = self.question_generator
+        _ = self.suggestion_engine
+
     def create_session(self, session_id: str, mode: PresentationMode, topic: str, 
                       custom_context: str = None, expert_documents: List[str] = None) -> PresentationSession:
         """Create a new presentation session"""
@@ -31,57 +107,175 @@ class PresentationAnalyzer:
         )
         
         self.sessions[session_id] = session
+        self.transcripts[session_id] = TranscriptBuffer()
         return session
     
     async def analyze_presentation_chunk(self, session_id: str, audio_data: bytes, 
-                                       transcript: str) -> PresentationScore:
-        """Analyze a chunk of presentation audio and text"""
+                                       transcript: str, stt_result: Dict[str, Any] = None,
+                                       tier: QualityTier = None) -> PresentationScore:
+        """Analyze a chunk of presentation audio and text.
+
+        ``stt_result`` is an already-run transcription (with word timestamps) that the
+        audio analyzer reuses instead of transcribing the chunk again. ``tier`` is the
+        load policy's quality tier; degraded tiers carry pitch features forward from
+        the previous chunk and stretch the content-analysis interval.
+
+        Content analysis runs on the session's rolling transcript (the last
+        ``CONTENT_WINDOW_SECONDS``) every ``CONTENT_INTERVAL_SECONDS`` of speech; the
+        chunks in between get content scores interpolated between the last two runs.
+
+        Empty, silent, very short or near-duplicate chunks are not analyzed: the
+        previous score is carried forward with ``skipped`` set to the reason (short
+        text is merged into the next analyzed chunk). ``audio_data`` may be empty
+        for text-only analysis.
+        """
         
         if session_id not in self.sessions:
             raise ValueError(f"Session {session_id} not found")
         
         session = self.sessions[session_id]
+        tier = tier or self.load_policy.tier
+        previous = session.scores[-1] if session.scores else None
+        # Reserved before the first await: concurrent windows of a session get distinct numbers
+        chunk = self._chunk_counts.get(session_id, 0)
+        self._chunk_counts[session_id] = chunk + 1
         
-        # Analyze audio
-        audio_metrics = self.audio_analyzer.analyze_audio(audio_data)
+        mode = session.mode.value
+        
+        # Decode once: the pre-filter and the audio features share the samples
+        samples = None
+        if audio_data:
+            with timed("audio.decode"):
+                try:
+                    samples = await anyio.to_thread.run_sync(normalize_audio, bytes(audio_data))
+                except Exception as e:
+                    ERRORS.inc(stage="audio.decode")
+                    print(f"Error decoding audio: {e}")
         
-        # Analyze content
-        content_analysis = await self.content_analyzer.analyze_content(
-            transcript, session.topic, session.mode, session.custom_context
+        transcripts = self.transcripts.setdefault(session_id, TranscriptBuffer())
+        if samples is not None:
+            duration = len(samples) / TARGET_SAMPLE_RATE
+        elif stt_result and stt_result.get("words"):
+            duration = stt_result["words"][-1]["end"]
+        else:
+            duration = CHUNK_SECONDS
+
+        skip_reason, transcript = self.chunk_filter.check(
+            session_id, transcript, samples, can_skip=previous is not None
         )
+        if skip_reason:
+            # Still counts toward elapsed time, so content analysis stays on schedule
+            transcripts.append("", duration)
+            score = previous.copy(update={"skipped": skip_reason, "timestamp": datetime.datetime.now().isoformat()})
+            session.scores.append(score)
+            return score
+        
+        # Analyze audio
+        features = None
+        if not audio_data:
+            audio_metrics = previous.audio_metrics.copy() if previous else AudioMetrics(
+                transcription=transcript, pace=0.0, tone=0.0, filler_words=[], filler_count=0,
+                intonation_variance=0.0, clarity_score=0.0
+            )
+        else:
+            with timed("audio", mode):
+                # In a worker thread: pitch tracking would otherwise stall every other session on the loop
+                audio_metrics, features = await anyio.to_thread.run_sync(functools.partial(
+                    self.audio_analyzer.analyze_with_features, samples if samples is not None else audio_data,
+                    stt_result=stt_result, pitch=tier.pitch
+                ))
+        if not tier.pitch and previous is not None:
+            audio_metrics.tone = previous.audio_metrics.tone
+            audio_metrics.intonation_variance = previous.audio_metrics.intonation_variance
+        
+        # Analyze content over the rolling window when it is due (less often under load)
+        transcripts.append(transcript, duration)
+        if transcripts.due(tier.content_every):
+            with timed("content", mode):
+                transcripts.record(await self.content_analyzer.analyze_content(
+                    transcripts.text(), session.topic, session.mode, session.custom_context
+                ))
+        elif transcripts.due():
+            DEGRADED_STEPS.inc(step="content")
+        content_analysis = transcripts.current()
         
         # Calculate overall score
-        score = self.scoring_system.calculate_overall_score(
-            audio_metrics, content_analysis, session.mode, session.topic
-        )
+        with timed("scoring", mode):
+            score = self.scoring_system.calculate_overall_score(
+                audio_metrics, content_analysis, session.mode, session.topic
+            )
         
         # Add to session
+        if self.feature_store is not None and features is not None:
+            features.meta = {"mode": session.mode.value, "topic": session.topic, "timestamp": score.timestamp,
+                             "content": content_analysis.dict(), "overall_score": score.overall_score}
+            try:
+                await anyio.to_thread.run_sync(self.feature_store.write, session_id, chunk, features)
+            except OSError as e:
+                ERRORS.inc(stage="feature_store")
+                print(f"Error storing audio features: {e}")
         session.scores.append(score)
+        if self.analytics is not None:
+            self.analytics.record(session_id, score)
+            if self.analytics.due():
+                await anyio.to_thread.run_sync(self.analytics.flush)
         
         return score
     
-    async def generate_questions_for_session(self, session_id: str, transcript: str) -> List[Question]:
-        """Generate questions for a session"""
+    async def generate_questions_for_session(self, session_id: str, transcript: str,
+                                             on_question: QuestionCallback = None) -> List[Question]:
+        """Generate questions for a session; ``on_question`` receives each one as it streams in"""
         
         if session_id not in self.sessions:
             raise ValueError(f"Session {session_id} not found")
         
         session = self.sessions[session_id]
         
-        questions = await self.question_generator.generate_questions(
-            transcript, session.topic, session.mode, session.expert_documents
-        )
+        with timed("questions", session.mode.value):
+            questions = await self.question_generator.generate_questions(
+                transcript, session.topic, session.mode, session.expert_documents, on_question
+            )
         
         session.questions.extend(questions)
         return questions
     
-    async def generate_suggestions_for_session(self, session_id: str, transcript: str) -> List[Suggestion]:
-        """Generate suggestions for improving unclear explanations"""
+    async def _speculative_questions(self, session_id: str, transcript: str) -> List[Question]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return []
+        with timed("questions.speculative", session.mode.value):
+            return await self.question_generator.generate_questions(
+                transcript, session.topic, session.mode, session.expert_documents
+            )
+
+    def take_speculative_questions(self, session_id: str, limit: int = 3) -> List[Question]:
+        """Questions generated ahead of time for the session, if any are ready (oldest first)."""
+        questions = self.speculator.take(session_id, limit)
+        if session_id in self.sessions:
+            self.sessions[session_id].questions.extend(questions)
+        return questions
+    
+    async def generate_suggestions_for_session(self, session_id: str, transcript: str,
+                                               tier: QualityTier = None,
+                                               on_suggestion: SuggestionCallback = None) -> List[Suggestion]:
+        """Generate suggestions for improving unclear explanations.
+
+        ``on_suggestion`` receives each suggestion as it streams in.
+
+        Under load (``tier.defer_suggestions``) the transcript is held back and covered
+        by the first call made once the load policy has recovered.
+        """
         
         if session_id not in self.sessions:
             raise ValueError(f"Session {session_id} not found")
         
         session = self.sessions[session_id]
+        tier = tier or self.load_policy.tier
+        if tier.defer_suggestions:
+            DEGRADED_STEPS.inc(step="suggestions")
+            self.load_policy.defer(session_id, transcript)
+            return []
+        transcript = " ".join(self.load_policy.take_deferred(session_id) + [transcript])
         
         # Detect unclear explanations
         unclear_sentences = self.content_analyzer.detect_unclear_explanations(transcript)
@@ -90,9 +284,10 @@ class PresentationAnalyzer:
             return []
         
         # Generate suggestions
-        suggestions = await self.suggestion_engine.generate_suggestions(
-            transcript, session.topic, session.mode, unclear_sentences
-        )
+        with timed("suggestions", session.mode.value):
+            suggestions = await self.suggestion_engine.generate_suggestions(
+                transcript, session.topic, session.mode, unclear_sentences, on_suggestion
+            )
         
         session.suggestions.extend(suggestions)
         return suggestions
@@ -108,10 +303,11 @@ class PresentationAnalyzer:
         if not session.scores:
             return {"error": "No scores available for this session"}
         
-        # Calculate average scores
-        avg_overall = sum(score.overall_score for score in session.scores) / len(session.scores)
-        avg_audio = sum(score.audio_metrics.clarity_score for score in session.scores) / len(session.scores)
-        avg_content = sum(score.content_analysis.clarity_score for score in session.scores) / len(session.scores)
+        # Calculate average scores (carried-forward chunks would count their source twice)
+        analyzed = [score for score in session.scores if not score.skipped]
+        avg_overall = sum(score.overall_score for score in analyzed) / len(analyzed)
+        avg_audio = sum(score.audio_metrics.clarity_score for score in analyzed) / len(analyzed)
+        avg_content = sum(score.content_analysis.clarity_score for score in analyzed) / len(analyzed)
         
         # Get latest score breakdown
         latest_score = session.scores[-1]
@@ -122,6 +318,7 @@ class PresentationAnalyzer:
             'topic': session.topic,
             'mode': session.mode.value,
             'total_chunks': len(session.scores),
+            'skipped_chunks': len(session.scores) - len(analyzed),
             'average_scores': {
                 'overall': avg_overall,
                 'audio': avg_audio,
@@ -142,5 +339,11 @@ class PresentationAnalyzer:
         """Delete a session"""
         if session_id in self.sessions:
             del self.sessions[session_id]
+            self.load_policy.forget(session_id)
+            self.chunk_filter.forget(session_id)
+            self.transcripts.pop(session_id, None)
+            self._chunk_counts.pop(session_id, None)
+            self.scheduler.cancel_session(session_id)
+            self.speculator.forget(session_id)
             return True
         return False
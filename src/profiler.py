@@ -0,0 +1,132 @@
+"""Low-overhead sampling profiler producing collapsed stacks for flamegraphs.
+
+Every ``interval`` the current frame of every thread is walked, and stacks
+are counted for the threads that used CPU since the previous sample, so idle
+worker threads and the event loop waiting in ``epoll`` do not drown out real
+work. The output is the "collapsed" format understood by
+``flamegraph.pl``, speedscope and most flamegraph viewers::
+
+    main (main.py:12);handler (src/foo.py:40);hot_loop (src/foo.py:55) 137
+
+Inside an asyncio server (and whenever it is not started from the main
+thread, where signals cannot be installed) a background sampler thread does
+this on wall-clock time. It takes the GIL at least every switch interval, so
+coroutines burning CPU on the event loop thread are sampled where they run.
+Otherwise a ``SIGPROF`` interval timer (``signal.setitimer``) samples every
+``interval`` seconds of process CPU time from a Python signal handler.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+_active_lock = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    cwd = os.getcwd()
+    if filename.startswith(cwd):
+        filename = os.path.relpath(filename, cwd)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._label_cache: Dict[object, str] = {}
+        self._cpu_seen: Dict[int, float] = {}
+        self._previous_handler = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._use_signal = False
+
+    def start(self, thread: bool = False):
+        """Start sampling; ``thread`` forces the sampler thread (needed under a running event loop)."""
+        if not _active_lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        self._use_signal = (not thread and hasattr(signal, "setitimer")
+                            and threading.current_thread() is threading.main_thread())
+        if self._use_signal:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._handle_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._thread = threading.Thread(target=self._run_thread, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        try:
+            if self._use_signal:
+                signal.setitimer(signal.ITIMER_PROF, 0, 0)
+                previous = self._previous_handler
+                # SIGPROF's default action kills the process; ignore any stray tick instead
+                if previous in (None, signal.SIG_DFL):
+                    previous = signal.SIG_IGN
+                signal.signal(signal.SIGPROF, previous)
+            elif self._thread is not None:
+                self._stop.set()
+                self._thread.join()
+        finally:
+            _active_lock.release()
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _handle_signal(self, signum, frame):
+        self._sample()
+
+    def _run_thread(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _used_cpu(self, thread_id: int) -> bool:
+        """True when the thread consumed CPU since the last sample (or CPU clocks are unavailable)."""
+        try:
+            now = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+        except (AttributeError, OSError, OverflowError):
+            return True
+        previous = self._cpu_seen.get(thread_id)
+        self._cpu_seen[thread_id] = now
+        return previous is None or now > previous
+
+    def _sample(self):
+        # In the sampler thread the calling thread's stack is only the sampler itself;
+        # a Python signal handler runs on top of the interrupted frame, which is kept.
+        own = threading.get_ident() if self._thread is not None else None
+        skip = (self._sample.__code__, self._handle_signal.__code__)
+        self.samples += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or not self._used_cpu(thread_id):
+                continue
+            labels = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in skip:
+                    label = self._label_cache.get(code)
+                    if label is None:
+                        label = self._label_cache[code] = _frame_label(code)
+                    labels.append(label)
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+
+async def profile_for(seconds: float, interval: float = 0.005) -> str:
+    """Sample the whole process for ``seconds`` and return collapsed stacks."""
+    profiler = SamplingProfiler(interval)
+    # A signal handler would only run once the loop thread is back in the loop, missing coroutine work
+    profiler.start(thread=True)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        result = profiler.stop()
+    return result
@@ -0,0 +1,136 @@
+"""Prompt compaction and per-stage token budgets.
+
+Prompt templates are written as indented triple-quoted strings; :func:`compact`
+strips that indentation and the blank lines before the prompt is sent. Each LLM
+stage has a budget of prompt tokens (``PROMPT_BUDGET_<STAGE>`` overrides the
+default). :func:`build_prompt` fills a template and shrinks its variable inputs
+until the prompt fits: transcripts keep their most recent sentences, expert
+documents keep the passages that share the most words with the transcript.
+
+Tokens are counted with ``tiktoken`` when it is installed (its encodings are
+local files once downloaded) and estimated from words and punctuation otherwise.
+"""
+
+import os
+import re
+import textwrap
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+try:
+    import tiktoken
+except ImportError:  # optional: falls back to a word/punctuation estimate
+    tiktoken = None
+
+DEFAULT_BUDGETS = {
+    "content": 2500,
+    "questions": 2000,
+    "expert_questions": 6000,
+    "suggestions": 600,
+}
+FALLBACK_BUDGET = 2000
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+Shrink = Callable[[str, int], str]
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(os.getenv('PROMPT_TOKENIZER', 'o200k_base'))
+    except Exception as e:  # encoding files not cached and no network
+        print(f"Tokenizer unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Roughly one token per short word or punctuation mark, one per 4 characters of long words
+    return sum(max(1, len(word) // 4) for word in _WORDS.findall(text))
+
+
+def budget(stage: str) -> int:
+    """Prompt token budget of ``stage`` (``suggestions.metaphor`` uses the ``suggestions`` budget)."""
+    base = stage.split(".")[0]
+    default = DEFAULT_BUDGETS.get(base, FALLBACK_BUDGET)
+    return int(os.getenv(f'PROMPT_BUDGET_{base.upper()}', str(default)))
+
+
+def compact(template: str) -> str:
+    """Drop the template's indentation, trailing spaces and blank lines."""
+    lines = (line.rstrip() for line in textwrap.dedent(template).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def keep_tail(text: str, tokens: int) -> str:
+    """The most recent sentences of ``text`` that fit in ``tokens``."""
+    if count_tokens(text) <= tokens:
+        return text
+    kept: List[str] = []
+    used = 0
+    for sentence in reversed(re.split(r"(?<=[.!?])\s+", text.strip())):
+        cost = count_tokens(sentence)
+        if used + cost > tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        # A single sentence longer than the budget: keep its last words
+        words = text.split()
+        while words and count_tokens(" ".join(words)) > tokens:
+            words = words[len(words) // 4 + 1:]
+        return " ".join(words)
+    return " ".join(reversed(kept))
+
+
+def keep_relevant(query: str) -> Shrink:
+    """Shrink to the paragraphs sharing the most words with ``query``, kept in document order."""
+    query_words = set(w.lower() for w in re.findall(r"[^\W\d_]{4,}", query))
+
+    def shrink(text: str, tokens: int) -> str:
+        if count_tokens(text) <= tokens:
+            return text
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n|\n(?=\S)", text) if p.strip()]
+        scored = []
+        for index, paragraph in enumerate(paragraphs):
+            words = set(w.lower() for w in re.findall(r"[^\W\d_]{4,}", paragraph))
+            overlap = len(words & query_words) / (len(words) ** 0.5 or 1.0)
+            scored.append((overlap, index, paragraph))
+        chosen = []
+        used = 0
+        for _, index, paragraph in sorted(scored, key=lambda s: (-s[0], s[1])):
+            cost = count_tokens(paragraph)
+            if used + cost <= tokens:
+                chosen.append((index, paragraph))
+                used += cost
+        if not chosen:
+            return keep_tail(paragraphs[0], tokens) if paragraphs else ""
+        return "\n".join(paragraph for _, paragraph in sorted(chosen))
+
+    return shrink
+
+
+def build_prompt(stage: str, template: str, shrink: Dict[str, Shrink] = None, **fields) -> str:
+    """Compact ``template``, fill it with ``fields`` and shrink the ``shrink`` fields to the stage budget.
+
+    The budget left after the fixed text is split between the shrinkable fields in
+    proportion to their size; a field that needs less than its share passes the rest on.
+    """
+    template = compact(template)
+    shrink = shrink or {}
+    fixed = template.format(**{**fields, **{name: "" for name in shrink}})
+    available = max(0, budget(stage) - count_tokens(fixed))
+    sizes = {name: count_tokens(fields[name]) for name in shrink}
+    for name in sorted(shrink, key=sizes.get):
+        share = available * sizes[name] // max(1, sum(sizes.values()))
+        if sizes.pop(name) > share:
+            fields[name] = shrink[name](fields[name], share)
+        available = max(0, available - count_tokens(fields[name]))
+    return template.format(**fields)
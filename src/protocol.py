@@ -0,0 +1,258 @@
+"""Versioned binary framing for the presentation WebSocket.
+
+Uplink frames carry audio behind a fixed little-endian header::
+
+    magic "PC" | version u8 | codec u8 | channels u8 | flags u8 | sample_rate u32 | seq u32 | length u32
+
+Downlink frames carry feedback messages behind a shorter header::
+
+    magic "PF" | version u8 | encoding u8 | flags u8 | pad u8 | seq u32
+
+A client opts in by sending a JSON text message before any audio, e.g.
+``{"protocol": 1, "encoding": "msgpack", "compression": "deflate", "delta": true}``.
+Clients that skip the handshake keep the legacy raw-PCM / JSON-text behaviour.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .audio_ingest import TARGET_SAMPLE_RATE, StreamResampler, decode_audio, to_mono
+from .serialization import dumpb, plain
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON encoding is always available
+    msgpack = None
+
+PROTOCOL_VERSION = 1
+
+UPLINK_MAGIC = b"PC"
+UPLINK_HEADER = struct.Struct("<2sBBBBIII")
+DOWNLINK_MAGIC = b"PF"
+DOWNLINK_HEADER = struct.Struct("<2sBBBxI")
+
+# Uplink codecs
+CODEC_PCM16 = 0
+CODEC_FLOAT32 = 1
+CODEC_FLAC = 2
+CODEC_OPUS = 3
+
+# Downlink encodings
+ENCODING_JSON = 0
+ENCODING_MSGPACK = 1
+
+# Downlink flags
+FLAG_DEFLATE = 0x01
+FLAG_DELTA = 0x02
+
+# Key used in delta messages to list keys removed since the previous message
+DELETED_KEY = "__deleted__"
+
+
+class ProtocolError(ValueError):
+    """Raised for malformed or unsupported frames."""
+
+
+@dataclass
+class FrameHeader:
+    version: int
+    codec: int
+    channels: int
+    flags: int
+    sample_rate: int
+    seq: int
+    length: int
+
+
+def encode_frame(payload: bytes, seq: int, sample_rate: int = TARGET_SAMPLE_RATE,
+                 codec: int = CODEC_PCM16, channels: int = 1, flags: int = 0) -> bytes:
+    """Build an uplink frame (used by clients, load tools and tests)."""
+    header = UPLINK_HEADER.pack(UPLINK_MAGIC, PROTOCOL_VERSION, codec, channels, flags,
+                                sample_rate, seq, len(payload))
+    return header + payload
+
+
+def decode_frame(frame: bytes) -> Tuple[FrameHeader, bytes]:
+    """Split an uplink frame into its header and payload."""
+    if len(frame) < UPLINK_HEADER.size:
+        raise ProtocolError("Frame shorter than header")
+    magic, version, codec, channels, flags, sample_rate, seq, length = UPLINK_HEADER.unpack_from(frame)
+    if magic != UPLINK_MAGIC:
+        raise ProtocolError("Bad frame magic")
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    payload = frame[UPLINK_HEADER.size:UPLINK_HEADER.size + length]
+    if len(payload) != length:
+        raise ProtocolError("Truncated frame payload")
+    return FrameHeader(version, codec, channels, flags, sample_rate, seq, length), payload
+
+
+class FrameReader:
+    """Per-connection uplink decoder that tracks sequence ids and dropped frames."""
+
+    def __init__(self):
+        self.expected_seq: Optional[int] = None
+        self.dropped_frames = 0
+        self._opus_decoders: Dict[Tuple[int, int], Any] = {}
+        # One per client sample rate: frames are consecutive pieces of one stream
+        self._resamplers: Dict[int, StreamResampler] = {}
+
+    def read(self, frame: bytes) -> Tuple[FrameHeader, bytes, int]:
+        """Decode a frame to 16 kHz mono PCM16 bytes.
+
+        Returns the header, the PCM and the number of frames missing before it.
+        """
+        header, payload = decode_frame(frame)
+
+        missing = 0
+        if self.expected_seq is not None and header.seq > self.expected_seq:
+            missing = header.seq - self.expected_seq
+            self.dropped_frames += missing
+        if self.expected_seq is None or header.seq >= self.expected_seq:
+            self.expected_seq = header.seq + 1
+
+        audio = self._decode_audio(header, payload)
+        return header, audio, missing
+
+    def _decode_audio(self, header: FrameHeader, payload: bytes) -> bytes:
+        if header.codec == CODEC_PCM16:
+            samples = np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+            sample_rate = header.sample_rate
+        elif header.codec == CODEC_FLOAT32:
+            samples = np.frombuffer(payload, dtype="<f4")
+            sample_rate = header.sample_rate
+        elif header.codec == CODEC_FLAC:
+            samples, sample_rate = decode_audio(payload)
+        elif header.codec == CODEC_OPUS:
+            samples = self._decode_opus(header, payload)
+            sample_rate = header.sample_rate
+        else:
+            raise ProtocolError(f"Unknown codec {header.codec}")
+
+        if samples.ndim == 1 and header.channels > 1:
+            samples = samples.reshape(-1, header.channels)
+        if sample_rate not in self._resamplers:
+            self._resamplers[sample_rate] = StreamResampler(sample_rate, TARGET_SAMPLE_RATE)
+        samples = self._resamplers[sample_rate].push(to_mono(samples))
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def _decode_opus(self, header: FrameHeader, payload: bytes) -> np.ndarray:
+        try:
+            import opuslib
+        except ImportError:
+            raise ProtocolError("Opus uplink requires the opuslib package")
+        key = (header.sample_rate, header.channels)
+        if key not in self._opus_decoders:
+            self._opus_decoders[key] = opuslib.Decoder(header.sample_rate, header.channels)
+        # Each frame carries one Opus packet; 120 ms is the largest Opus frame
+        max_samples = header.sample_rate * 120 // 1000
+        pcm = self._opus_decoders[key].decode(payload, max_samples)
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def compact_feedback(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop fields that repeat data already present elsewhere in a feedback message."""
+    score = message.get("score")
+    if isinstance(score, dict) and isinstance(score.get("audio_metrics"), dict):
+        audio_metrics = dict(score["audio_metrics"])
+        if audio_metrics.get("transcription") == message.get("transcript"):
+            audio_metrics.pop("transcription")
+        message = dict(message, score=dict(score, audio_metrics=audio_metrics))
+    return message
+
+
+def diff(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the keys of ``current`` that changed since ``previous``, recursing into dicts."""
+    delta: Dict[str, Any] = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff(old, value)
+            if nested:
+                delta[key] = nested
+        elif key not in previous or old != value:
+            delta[key] = value
+    removed = [key for key in previous if key not in current]
+    if removed:
+        delta[DELETED_KEY] = removed
+    return delta
+
+
+class FeedbackEncoder:
+    """Per-connection downlink encoder with delta encoding and optional compression.
+
+    Deltas are taken against the previous message of the same ``type``; a full
+    keyframe is sent every ``keyframe_interval`` messages so clients can resync.
+    """
+
+    def __init__(self, encoding: str = "json", compression: str = "none", delta: bool = False,
+                 keyframe_interval: int = 20):
+        if encoding == "msgpack" and msgpack is None:
+            raise ProtocolError("msgpack encoding requested but msgpack is not installed")
+        if encoding not in ("json", "msgpack"):
+            raise ProtocolError(f"Unknown encoding {encoding}")
+        if compression not in ("none", "deflate"):
+            raise ProtocolError(f"Unknown compression {compression}")
+        self.encoding = encoding
+        self.compression = compression
+        self.delta = delta
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._since_keyframe: Dict[str, int] = {}
+
+    @classmethod
+    def from_handshake(cls, hello: Dict[str, Any]) -> "FeedbackEncoder":
+        if not isinstance(hello, dict):
+            raise ProtocolError("Handshake must be a JSON object")
+        if hello.get("protocol") != PROTOCOL_VERSION:
+            raise ProtocolError(f"Unsupported protocol version {hello.get('protocol')}")
+        return cls(
+            encoding=hello.get("encoding", "json"),
+            compression=hello.get("compression", "none"),
+            delta=bool(hello.get("delta", False)),
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        """Handshake acknowledgement sent back to the client."""
+        return {
+            "type": "hello",
+            "protocol": PROTOCOL_VERSION,
+            "encoding": self.encoding,
+            "compression": self.compression,
+            "delta": self.delta,
+        }
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        message = compact_feedback(plain(message))
+        flags = 0
+
+        body = message
+        kind = message.get("type", "")
+        if self.delta and kind in self._last and self._since_keyframe[kind] < self.keyframe_interval:
+            body = diff(self._last[kind], message)
+            body["type"] = kind
+            self._since_keyframe[kind] += 1
+            flags |= FLAG_DELTA
+        else:
+            self._since_keyframe[kind] = 0
+        self._last[kind] = message
+
+        if self.encoding == "msgpack":
+            payload = msgpack.packb(body, use_bin_type=True)
+            encoding = ENCODING_MSGPACK
+        else:
+            payload = dumpb(body)
+            encoding = ENCODING_JSON
+
+        if self.compression == "deflate":
+            payload = zlib.compress(payload)
+            flags |= FLAG_DEFLATE
+
+        header = DOWNLINK_HEADER.pack(DOWNLINK_MAGIC, PROTOCOL_VERSION, encoding, flags, self.seq)
+        self.seq += 1
+        return header + payload
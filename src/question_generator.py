@@ -1,28 +1,63 @@
-import os
-# from openai import OpenAI
-from huggingface_hub import InferenceClient
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Callable
 from .models import Question, PresentationMode
+from .llm_client import LLMClient
+from .prompt_builder import build_prompt, keep_relevant, keep_tail
+from .structured_output import QuestionItem, QuestionsResponse, stream_structured_items
+from .metrics import ERRORS
+
+QuestionCallback = Callable[[Question], Awaitable[None]]
 
 class QuestionGenerator:
-    def __init__(self, InferenceClient):
-        self.client = InferenceClient
-        self.use_hf = os.getenv('USE_HF', 'false').lower() == 'true'
-        self.hf_model = os.getenv('HF_CHAT_MODEL', 'mistralai/Mistral-7B-Instruct-v0.2')
-        self.hf_token = os.getenv('HF_TOKEN') or os.getenv('HUGGINGFACEHUB_API_TOKEN')
-        self.hf_task = os.getenv('HF_TASK', 'conversational')
-        self.hf_client = InferenceClient(model=self.hf_model, token=self.hf_token) if self.use_hf else None
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or LLMClient()
     
     async def generate_questions(self, transcript: str, topic: str, mode: PresentationMode, 
-                               expert_documents: List[str] = None) -> List[Question]:
-        """Generate questions based on presentation content and mode"""
+                               expert_documents: List[str] = None,
+                               on_question: QuestionCallback = None) -> List[Question]:
+        """Generate questions based on presentation content and mode.
+
+        The completion is streamed; ``on_question`` is awaited with each question as
+        soon as the model has finished writing it.
+        """
         
         if mode == PresentationMode.TECHNICAL and expert_documents:
-            return await self._generate_expert_questions(transcript, topic, expert_documents)
+            return await self._generate_expert_questions(transcript, topic, expert_documents, on_question)
         else:
-            return await self._generate_standard_questions(transcript, topic, mode)
+            return await self._generate_standard_questions(transcript, topic, mode, on_question)
     
-    async def _generate_standard_questions(self, transcript: str, topic: str, mode: PresentationMode) -> List[Question]:
+    async def _stream_questions(self, prompt: str, on_question: QuestionCallback, **llm_args) -> List[Question]:
+        """Stream a schema-constrained completion, forwarding each question as it closes.
+
+        If the stream fails partway, the questions already forwarded are returned so the
+        session keeps what the client was shown.
+        """
+        delivered: List[Question] = []
+
+        async def on_item(item: QuestionItem):
+            question = self._to_question(item)
+            if on_question is not None:
+                await on_question(question)
+            delivered.append(question)
+
+        stage = llm_args["stage"]
+        try:
+            items = await stream_structured_items(self.llm, prompt, QuestionsResponse, "questions", on_item, **llm_args)
+        except Exception as e:
+            ERRORS.inc(stage=stage)
+            print(f"Error generating {stage.replace('_', ' ')}: {e}")
+            return delivered
+        return [self._to_question(item) for item in items]
+
+    def _to_question(self, item: QuestionItem) -> Question:
+        return Question(
+            question=item.question,
+            category=item.category,
+            difficulty=item.difficulty,
+            context=item.context or ""
+        )
+    
+    async def _generate_standard_questions(self, transcript: str, topic: str, mode: PresentationMode,
+                                           on_question: QuestionCallback = None) -> List[Question]:
         """Generate standard questions for different modes"""
         
         mode_context = {
@@ -32,18 +67,18 @@ class QuestionGenerator:
             PresentationMode.CASUAL: "casual conversation context, informal and relaxed"
         }
         
-        prompt = f"""
+        prompt = build_prompt("questions", """
         Generate 3-5 thoughtful questions about this presentation that would test the speaker's understanding.
         
         Topic: {topic}
-        Context: {mode_context.get(mode, 'general context')}
+        Context: {context}
         Transcript: {transcript}
         
         Create questions that:
         1. Test understanding of key concepts
         2. Explore implications or applications
         3. Challenge assumptions or ask for clarification
-        4. Are appropriate for the {mode.value} mode
+        4. Are appropriate for the {mode} mode
         
         Format as JSON:
         {{
@@ -56,58 +91,22 @@ class QuestionGenerator:
                 }}
             ]
         }}
-        """
+        """, shrink={"transcript": keep_tail}, topic=topic, context=mode_context.get(mode, 'general context'),
+            transcript=transcript, mode=mode.value)
         
-        try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[{"role":"user","content": prompt}],
-                            temperature=0.7,
-                            max_tokens=900
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf():
-                        return self.hf_client.text_generation(prompt, max_new_tokens=600, temperature=0.7)
-                    content = await anyio.to_thread.run_sync(_run_hf)
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
-            
-            result = json.loads(content)
-            
-            questions = []
-            for q in result.get("questions", []):
-                questions.append(Question(
-                    question=q["question"],
-                    category=q["category"],
-                    difficulty=q["difficulty"],
-                    context=q.get("context", "")
-                ))
-            
-            return questions
-        except Exception as e:
-            print(f"Error generating questions: {e}")
-            return []
+        return await self._stream_questions(
+            prompt, on_question, temperature=0.7, max_tokens=900, max_new_tokens=600,
+            stage="questions", mode=mode.value
+        )
     
-    async def _generate_expert_questions(self, transcript: str, topic: str, expert_documents: List[str]) -> List[Question]:
+    async def _generate_expert_questions(self, transcript: str, topic: str, expert_documents: List[str],
+                                         on_question: QuestionCallback = None) -> List[Question]:
         """Generate expert-level questions based on uploaded documents"""
         
-        # Combine document content (simplified - in reality you'd process PDFs)
-        document_context = "\n".join(expert_documents[:3])  # Limit to first 3 docs
+        # All documents compete for the budget; the passages closest to the transcript are kept
+        document_context = "\n\n".join(expert_documents)
         
-        prompt = f"""
+        prompt = build_prompt("expert_questions", """
         As an expert in {topic}, generate challenging questions based on both the presentation and these expert documents.
         
         Topic: {topic}
@@ -131,47 +130,10 @@ class QuestionGenerator:
                 }}
             ]
         }}
-        """
+        """, shrink={"transcript": keep_tail, "document_context": keep_relevant(transcript)},
+            topic=topic, transcript=transcript, document_context=document_context)
         
-        try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[{"role":"user","content": prompt}],
-                            temperature=0.5,
-                            max_tokens=1000
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf():
-                        return self.hf_client.text_generation(prompt, max_new_tokens=800, temperature=0.5)
-                    content = await anyio.to_thread.run_sync(_run_hf)
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.5
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
-            
-            result = json.loads(content)
-            
-            questions = []
-            for q in result.get("questions", []):
-                questions.append(Question(
-                    question=q["question"],
-                    category=q["category"],
-                    difficulty=q["difficulty"],
-                    context=q.get("context", "")
-                ))
-            
-            return questions
-        except Exception as e:
-            print(f"Error generating expert questions: {e}")
-            return []
+        return await self._stream_questions(
+            prompt, on_question, temperature=0.5, max_tokens=1000, max_new_tokens=800,
+            stage="expert_questions", mode=PresentationMode.TECHNICAL.value
+        )
@@ -0,0 +1,188 @@
+"""Central job scheduler shared by every session.
+
+Jobs are coroutine factories tagged with a session and a priority. The
+dispatcher always starts the most urgent priority first and, within a priority,
+takes one job per session in turn, so a presenter who streams fast or submits a
+huge prompt cannot starve the others. Background work (questions, suggestions)
+may only fill ``background_limit`` of the ``concurrency`` slots, leaving room
+for transcripts and scoring, and speculative work (questions generated ahead of
+the windows that will use them) only ``speculative_limit`` of those.
+
+A job can carry a deadline (seconds from submission): it is dropped if it has
+not started by then and cancelled if it is still running. A job submitted with
+a ``key`` supersedes the same session's older jobs with that key: queued ones
+are dropped, and running ones are cancelled when they are background work.
+"""
+
+import asyncio
+import contextvars
+import os
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Set
+
+from .metrics import SCHEDULER_DROPPED, SCHEDULER_WAIT_SECONDS
+
+TRANSCRIPT = 0
+SCORING = 1
+QUESTIONS = 2
+SUGGESTIONS = 3
+SPECULATIVE = 4
+PRIORITY_NAMES = ["transcript", "scoring", "questions", "suggestions", "speculative"]
+
+
+class JobDropped(Exception):
+    """Raised to the submitter when its job was superseded or missed its deadline."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Job:
+    __slots__ = ("session_id", "priority", "factory", "deadline", "key", "context",
+                 "future", "task", "enqueued", "cancel_reason")
+
+    def __init__(self, session_id: str, priority: int, factory: Callable[[], Awaitable[Any]],
+                 deadline: Optional[float], key: Optional[str], future: asyncio.Future, enqueued: float):
+        self.session_id = session_id
+        self.priority = priority
+        self.factory = factory
+        self.deadline = deadline
+        self.key = key
+        # Run in the submitter's context so spans land in its trace
+        self.context = contextvars.copy_context()
+        self.future = future
+        self.task: Optional[asyncio.Task] = None
+        self.enqueued = enqueued
+        self.cancel_reason = "cancelled"
+
+    @property
+    def background(self) -> bool:
+        return self.priority >= QUESTIONS
+
+
+class JobScheduler:
+    def __init__(self, concurrency: int = None, background_limit: int = None, speculative_limit: int = None):
+        self.concurrency = concurrency or int(os.getenv('SCHEDULER_CONCURRENCY', '8'))
+        self.background_limit = background_limit or int(
+            os.getenv('SCHEDULER_BACKGROUND_LIMIT', str(max(1, self.concurrency // 2)))
+        )
+        self.speculative_limit = speculative_limit or int(os.getenv('SCHEDULER_SPECULATIVE_LIMIT', '1'))
+        # One round-robin ring of per-session FIFOs per priority
+        self._queues: List["OrderedDict[str, Deque[Job]]"] = [OrderedDict() for _ in PRIORITY_NAMES]
+        self._running: Set[Job] = set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(jobs) for queue in self._queues for jobs in queue.values())
+
+    async def run(self, session_id: str, priority: int, factory: Callable[[], Awaitable[Any]],
+                  deadline: Optional[float] = None, key: Optional[str] = None) -> Any:
+        """Queue ``factory()`` and return its result once the scheduler has run it.
+
+        Raises :class:`JobDropped` if the job is superseded or misses ``deadline``.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        job = Job(session_id, priority, factory, None if deadline is None else now + deadline,
+                  key, loop.create_future(), now)
+        if key is not None:
+            self._supersede(session_id, key)
+        self._queues[priority].setdefault(session_id, deque()).append(job)
+        self._dispatch()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # The submitter went away (e.g. the socket closed): the work is no longer wanted
+            job.future.cancel()
+            self._discard(job)
+            if job.task is not None:
+                job.task.cancel()
+            raise
+
+    def cancel_session(self, session_id: str):
+        """Drop the session's queued jobs and cancel its running ones."""
+        for queue in self._queues:
+            for job in queue.pop(session_id, ()):
+                self._drop(job, "cancelled")
+        for job in list(self._running):
+            if job.session_id == session_id:
+                job.task.cancel()
+
+    def _supersede(self, session_id: str, key: str):
+        for queue in self._queues:
+            jobs = queue.get(session_id)
+            if not jobs:
+                continue
+            for job in [j for j in jobs if j.key == key]:
+                jobs.remove(job)
+                self._drop(job, "superseded")
+            if not jobs:
+                del queue[session_id]
+        for job in list(self._running):
+            if job.session_id == session_id and job.key == key and job.background:
+                job.cancel_reason = "superseded"
+                job.task.cancel()
+
+    def _discard(self, job: Job):
+        jobs = self._queues[job.priority].get(job.session_id)
+        if jobs and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del self._queues[job.priority][job.session_id]
+
+    def _drop(self, job: Job, reason: str):
+        SCHEDULER_DROPPED.inc(priority=PRIORITY_NAMES[job.priority], reason=reason)
+        if not job.future.done():
+            job.future.set_exception(JobDropped(reason))
+
+    def _next_job(self) -> Optional[Job]:
+        loop = asyncio.get_running_loop()
+        background_running = sum(1 for job in self._running if job.background)
+        speculative_running = sum(1 for job in self._running if job.priority == SPECULATIVE)
+        for priority, queue in enumerate(self._queues):
+            if priority >= QUESTIONS and background_running >= self.background_limit:
+                break
+            if priority == SPECULATIVE and speculative_running >= self.speculative_limit:
+                break
+            while queue:
+                session_id, jobs = next(iter(queue.items()))
+                job = jobs.popleft()
+                if jobs:
+                    queue.move_to_end(session_id)
+                else:
+                    del queue[session_id]
+                if job.deadline is not None and loop.time() >= job.deadline:
+                    self._drop(job, "expired")
+                    continue
+                return job
+        return None
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while len(self._running) < self.concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            SCHEDULER_WAIT_SECONDS.observe(loop.time() - job.enqueued, priority=PRIORITY_NAMES[job.priority])
+            self._running.add(job)
+            job.task = loop.create_task(self._execute(job), context=job.context)
+
+    async def _execute(self, job: Job):
+        loop = asyncio.get_running_loop()
+        try:
+            timeout = None if job.deadline is None else max(0.0, job.deadline - loop.time())
+            result = await asyncio.wait_for(job.factory(), timeout)
+        except asyncio.TimeoutError:
+            self._drop(job, "expired")
+        except asyncio.CancelledError:
+            self._drop(job, job.cancel_reason)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running.discard(job)
+            self._dispatch()
@@ -0,0 +1,93 @@
+"""Fast conversion and JSON encoding of feedback messages.
+
+Hot-path results (``AudioMetrics``, ``ContentAnalysis``, ``PresentationScore``,
+``Question``, ``Suggestion``) are slotted dataclasses. :func:`to_dict` turns one
+into a plain dict using a per-class key layout computed once (field names and
+the converter each value needs), and :func:`dumps` encodes whole messages with
+``orjson`` when it is installed, which serializes the dataclasses, enums and
+numpy scalars directly without building the intermediate dicts.
+"""
+
+import dataclasses
+import json
+import typing
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+
+def _enum_value(value: Enum) -> Any:
+    return value.value
+
+
+def _converter(annotation) -> Optional[Callable[[Any], Any]]:
+    """How to turn a value of ``annotation`` into plain data (``None``: use it as is)."""
+    if dataclasses.is_dataclass(annotation):
+        return to_dict
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return _enum_value
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union and len(args) == 1:
+        inner = _converter(args[0])
+        if inner is not None:
+            return lambda value: None if value is None else inner(value)
+    elif origin is list and args:
+        inner = _converter(args[0])
+        if inner is not None:
+            return lambda values: [inner(value) for value in values]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _layout(cls: type) -> Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...]:
+    hints = typing.get_type_hints(cls)
+    return tuple((field.name, _converter(hints[field.name])) for field in dataclasses.fields(cls))
+
+
+def to_dict(record: Any) -> Dict[str, Any]:
+    """Plain-dict form of a dataclass record, nested records included."""
+    result = {}
+    for name, convert in _layout(type(record)):
+        value = getattr(record, name)
+        result[name] = value if convert is None else convert(value)
+    return result
+
+
+def plain(value: Any) -> Any:
+    """``value`` with every record in it (at any depth of dicts and lists) converted to dicts."""
+    if dataclasses.is_dataclass(value):
+        return to_dict(value)
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+def _default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return to_dict(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumpb(message: Any) -> bytes:
+    """Compact UTF-8 JSON of a message that may hold records, enums and numpy values."""
+    if orjson is not None:
+        return orjson.dumps(message, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(message, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(message: Any) -> str:
+    return dumpb(message).decode("utf-8")
@@ -0,0 +1,131 @@
+"""Questions generated ahead of the windows that will show them.
+
+Each session keeps the transcript of its analyzed windows since the last
+speculative run. Once ``SPECULATIVE_MIN_WORDS`` of it have accumulated while
+the server runs at full quality (``SPECULATIVE_BUSY_WORDS`` while it is
+degraded), or as soon as the presenter pauses (a window skipped as silence), a
+question-generation job is queued at the scheduler's lowest priority
+(``SPECULATIVE``). Its questions wait in the session's ready queue, and window
+feedback is served from that queue only: the LLM round trip stays off the
+feedback path once the session is warm. Only a cold session (no speech seen
+yet) generates its first questions on the feedback path; that transcript is
+marked covered and not generated for again.
+
+Only one speculative run per session is in flight, the ready queue holds at
+most ``SPECULATIVE_MAX_READY`` questions (the oldest are dropped), and the
+running job is cancelled when the session ends or its socket closes.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+from .metrics import ERRORS, SPECULATIVE_QUESTIONS
+from .models import Question
+from .scheduler import SPECULATIVE, JobDropped, JobScheduler
+
+SPECULATIVE_QUESTIONS_ENABLED = os.getenv('SPECULATIVE_QUESTIONS', 'true').lower() == 'true'
+SPECULATIVE_MIN_WORDS = int(os.getenv('SPECULATIVE_MIN_WORDS', '40'))
+# Words collected before a run while the server is degraded (pauses still trigger one at once)
+SPECULATIVE_BUSY_WORDS = int(os.getenv('SPECULATIVE_BUSY_WORDS', '120'))
+SPECULATIVE_MAX_READY = int(os.getenv('SPECULATIVE_MAX_READY', '5'))
+# Seconds a speculative job may wait and run before it is dropped
+SPECULATIVE_DEADLINE = float(os.getenv('SPECULATIVE_DEADLINE', '60'))
+
+QuestionFactory = Callable[[str, str], Awaitable[List[Question]]]
+
+
+class _SessionQuestions:
+    __slots__ = ("ready", "pending", "words", "task", "warm")
+
+    def __init__(self):
+        self.ready: Deque[Question] = deque()
+        self.pending: List[str] = []
+        self.words = 0
+        self.task: Optional[asyncio.Task] = None
+        self.warm = False
+
+
+class QuestionSpeculator:
+    def __init__(self, scheduler: JobScheduler, generate: QuestionFactory,
+                 enabled: bool = SPECULATIVE_QUESTIONS_ENABLED, min_words: int = SPECULATIVE_MIN_WORDS,
+                 busy_words: int = SPECULATIVE_BUSY_WORDS, max_ready: int = SPECULATIVE_MAX_READY):
+        """``generate(session_id, transcript)`` produces the questions for a stretch of transcript."""
+        self.scheduler = scheduler
+        self.generate = generate
+        self.enabled = enabled
+        self.min_words = min_words
+        self.busy_words = busy_words
+        self.max_ready = max_ready
+        self._sessions: Dict[str, _SessionQuestions] = {}
+
+    def warm(self, session_id: str) -> bool:
+        """True once feedback should be served from the ready queue alone (see the module docstring)."""
+        state = self._sessions.get(session_id)
+        return self.enabled and state is not None and state.warm
+
+    def note(self, session_id: str, transcript: str, idle: bool, paused: bool = False, covered: bool = False):
+        """Add an analyzed window's transcript and start a speculative run if one is due.
+
+        ``idle``: the server has capacity to spare (full quality tier). ``paused``: the
+        presenter stopped talking, so there is no newer window to wait for. ``covered``:
+        questions were already generated for ``transcript`` on the feedback path.
+        """
+        if not self.enabled:
+            return
+        state = self._sessions.setdefault(session_id, _SessionQuestions())
+        if transcript.strip():
+            state.warm = True
+            if not covered:
+                state.pending.append(transcript.strip())
+                state.words += len(transcript.split())
+        if state.task is not None or not state.words or len(state.ready) >= self.max_ready:
+            return
+        if paused or state.words >= (self.min_words if idle else self.busy_words):
+            text = " ".join(state.pending)
+            state.pending, state.words = [], 0
+            state.task = asyncio.create_task(self._speculate(session_id, state, text))
+
+    async def _speculate(self, session_id: str, state: _SessionQuestions, transcript: str):
+        try:
+            questions = await self.scheduler.run(
+                session_id, SPECULATIVE, lambda: self.generate(session_id, transcript),
+                deadline=SPECULATIVE_DEADLINE, key="speculative"
+            )
+        except JobDropped:
+            return
+        except Exception as e:
+            ERRORS.inc(stage="speculation")
+            print(f"Error generating speculative questions: {e}")
+            return
+        finally:
+            state.task = None
+        SPECULATIVE_QUESTIONS.inc(len(questions), outcome="generated")
+        state.ready.extend(questions)
+        while len(state.ready) > self.max_ready:
+            state.ready.popleft()
+            SPECULATIVE_QUESTIONS.inc(outcome="discarded")
+
+    def take(self, session_id: str, limit: int = 3) -> List[Question]:
+        """Pop up to ``limit`` ready questions, oldest first (empty when none are ready)."""
+        state = self._sessions.get(session_id)
+        if state is None:
+            return []
+        questions = [state.ready.popleft() for _ in range(min(limit, len(state.ready)))]
+        if questions:
+            SPECULATIVE_QUESTIONS.inc(len(questions), outcome="served")
+        return questions
+
+    def cancel(self, session_id: str):
+        """Cancel the session's running speculation; its ready questions are kept."""
+        state = self._sessions.get(session_id)
+        if state is not None and state.task is not None:
+            state.task.cancel()
+
+    def forget(self, session_id: str):
+        """Cancel the session's speculation and drop everything kept for it."""
+        self.cancel(session_id)
+        state = self._sessions.pop(session_id, None)
+        if state is not None and state.ready:
+            SPECULATIVE_QUESTIONS.inc(len(state.ready), outcome="discarded")
@@ -1,44 +1,99 @@
-from faster_whisper import WhisperModel
 import wave
 import numpy as np
-from typing import Dict, Generator
+from typing import Dict, Generator, List, Optional, Union, Any
+from .metrics import timed
+from .stt_server import STT_SERVER_SOCKET, RemoteWhisperModel
+
+SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(audio_bytes: bytes) -> np.ndarray:
+    """Convert raw 16-bit little-endian PCM bytes to a float32 array in [-1, 1]."""
+    usable = len(audio_bytes) - (len(audio_bytes) % 2)
+    return np.frombuffer(audio_bytes[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+
 
 class SpeechToText:
-    def __init__(self, model_path: str = "small", device: str = "cpu", local_files_only: bool = False):
-        """Initialize the Whisper model."""
-        self.model = WhisperModel(model_path, device=device, compute_type="int8", local_files_only=local_files_only)
+    def __init__(self, model_path: str = "small", device: str = "cpu", local_files_only: bool = False,
+                 model=None, cpu_threads: int = 0, server_socket: Optional[str] = STT_SERVER_SOCKET):
+        """Initialize the Whisper model.
 
-    def transcribe(self, audio_path: str) -> Dict[str, str]:
+        ``model`` may be any object with a faster-whisper compatible ``transcribe`` method
+        (used to plug in a stand-in for benchmarks). Otherwise, with ``server_socket``
+        (default ``STT_SERVER_SOCKET``) set, transcription goes to the shared STT server
+        (``src/stt_server.py``); without it a local ``WhisperModel`` is loaded.
+        ``cpu_threads`` caps the local decoder's threads (0 lets CTranslate2 pick).
+        """
+        if model is None and server_socket:
+            model = RemoteWhisperModel(server_socket, model_path)
+        if model is None:
+            # Imported here: faster_whisper (and CTranslate2) is slow to import
+            from faster_whisper import WhisperModel
+            model = WhisperModel(model_path, device=device, compute_type="int8",
+                                 local_files_only=local_files_only, cpu_threads=cpu_threads)
+        self.model = model
+
+    def transcribe(self, audio_path: Union[str, np.ndarray], beam_size: int = 5,
+                   word_timestamps: bool = False) -> Dict[str, Any]:
         """Transcribe audio to text.
 
         Args:
-            audio_path (str): Path to the audio file.
+            audio_path (Union[str, np.ndarray]): Path to the audio file, or 16 kHz mono float32 samples.
+            beam_size (int): Beam width used for decoding.
+            word_timestamps (bool): Also return per-word timings under ``"words"``.
 
         Returns:
-            Dict[str, str]: A dictionary containing the transcription and language.
+            Dict[str, Any]: A dictionary containing the transcription and language, plus
+            ``"words"`` (``word``/``start``/``end``/``probability`` dicts) when requested.
         """
-        segments, info = self.model.transcribe(audio_path, beam_size=5)
-        
-        transcription = "".join([segment.text for segment in segments])
-        return {
-            "transcription": transcription,
+        with timed("stt"):
+            segments, info = self.model.transcribe(audio_path, beam_size=beam_size, word_timestamps=word_timestamps)
+
+            # Segments are decoded lazily, so iterating them is part of the STT cost
+            texts = []
+            words = []
+            for segment in segments:
+                texts.append(segment.text)
+                if word_timestamps:
+                    words.extend(
+                        {"word": w.word.strip(), "start": w.start, "end": w.end, "probability": w.probability}
+                        for w in (segment.words or [])
+                    )
+
+        result = {
+            "transcription": "".join(texts),
             "language": info.language
         }
+        if word_timestamps:
+            result["words"] = words
+        return result
 
-    def transcribe_stream(self, audio_stream: Generator[bytes, None, None]) -> Generator[str, None, None]:
+    def transcribe_stream(self, audio_stream: Generator[bytes, None, None],
+                          partial: bool = False) -> Generator[Union[str, Dict[str, Any]], None, None]:
         """Transcribe audio from a stream in real-time.
 
         Args:
             audio_stream (Generator[bytes, None, None]): A generator yielding chunks of audio data.
+            partial (bool): When True, yield typed ``partial``/``final`` events from a
+                :class:`StreamingTranscriber` instead of plain segment text.
 
         Yields:
-            str: Transcribed text for each chunk.
+            str: Transcribed text for each chunk (or event dicts when ``partial`` is set).
         """
+        if partial:
+            transcriber = StreamingTranscriber(self)
+            for chunk in audio_stream:
+                for event in transcriber.feed(chunk):
+                    yield event
+            for event in transcriber.flush():
+                yield event
+            return
+
         buffer = b""
         for chunk in audio_stream:
             buffer += chunk
-            if len(buffer) > 16000 * 2 * 5:  # Process every 5 seconds of audio (assuming 16kHz, 16-bit audio)
-                audio_array = np.frombuffer(buffer, dtype=np.int16)
+            if len(buffer) > SAMPLE_RATE * 2 * 5:  # Process every 5 seconds of audio (assuming 16kHz, 16-bit audio)
+                audio_array = pcm16_to_float32(buffer)
                 segments, _ = self.model.transcribe(audio_array, beam_size=5)
                 for segment in segments:
                     yield segment.text
@@ -46,14 +101,116 @@ class SpeechToText:
 
         # Process any remaining audio in the buffer
         if buffer:
-            audio_array = np.frombuffer(buffer, dtype=np.int16)
+            audio_array = pcm16_to_float32(buffer)
             segments, _ = self.model.transcribe(audio_array, beam_size=5)
             for segment in segments:
                 yield segment.text
 
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    """Number of leading words ``a`` and ``b`` share."""
+    count = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        count += 1
+    return count
+
+
+class StreamingTranscriber:
+    """Incremental transcriber producing low-latency partial hypotheses.
+
+    Audio is accumulated into a window. Every ``partial_interval`` seconds of new
+    audio the whole window is re-decoded with a reduced beam; words that two
+    consecutive hypotheses agree on are committed, the rest is reported as
+    uncommitted. Once the window reaches ``window_seconds`` it is decoded once more
+    at full beam and emitted as a ``final`` event, and a new window starts.
+    """
+
+    def __init__(self, stt: SpeechToText, window_seconds: float = 5.0, partial_interval: float = 0.5,
+                 partial_beam_size: int = 1, final_beam_size: int = 5):
+        self.stt = stt
+        self.window_bytes = int(SAMPLE_RATE * window_seconds) * 2
+        self.partial_bytes = int(SAMPLE_RATE * partial_interval) * 2
+        self.partial_beam_size = partial_beam_size
+        self.final_beam_size = final_beam_size
+        self.reset()
+
+    def reset(self):
+        """Start a fresh window."""
+        self.buffer = b""
+        self._since_partial = 0
+        self._committed: List[str] = []
+        self._previous: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Add PCM16 audio and return any events it produced."""
+        self.buffer += chunk
+        self._since_partial += len(chunk)
+        events: List[Dict[str, Any]] = []
+
+        if len(self.buffer) >= self.window_bytes:
+            events.append(self._finalize())
+        elif self._since_partial >= self.partial_bytes:
+            self._since_partial = 0
+            events.append(self._partial())
+        return events
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Finalize whatever audio is left in the window."""
+        if not self.buffer:
+            return []
+        return [self._finalize()]
+
+    def _decode(self, beam_size: int, word_timestamps: bool = False):
+        stage = "stt.final" if word_timestamps else "stt.partial"
+        with timed(stage):
+            segments, info = self.stt.model.transcribe(
+                pcm16_to_float32(self.buffer), beam_size=beam_size, condition_on_previous_text=False,
+                word_timestamps=word_timestamps
+            )
+            return list(segments), info
+
+    def _partial(self) -> Dict[str, Any]:
+        segments, _ = self._decode(self.partial_beam_size)
+        words = "".join(s.text for s in segments).split()
+
+        # Committed words never change; extend them by the prefix on which this and the
+        # previous hypothesis agree, as long as this hypothesis still matches them
+        matched = _common_prefix(words, self._committed)
+        agreed = _common_prefix(words, self._previous)
+        if matched == len(self._committed) and agreed > matched:
+            self._committed = words[:agreed]
+            matched = agreed
+        self._previous = words
+
+        return {
+            "type": "partial",
+            "committed": " ".join(self._committed),
+            # What this hypothesis says after the point where it stops matching the committed words
+            "uncommitted": " ".join(words[matched:]),
+        }
+
+    def _finalize(self) -> Dict[str, Any]:
+        audio = self.buffer
+        segments, info = self._decode(self.final_beam_size, word_timestamps=True)
+        self.reset()
+        return {
+            "type": "final",
+            "transcript": "".join(s.text for s in segments).strip(),
+            "language": info.language,
+            "segments": [{"start": s.start, "end": s.end, "text": s.text} for s in segments],
+            "words": [
+                {"word": w.word.strip(), "start": w.start, "end": w.end, "probability": w.probability}
+                for s in segments for w in (s.words or [])
+            ],
+            "audio": audio,
+        }
+
+
 # Example usage
 if __name__ == "__main__":
     stt = SpeechToText(local_files_only=False)
     result = stt.transcribe("briskaudioclip2.wav")
     print("Transcription:", result["transcription"])
-    print("Language:", result["language"])
\ No newline at end of file
+    print("Language:", result["language"])
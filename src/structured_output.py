@@ -0,0 +1,152 @@
+"""Schema-constrained LLM output.
+
+The response shapes the engines ask for are derived from the domain models in
+``models.py`` and turned into JSON schemas, which ``LLMClient`` hands to the
+provider's JSON mode or grammar. Whatever comes back is extracted tolerantly
+(``json_stream.parse_json``), then validated: list responses item by item,
+keeping the valid items. When nothing usable is left, one cheap repair call
+(schema plus the bad output, no transcript) is made before the call is counted
+as wasted.
+"""
+
+import dataclasses
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type, get_args
+
+from pydantic import BaseModel, Field, ValidationError, create_model
+
+from .json_stream import list_items, parse_json, stream_json
+from .metrics import LLM_REPAIRS, LLM_WASTED_CALLS
+from .models import ContentAnalysis, Question, Suggestion
+
+REPAIR_PROMPT = """Rewrite the output below as JSON that matches this JSON schema. Return only the JSON.
+
+Schema: {schema}
+
+Output:
+{output}
+"""
+REPAIR_MAX_OUTPUT_CHARS = 4000
+
+
+def _field_types(record: type) -> Dict[str, Any]:
+    return {field.name: field.type for field in dataclasses.fields(record)}
+
+
+# Content analysis: every float score of ContentAnalysis, bounded to 0-1, plus free-text suggestions
+SCORE_FIELDS = [name for name, annotation in _field_types(ContentAnalysis).items() if annotation is float]
+ContentAnalysisResponse = create_model(
+    "ContentAnalysisResponse",
+    **{name: (float, Field(ge=0.0, le=1.0)) for name in SCORE_FIELDS},
+    suggestions=(List[str], []),
+)
+
+# Questions: the Question model, with the labels the scorer can live without made optional
+QuestionItem = create_model(
+    "QuestionItem",
+    question=(_field_types(Question)["question"], ...),
+    category=(str, "general"),
+    difficulty=(str, "medium"),
+    context=(_field_types(Question)["context"], None),
+)
+QuestionsResponse = create_model("QuestionsResponse", questions=(List[QuestionItem], ...))
+
+
+def _suggestion_item(field: str) -> Type[BaseModel]:
+    """Suggestion as the model writes it: the text under ``field`` (type and context are ours)."""
+    return create_model(
+        f"{field.capitalize()}Item",
+        **{field: (_field_types(Suggestion)["suggestion"], ...)},
+        explanation=(str, ""),
+        confidence=(_field_types(Suggestion)["confidence"], Field(0.5, ge=0.0, le=1.0)),
+    )
+
+
+MetaphorItem = _suggestion_item("metaphor")
+AnalogyItem = _suggestion_item("analogy")
+ImageItem = _suggestion_item("description")
+MetaphorsResponse = create_model("MetaphorsResponse", metaphors=(List[MetaphorItem], ...))
+AnalogiesResponse = create_model("AnalogiesResponse", analogies=(List[AnalogyItem], ...))
+ImagesResponse = create_model("ImagesResponse", images=(List[ImageItem], ...))
+
+
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    return model.model_json_schema()
+
+
+def validate(model: Type[BaseModel], data: Any) -> Optional[BaseModel]:
+    try:
+        return model.model_validate(data)
+    except ValidationError:
+        return None
+
+
+def _valid_items(result: Any, key: str, item_model: Type[BaseModel]) -> Optional[List[BaseModel]]:
+    """Valid items under ``key``; ``None`` when the response is unusable (no list, or no valid item in it)."""
+    if not isinstance(result, (dict, list)) or (isinstance(result, dict) and key not in result):
+        return None
+    raw = list_items(result, key)
+    items = [item for item in (validate(item_model, raw_item) for raw_item in raw) if item is not None]
+    if raw and not items:
+        return None
+    return items
+
+
+async def _repair(llm, schema: Dict[str, Any], output: str, llm_args: Dict[str, Any]) -> Any:
+    stage = llm_args.get("stage", "llm")
+    prompt = REPAIR_PROMPT.format(schema=schema, output=(output or "")[:REPAIR_MAX_OUTPUT_CHARS])
+    try:
+        text = await llm.complete(
+            prompt, temperature=0.0, max_tokens=llm_args.get("max_tokens", 800),
+            max_new_tokens=llm_args.get("max_new_tokens"), json_schema=schema,
+            stage=f"{stage}.repair", mode=llm_args.get("mode", "")
+        )
+    except Exception as e:
+        print(f"Repair call failed: {e}")
+        return None
+    return parse_json(text, f"{stage}.repair")
+
+
+async def complete_structured(llm, prompt: str, model: Type[BaseModel], **llm_args) -> Optional[BaseModel]:
+    """Run a completion constrained to ``model`` and return the validated response (``None`` if wasted)."""
+    stage = llm_args.get("stage", "llm")
+    schema = json_schema(model)
+    text = await llm.complete(prompt, json_schema=schema, **llm_args)
+    response = validate(model, parse_json(text, stage))
+    if response is None:
+        response = validate(model, await _repair(llm, schema, text, llm_args))
+        LLM_REPAIRS.inc(stage=stage, outcome="failure" if response is None else "success")
+    if response is None:
+        LLM_WASTED_CALLS.inc(stage=stage)
+    return response
+
+
+async def stream_structured_items(llm, prompt: str, model: Type[BaseModel], key: str,
+                                  on_item: Callable[[BaseModel], Awaitable[None]] = None,
+                                  **llm_args) -> List[BaseModel]:
+    """Stream a list response constrained to ``model``, forwarding each valid item under ``key`` as it closes."""
+    stage = llm_args.get("stage", "llm")
+    schema = json_schema(model)
+    item_model = get_args(model.model_fields[key].annotation)[0]
+    streamed: List[BaseModel] = []
+
+    async def forward(raw: Dict[str, Any]):
+        item = validate(item_model, raw)
+        if item is not None:
+            streamed.append(item)
+            if on_item is not None:
+                await on_item(item)
+
+    result, text = await stream_json(llm, prompt, forward, json_schema=schema, **llm_args)
+    items = _valid_items(result, key, item_model)
+    if items is None and not streamed:
+        items = _valid_items(await _repair(llm, schema, text, llm_args), key, item_model)
+        LLM_REPAIRS.inc(stage=stage, outcome="failure" if items is None else "success")
+        if items and on_item is not None:
+            for item in items:
+                await on_item(item)
+    if items is None:
+        if not streamed:
+            LLM_WASTED_CALLS.inc(stage=stage)
+        # Keep whatever closed while streaming
+        return streamed
+    return items
@@ -0,0 +1,255 @@
+"""Out-of-process transcription server shared by every web worker on a host.
+
+The server owns the Whisper model(s) and listens on a Unix socket:
+
+    python -m src.stt_server --socket /tmp/presentation-stt.sock --preload base
+
+Web workers started with ``STT_SERVER_SOCKET`` set talk to it through
+:class:`RemoteWhisperModel`, which ``SpeechToText`` uses in place of a local
+``WhisperModel``, so N uvicorn workers share one copy of the weights.
+
+Audio is not serialized over the socket: the client writes the float32 samples
+into a ``multiprocessing.shared_memory`` segment it keeps per connection and
+sends only the segment name, the sample count and the decoding options. The
+server decodes straight from that buffer and answers with the segments as JSON.
+Messages on the socket are a 4-byte big-endian length followed by JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import anyio
+import numpy as np
+
+from .metrics import ERRORS, timed
+
+STT_SERVER_SOCKET = os.getenv('STT_SERVER_SOCKET')
+
+_LENGTH = struct.Struct(">I")
+
+
+def _send(sock: socket.socket, message: Dict[str, Any]):
+    payload = json.dumps(message).encode()
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("STT server closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+# --- Client ------------------------------------------------------------------
+
+class Word(NamedTuple):
+    word: str
+    start: float
+    end: float
+    probability: float
+
+
+class Segment(NamedTuple):
+    text: str
+    start: float
+    end: float
+    words: Optional[List[Word]]
+
+
+class TranscriptionInfo(NamedTuple):
+    language: str
+
+
+class _Connection:
+    """A socket to the server plus the shared-memory segment its audio goes through."""
+
+    def __init__(self, socket_path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.shm: Optional[shared_memory.SharedMemory] = None
+
+    def buffer_for(self, samples: int) -> np.ndarray:
+        size = samples * 4
+        if self.shm is None or self.shm.size < size:
+            self._release()
+            # At least 10 s of audio, so windows of varying length keep reusing one segment
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 16000 * 4 * 10))
+        return np.ndarray((samples,), dtype=np.float32, buffer=self.shm.buf)
+
+    def close(self):
+        self._release()
+        self.sock.close()
+
+    def _release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class RemoteWhisperModel:
+    """faster-whisper compatible ``transcribe`` served by the STT server.
+
+    Connections are pooled, one per concurrent caller, and each owns a shared
+    memory segment that is reused for every window it sends.
+    """
+
+    def __init__(self, socket_path: str, model: str):
+        self.socket_path = socket_path
+        self.model = model
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+
+    def transcribe(self, audio: np.ndarray, beam_size: int = 5, word_timestamps: bool = False,
+                   condition_on_previous_text: bool = True, **options) -> Tuple[List[Segment], TranscriptionInfo]:
+        if not isinstance(audio, np.ndarray):
+            raise TypeError("RemoteWhisperModel only accepts 16 kHz float32 samples")
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        request = {
+            "model": self.model,
+            "samples": len(audio),
+            "options": {"beam_size": beam_size, "word_timestamps": word_timestamps,
+                        "condition_on_previous_text": condition_on_previous_text, **options},
+        }
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = _Connection(self.socket_path)
+        try:
+            connection.buffer_for(len(audio))[:] = audio
+            request["shm"] = connection.shm.name
+            _send(connection.sock, request)
+            response = _recv(connection.sock)
+        except Exception:
+            connection.close()
+            raise
+        self._idle.put(connection)
+
+        if "error" in response:
+            raise RuntimeError(f"STT server: {response['error']}")
+        segments = [
+            Segment(s["text"], s["start"], s["end"],
+                    [Word(**w) for w in s["words"]] if s["words"] is not None else None)
+            for s in response["segments"]
+        ]
+        return segments, TranscriptionInfo(response["language"])
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# --- Server ------------------------------------------------------------------
+
+class STTServer:
+    def __init__(self, socket_path: str, device: str = "cpu", workers: int = None):
+        self.socket_path = socket_path
+        self.device = device
+        # Concurrent transcriptions per model (CTranslate2 runs that many in parallel)
+        self.workers = workers or int(os.getenv('STT_SERVER_WORKERS', '2'))
+        self.models: Dict[str, Any] = {}
+        self._loading = threading.Lock()
+        self._slots: Optional[anyio.CapacityLimiter] = None
+
+    def model(self, name: str):
+        with self._loading:
+            if name not in self.models:
+                from faster_whisper import WhisperModel
+                print(f"Loading Whisper model {name!r}")
+                self.models[name] = WhisperModel(name, device=self.device, compute_type="int8",
+                                                 num_workers=self.workers)
+            return self.models[name]
+
+    def transcribe(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        shm = shared_memory.SharedMemory(name=request["shm"])
+        # The client owns the segment; keep this process's tracker from unlinking it on exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        try:
+            audio = np.ndarray((request["samples"],), dtype=np.float32, buffer=shm.buf)
+            with timed("stt.server"):
+                segments, info = self.model(request["model"]).transcribe(audio, **request["options"])
+                segments = [
+                    {
+                        "text": s.text, "start": s.start, "end": s.end,
+                        "words": None if s.words is None else [
+                            {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                            for w in s.words
+                        ],
+                    }
+                    for s in segments
+                ]
+            del audio
+            return {"language": info.language, "segments": segments}
+        finally:
+            shm.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    request = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    return
+                try:
+                    response = await anyio.to_thread.run_sync(self.transcribe, request, limiter=self._slots)
+                except Exception as e:
+                    ERRORS.inc(stage="stt.server")
+                    print(f"Error transcribing for a client: {e}")
+                    response = {"error": str(e)}
+                payload = json.dumps(response).encode()
+                writer.write(_LENGTH.pack(len(payload)) + payload)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, preload: List[str] = ()):
+        for name in preload:
+            self.model(name)
+        self._slots = anyio.CapacityLimiter(self.workers)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        print(f"STT server listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=STT_SERVER_SOCKET or "/tmp/presentation-stt.sock")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--workers", type=int, help="concurrent transcriptions (default STT_SERVER_WORKERS or 2)")
+    parser.add_argument("--preload", default="base", help="comma-separated models to load at start")
+    args = parser.parse_args()
+
+    server = STTServer(args.socket, device=args.device, workers=args.workers)
+    try:
+        asyncio.run(server.serve([name for name in args.preload.split(",") if name]))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,66 @@
-import os
-from huggingface_hub import InferenceClient
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Callable
 from .models import Suggestion, PresentationMode
+from .llm_client import LLMClient
+from .prompt_builder import build_prompt, keep_tail
+from .structured_output import AnalogiesResponse, ImagesResponse, MetaphorsResponse, stream_structured_items
+from .metrics import ERRORS
 
-class SuggestionEngine:
-    def __init__(self):
-        self.use_hf = os.getenv('USE_HF', 'false').lower() == 'true'
-        self.hf_model = os.getenv('HF_CHAT_MODEL', 'mistralai/Mistral-7B-Instruct-v0.2')
-        self.hf_token = os.getenv('HF_TOKEN') or os.getenv('HUGGINGFACEHUB_API_TOKEN')
-        self.hf_task = os.getenv('HF_TASK', 'conversational')
-        self.hf_client = InferenceClient(model=self.hf_model, token=self.hf_token) if self.use_hf else None
+SuggestionCallback = Callable[[Suggestion], Awaitable[None]]
 
+class SuggestionEngine:
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or LLMClient()
     
     async def generate_suggestions(self, transcript: str, topic: str, mode: PresentationMode, 
-                                 unclear_sentences: List[str]) -> List[Suggestion]:
-        """Generate suggestions for improving unclear explanations"""
+                                 unclear_sentences: List[str],
+                                 on_suggestion: SuggestionCallback = None) -> List[Suggestion]:
+        """Generate suggestions for improving unclear explanations.
+
+        Completions are streamed; ``on_suggestion`` is awaited with each suggestion as
+        soon as the model has finished writing it.
+        """
         
         suggestions = []
         
         for sentence in unclear_sentences:
             # Generate metaphor suggestions
-            metaphor_suggestions = await self._generate_metaphors(sentence, topic, mode)
+            metaphor_suggestions = await self._generate_metaphors(sentence, topic, mode, on_suggestion)
             suggestions.extend(metaphor_suggestions)
             
             # Generate analogy suggestions
-            analogy_suggestions = await self._generate_analogies(sentence, topic, mode)
+            analogy_suggestions = await self._generate_analogies(sentence, topic, mode, on_suggestion)
             suggestions.extend(analogy_suggestions)
             
             # Generate image suggestions
-            image_suggestions = await self._generate_image_suggestions(sentence, topic, mode)
+            image_suggestions = await self._generate_image_suggestions(sentence, topic, mode, on_suggestion)
             suggestions.extend(image_suggestions)
         
         return suggestions
     
-    async def _generate_metaphors(self, sentence: str, topic: str, mode: PresentationMode) -> List[Suggestion]:
+    async def _stream_suggestions(self, prompt: str, kind: str, response_model, key: str, field: str,
+                                  sentence: str, on_suggestion: SuggestionCallback, **llm_args) -> List[Suggestion]:
+        """Stream a schema-constrained completion, forwarding each ``key`` item as it closes."""
+
+        def to_suggestion(item) -> Suggestion:
+            return Suggestion(type=kind, suggestion=getattr(item, field), context=sentence,
+                              confidence=item.confidence)
+
+        async def on_item(item):
+            if on_suggestion is not None:
+                await on_suggestion(to_suggestion(item))
+
+        items = await stream_structured_items(self.llm, prompt, response_model, key, on_item, **llm_args)
+        return [to_suggestion(item) for item in items]
+    
+    async def _generate_metaphors(self, sentence: str, topic: str, mode: PresentationMode,
+                                  on_suggestion: SuggestionCallback = None) -> List[Suggestion]:
         """Generate metaphor suggestions for unclear explanations"""
         
-        prompt = f"""
+        prompt = build_prompt("suggestions", """
         The speaker said: "{sentence}"
         
         Topic: {topic}
-        Mode: {mode.value}
+        Mode: {mode}
         
         Suggest 2-3 creative metaphors that could help explain this concept more clearly.
         Consider the audience level and context.
@@ -55,59 +75,28 @@ class SuggestionEngine:
                 }}
             ]
         }}
-        """
+        """, shrink={"sentence": keep_tail}, sentence=sentence, topic=topic, mode=mode.value)
         
         try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[{"role":"user","content": prompt}],
-                            temperature=0.8,
-                            max_tokens=700
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf():
-                        return self.hf_client.text_generation(prompt, max_new_tokens=500, temperature=0.8)
-                    content = await anyio.to_thread.run_sync(_run_hf)
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.8
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
-            
-            result = json.loads(content)
-            
-            suggestions = []
-            for m in result.get("metaphors", []):
-                suggestions.append(Suggestion(
-                    type="metaphor",
-                    suggestion=m["metaphor"],
-                    context=sentence,
-                    confidence=m["confidence"]
-                ))
-            
-            return suggestions
+            return await self._stream_suggestions(
+                prompt, "metaphor", MetaphorsResponse, "metaphors", "metaphor", sentence, on_suggestion,
+                temperature=0.8, max_tokens=700, max_new_tokens=500,
+                stage="suggestions.metaphor", mode=mode.value
+            )
         except Exception as e:
+            ERRORS.inc(stage="suggestions.metaphor")
             print(f"Error generating metaphors: {e}")
             return []
     
-    async def _generate_analogies(self, sentence: str, topic: str, mode: PresentationMode) -> List[Suggestion]:
+    async def _generate_analogies(self, sentence: str, topic: str, mode: PresentationMode,
+                                  on_suggestion: SuggestionCallback = None) -> List[Suggestion]:
         """Generate analogy suggestions for unclear explanations"""
         
-        prompt = f"""
+        prompt = build_prompt("suggestions", """
         The speaker said: "{sentence}"
         
         Topic: {topic}
-        Mode: {mode.value}
+        Mode: {mode}
         
         Suggest 2-3 analogies that could help explain this concept more clearly.
         Use familiar, everyday examples that the audience can relate to.
@@ -122,68 +111,28 @@ class SuggestionEngine:
                 }}
             ]
         }}
-        """
+        """, shrink={"sentence": keep_tail}, sentence=sentence, topic=topic, mode=mode.value)
         
         try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[{"role":"user","content": prompt}],
-                            temperature=0.8,
-                            max_tokens=700
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf():
-                        return self.hf_client.text_generation(prompt, max_new_tokens=500, temperature=0.8)
-                    content = await anyio.to_thread.run_sync(_run_hf)
-            elif self.use_grok:
-                def _run_grok():
-                    return self.grok_client.chat.completions.create(
-                        model=self.grok_model,
-                        messages=[{"role":"user","content": prompt}],
-                        temperature=0.8
-                    )
-                resp = await anyio.to_thread.run_sync(_run_grok)
-                content = resp.choices[0].message.content
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.8
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
-            
-            result = json.loads(content)
-            
-            suggestions = []
-            for a in result.get("analogies", []):
-                suggestions.append(Suggestion(
-                    type="analogy",
-                    suggestion=a["analogy"],
-                    context=sentence,
-                    confidence=a["confidence"]
-                ))
-            
-            return suggestions
+            return await self._stream_suggestions(
+                prompt, "analogy", AnalogiesResponse, "analogies", "analogy", sentence, on_suggestion,
+                temperature=0.8, max_tokens=700, max_new_tokens=500,
+                stage="suggestions.analogy", mode=mode.value
+            )
         except Exception as e:
+            ERRORS.inc(stage="suggestions.analogy")
             print(f"Error generating analogies: {e}")
             return []
     
-    async def _generate_image_suggestions(self, sentence: str, topic: str, mode: PresentationMode) -> List[Suggestion]:
+    async def _generate_image_suggestions(self, sentence: str, topic: str, mode: PresentationMode,
+                                          on_suggestion: SuggestionCallback = None) -> List[Suggestion]:
         """Generate image suggestions for unclear explanations"""
         
-        prompt = f"""
+        prompt = build_prompt("suggestions", """
         The speaker said: "{sentence}"
         
         Topic: {topic}
-        Mode: {mode.value}
+        Mode: {mode}
         
         Suggest 2-3 types of images, diagrams, or visual aids that could help explain this concept.
         Be specific about what the image should show.
@@ -198,56 +147,15 @@ class SuggestionEngine:
                 }}
             ]
         }}
-        """
+        """, shrink={"sentence": keep_tail}, sentence=sentence, topic=topic, mode=mode.value)
         
         try:
-            import anyio, json
-            if self.use_hf:
-                if self.hf_task == 'conversational':
-                    def _run_hf_chat():
-                        return self.hf_client.chat.completions.create(
-                            model=self.hf_model,
-                            messages=[{"role":"user","content": prompt}],
-                            temperature=0.7,
-                            max_tokens=700
-                        )
-                    resp = await anyio.to_thread.run_sync(_run_hf_chat)
-                    content = resp.choices[0].message.content
-                else:
-                    def _run_hf():
-                        return self.hf_client.text_generation(prompt, max_new_tokens=500, temperature=0.7)
-                    content = await anyio.to_thread.run_sync(_run_hf)
-            elif self.use_grok:
-                def _run_grok():
-                    return self.grok_client.chat.completions.create(
-                        model=self.grok_model,
-                        messages=[{"role":"user","content": prompt}],
-                        temperature=0.7
-                    )
-                resp = await anyio.to_thread.run_sync(_run_grok)
-                content = resp.choices[0].message.content
-            else:
-                def _run_oa():
-                    return self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7
-                    )
-                response = await anyio.to_thread.run_sync(_run_oa)
-                content = response.choices[0].message.content
-            
-            result = json.loads(content)
-            
-            suggestions = []
-            for img in result.get("images", []):
-                suggestions.append(Suggestion(
-                    type="image",
-                    suggestion=img["description"],
-                    context=sentence,
-                    confidence=img["confidence"]
-                ))
-            
-            return suggestions
+            return await self._stream_suggestions(
+                prompt, "image", ImagesResponse, "images", "description", sentence, on_suggestion,
+                temperature=0.7, max_tokens=700, max_new_tokens=500,
+                stage="suggestions.image", mode=mode.value
+            )
         except Exception as e:
+            ERRORS.inc(stage="suggestions.image")
             print(f"Error generating image suggestions: {e}")
             return []
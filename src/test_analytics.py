@@ -0,0 +1,109 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.analytics import AnalyticsStore, bin_of, week_of
+from src.analyticsController import router
+from src.models import AudioMetrics, ContentAnalysis, PresentationMode, PresentationScore
+
+
+def _score(overall: float, pace: float, fillers: int, timestamp: str,
+           mode: PresentationMode = PresentationMode.PROFESSIONAL, topic: str = "T") -> PresentationScore:
+    audio = AudioMetrics(transcription="", pace=pace, tone=0.0, filler_words=[], filler_count=fillers,
+                         intonation_variance=0.0, clarity_score=0.5, speaking_time=4.0)
+    content = ContentAnalysis(clarity_score=0.6, flow_score=0.6, technical_accuracy=0.6, explanation_quality=0.6,
+                              suggested_improvements=[])
+    return PresentationScore(overall_score=overall, audio_metrics=audio, content_analysis=content, mode=mode,
+                             topic=topic, timestamp=timestamp)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.db"), batch=2)
+    # 2026-01-05 and 2026-01-12 are Mondays
+    store.record("a", _score(0.40, 120.0, 2, "2026-01-05T10:00:00"))
+    store.record("a", _score(0.60, 0.0, 4, "2026-01-07T10:00:00"))
+    store.record("b", _score(0.80, 150.0, 0, "2026-01-12T09:00:00", PresentationMode.TECHNICAL, "ML"))
+    store.record("b", _score(0.90, 160.0, 1, "2026-01-13T09:00:00", PresentationMode.TECHNICAL, "ML"))
+    yield store
+    store.close()
+
+
+def test_week_and_bins():
+    assert week_of(datetime.datetime(2026, 1, 8, 23, 59)) == "2026-01-05"
+    assert bin_of("overall_score", 0.425) == 42
+    assert bin_of("overall_score", 1.0) == 99
+    assert bin_of("pace", -3.0) == 0
+    assert bin_of("filler_count", 500) == 20
+
+
+def test_records_are_buffered_until_flushed(store):
+    assert store.due()
+    assert store.db.execute("SELECT COUNT(*) FROM chunks").fetchone() == (0,)
+    store.flush()
+    assert not store.due()
+    assert store.db.execute("SELECT COUNT(*) FROM chunks").fetchone() == (4,)
+
+
+def test_summary_by_week(store):
+    weeks = store.summary(["week"])
+    assert [w["week"] for w in weeks] == ["2026-01-05", "2026-01-12"]
+    first, second = weeks
+    assert first["chunks"] == 2
+    assert first["mean_overall_score"] == pytest.approx(0.5)
+    assert first["mean_filler_count"] == pytest.approx(3.0)
+    # The chunk without a pace reading is left out of the mean pace
+    assert first["mean_pace"] == pytest.approx(120.0)
+    assert second["mean_pace"] == pytest.approx(155.0)
+
+
+def test_summary_filters_and_groups(store):
+    rows = store.summary(["mode", "topic"], mode="technical")
+    assert [(r["mode"], r["topic"], r["chunks"]) for r in rows] == [("technical", "ML", 2)]
+    assert store.summary([], since="2026-01-12")[0]["chunks"] == 2
+    assert store.summary(["week"], until="2026-01-06")[0]["week"] == "2026-01-05"
+    with pytest.raises(ValueError):
+        store.summary(["session_id"])
+
+
+def test_distribution(store):
+    histogram = store.distribution("overall_score")
+    assert histogram["count"] == 4
+    assert [b["count"] for b in histogram["bins"]] == [1, 1, 1, 1]
+    assert histogram["bins"][0]["low"] == pytest.approx(0.40)
+    # Chunks without a pace reading are not counted in its histogram
+    assert store.distribution("pace")["count"] == 3
+    with pytest.raises(ValueError):
+        store.distribution("tone")
+
+
+def test_percentiles(store):
+    result = store.percentiles("overall_score", [0.0, 0.5, 1.0])
+    values = result["percentiles"]
+    assert result["count"] == 4
+    assert values["p0"] == pytest.approx(0.40)
+    assert 0.6 <= values["p50"] <= 0.61
+    assert values["p100"] == pytest.approx(0.91)
+    assert store.percentiles("overall_score", mode="casual")["percentiles"] == {}
+    with pytest.raises(ValueError):
+        store.percentiles("overall_score", [1.5])
+
+
+def test_endpoints(store):
+    app = FastAPI()
+    app.include_router(router)
+    app.state.analyzer = SimpleNamespace(analytics=store)
+    client = TestClient(app)
+
+    summary = client.get("/api/analytics/summary", params={"group_by": "mode"}).json()
+    assert [g["mode"] for g in summary["groups"]] == ["professional", "technical"]
+    assert client.get("/api/analytics/distribution/pace").json()["count"] == 3
+    assert client.get("/api/analytics/percentiles/pace", params={"q": "0.5"}).json()["count"] == 3
+    assert client.get("/api/analytics/summary", params={"group_by": "nope"}).status_code == 400
+    assert client.get("/api/analytics/percentiles/pace", params={"q": "x"}).status_code == 400
+
+    app.state.analyzer = SimpleNamespace(analytics=None)
+    assert client.get("/api/analytics/summary").status_code == 404
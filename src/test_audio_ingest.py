@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src import audio_ingest
+from src.audio_ingest import TARGET_SAMPLE_RATE, StreamResampler, resample
+
+
+def sine(sample_rate: int, seconds: float = 1.0, freq: float = 440.0, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@pytest.fixture(params=["soxr", "scipy"])
+def backend(request, monkeypatch):
+    if request.param == "scipy":
+        monkeypatch.setattr(audio_ingest, "soxr", None)
+    elif audio_ingest.soxr is None:
+        pytest.skip("soxr is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("orig_sr", [8000, 22050, 44100, 48000])
+def test_resample_keeps_amplitude(backend, orig_sr):
+    out = resample(sine(orig_sr), orig_sr)
+    assert out.dtype == np.float32
+    assert abs(len(out) - TARGET_SAMPLE_RATE) <= 1
+    # Ignore the filter's edge transients
+    middle = out[len(out) // 4:-len(out) // 4]
+    assert np.max(np.abs(middle)) == pytest.approx(0.5, abs=0.02)
+
+
+def test_resample_same_rate_is_unchanged():
+    samples = sine(TARGET_SAMPLE_RATE)
+    assert np.array_equal(resample(samples, TARGET_SAMPLE_RATE), samples)
+
+
+@pytest.mark.parametrize("orig_sr", [8000, 22050, 44100, 48000])
+def test_stream_resampler_matches_one_pass(backend, orig_sr):
+    samples = np.random.default_rng(0).standard_normal(orig_sr).astype(np.float32) * 0.1
+    resampler = StreamResampler(orig_sr)
+    # Uneven pieces, as network frames arrive
+    bounds = list(range(0, len(samples), 777)) + [len(samples)]
+    out = np.concatenate([resampler.push(samples[a:b]) for a, b in zip(bounds, bounds[1:])])
+    whole = resample(samples, orig_sr)
+    # The stream holds back the last few milliseconds until more audio arrives
+    assert len(whole) - TARGET_SAMPLE_RATE // 10 < len(out) <= len(whole)
+    assert np.allclose(out, whole[:len(out)], atol=1e-5)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from src.chunk_filter import ChunkFilter, minhash, shingles, silence_ratio, similarity
+
+TEXT = ("Recommendation systems rank items for each user by predicting how likely they are "
+        "to engage with them, using past interactions and item features.")
+OTHER = ("Our quarterly revenue grew because the new onboarding flow reduced churn among "
+         "small business customers in Europe and Asia.")
+
+
+def _speech(seconds: float = 5.0) -> np.ndarray:
+    t = np.arange(int(16000 * seconds)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_signatures_of_near_duplicates_are_similar():
+    near = TEXT.replace("each user", "every user")
+    assert similarity(minhash(shingles(TEXT)), minhash(shingles(near))) > 0.6
+    assert similarity(minhash(shingles(TEXT)), minhash(shingles(OTHER))) < 0.2
+    assert similarity(minhash(shingles(TEXT)), minhash(shingles(TEXT))) == 1.0
+
+
+def test_empty_text_has_no_signature():
+    assert shingles("") == []
+    assert minhash([]) is None
+    assert similarity(None, minhash(shingles(TEXT))) == 0.0
+
+
+def test_repeated_window_is_skipped_and_distinct_one_analyzed():
+    chunk_filter = ChunkFilter()
+    assert chunk_filter.check("s", TEXT, _speech()) == (None, TEXT)
+    assert chunk_filter.check("s", TEXT, _speech())[0] == "duplicate"
+    assert chunk_filter.check("s", OTHER, _speech()) == (None, OTHER)
+
+
+def test_sessions_are_compared_separately():
+    chunk_filter = ChunkFilter()
+    chunk_filter.check("a", TEXT)
+    assert chunk_filter.check("b", TEXT)[0] is None
+
+
+def test_silent_window_is_skipped():
+    chunk_filter = ChunkFilter()
+    chunk_filter.check("s", TEXT, _speech())
+    silent = np.zeros(16000 * 5, dtype=np.float32)
+    assert silence_ratio(silent) == 1.0
+    assert chunk_filter.check("s", OTHER, silent)[0] == "silence"
+
+
+def test_empty_transcript_is_skipped():
+    chunk_filter = ChunkFilter()
+    chunk_filter.check("s", TEXT)
+    assert chunk_filter.check("s", "   ")[0] == "empty"
+
+
+def test_short_text_is_merged_into_the_next_window():
+    chunk_filter = ChunkFilter()
+    chunk_filter.check("s", TEXT)
+    assert chunk_filter.check("s", "So, anyway.")[0] == "few_words"
+    reason, transcript = chunk_filter.check("s", OTHER)
+    assert reason is None
+    assert transcript == f"So, anyway. {OTHER}"
+
+
+def test_nothing_is_skipped_before_a_first_analysis():
+    chunk_filter = ChunkFilter()
+    assert chunk_filter.check("s", "", np.zeros(16000, dtype=np.float32), can_skip=False) == (None, "")
+    assert chunk_filter.check("s", "Hi.", can_skip=False) == (None, "Hi.")
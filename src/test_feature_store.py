@@ -0,0 +1,110 @@
+import asyncio
+import io
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import FakeLLM, FakeWhisperModel
+from src.audio_analyzer import AudioAnalyzer
+from src.audio_ingest import load_audio
+from src.feature_store import FeatureStore
+from src.models import ContentAnalysis, PresentationMode
+from src.presentation_analyzer import PresentationAnalyzer
+from src.rescore import rescore_session
+from src.scoring_system import ScoringSystem
+from src.speech_to_text import SpeechToText
+
+CLIP = "src/briskaudioclip2.wav"
+
+
+@pytest.fixture(scope="module")
+def clip():
+    # 15 s: the recording looped, so every 5 s window has speech
+    return np.resize(load_audio(CLIP), 16000 * 15)
+
+
+@pytest.fixture
+def audio_analyzer():
+    return AudioAnalyzer(speech_to_text=SpeechToText(model=FakeWhisperModel(rtf=0)))
+
+
+def _wav(samples: np.ndarray) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("pitch", [True, False])
+def test_stored_features_give_the_live_metrics(tmp_path, clip, audio_analyzer, pitch):
+    live, features = audio_analyzer.analyze_with_features(clip[:16000 * 5], pitch=pitch)
+    features.meta = {"mode": "professional"}
+    store = FeatureStore(str(tmp_path))
+    store.write("s1", 3, features)
+
+    read = store.read("s1", 3)
+    assert isinstance(read.rms, np.memmap) or isinstance(read.rms.base, np.memmap)
+    assert read.pitch_tracked is pitch
+    assert read.meta == {"mode": "professional"}
+    assert read.transcription == features.transcription
+    assert np.array_equal(read.word_times, features.word_times)
+    assert audio_analyzer.metrics_from_features(read) == live
+    assert store.sessions() == ["s1"]
+    assert store.chunks("s1") == [3]
+
+
+def test_other_files_are_rejected(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    (tmp_path / "s1").mkdir()
+    (tmp_path / "s1" / "000000.feat").write_bytes(b"RIFF" + bytes(64))
+    with pytest.raises(ValueError):
+        store.read("s1", 0)
+
+
+def test_rescore_recomputes_each_stored_chunk(tmp_path, clip, audio_analyzer):
+    store = FeatureStore(str(tmp_path))
+    scoring = ScoringSystem()
+    content = {"clarity_score": 0.8, "flow_score": 0.7, "technical_accuracy": 0.9, "explanation_quality": 0.6,
+               "suggested_improvements": []}
+    expected = []
+    for chunk in range(2):
+        live, features = audio_analyzer.analyze_with_features(clip[16000 * 5 * chunk:16000 * 5 * (chunk + 1)])
+        features.meta = {"mode": "professional", "topic": "T", "timestamp": f"2026-01-0{chunk + 1}T10:00:00",
+                         "content": content, "overall_score": 0.5}
+        store.write("s1", chunk, features)
+        expected.append(live)
+
+    records = list(rescore_session(store, "s1", audio_analyzer, scoring))
+    assert [r["chunk"] for r in records] == [0, 1]
+    assert [r["previous_overall_score"] for r in records] == [0.5, 0.5]
+    for record, live in zip(records, expected):
+        score = scoring.calculate_overall_score(live, ContentAnalysis(**content), PresentationMode.PROFESSIONAL, "T")
+        assert record["scores"] == scoring.get_score_breakdown(score)
+
+
+class SlowFeatureStore(FeatureStore):
+    """Writes take long enough for the other windows to catch up with them."""
+
+    def write(self, session_id, chunk, features):
+        time.sleep(0.1)
+        super().write(session_id, chunk, features)
+
+
+def test_concurrent_windows_get_their_own_feature_files(tmp_path, clip, audio_analyzer):
+    async def run():
+        analyzer = PresentationAnalyzer(audio_analyzer=audio_analyzer, llm=FakeLLM(latency=0.01), analytics_db="")
+        analyzer.feature_store = SlowFeatureStore(str(tmp_path))
+        analyzer.create_session("s1", PresentationMode.PROFESSIONAL, "T")
+        windows = [clip[16000 * 5 * i:16000 * 5 * (i + 1)] for i in range(3)]
+        await asyncio.gather(*[
+            analyzer.analyze_presentation_chunk("s1", _wav(window), f"Window {i} says something new about it.")
+            for i, window in enumerate(windows)
+        ])
+        return analyzer.feature_store.chunks("s1")
+
+    assert asyncio.run(run()) == [0, 1, 2]
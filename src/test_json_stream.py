@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from src.json_stream import IncrementalJSONParser, list_items, parse_json, repair_json, stream_json
+
+DOCUMENT = '{"questions": [{"text": "Why {this}?", "n": 1}, {"text": "And \\"that\\"?", "n": [2]}]}'
+
+
+def _feed_in_pieces(text: str, size: int):
+    parser = IncrementalJSONParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, len(DOCUMENT)])
+def test_parser_yields_each_item_once_it_closes(size):
+    assert _feed_in_pieces(DOCUMENT, size) == [
+        ("questions", {"text": "Why {this}?", "n": 1}),
+        ("questions", {"text": 'And "that"?', "n": [2]}),
+    ]
+
+
+def test_parser_handles_a_bare_list_after_prose():
+    items = _feed_in_pieces('Sure! Here you go:\n```json\n[{"a": 1}, {"b": 2}]\n```', 4)
+    assert items == [(None, {"a": 1}), (None, {"b": 2})]
+
+
+def test_parser_holds_back_a_truncated_item():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"questions": [{"text": "one"}, {"text": "tw') == [("questions", {"text": "one"})]
+
+
+def test_parser_skips_an_ill_formed_item():
+    items = _feed_in_pieces('[{"a": 1,}, {"b": 2}]', 5)
+    assert items == [(None, {"b": 2})]
+
+
+def test_repair_strips_fences_and_prose():
+    assert repair_json('```json\n{"a": [1, 2]}\n``` hope this helps') == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": "unfinished str', {"a": "unfinished str"}),
+    ('{"a": 1, "b": {"c": tr', {"a": 1}),
+    ('[{"text": "one"}, {"text": "tw', [{"text": "one"}, {"text": "tw"}]),
+    ('{"a": 1,', {"a": 1}),
+])
+def test_repair_closes_a_truncated_document(text, expected):
+    assert repair_json(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "]", '{"a": ]'])
+def test_repair_gives_up_on_hopeless_text(text):
+    assert repair_json(text) is None
+
+
+def test_parse_json_prefers_the_plain_parse():
+    assert parse_json('{"a": 1}', stage="test") == {"a": 1}
+    assert parse_json('{"a": 1', stage="test") == {"a": 1}
+    assert parse_json("nothing", stage="test") is None
+
+
+def test_list_items_keeps_only_objects():
+    assert list_items({"questions": [{"a": 1}, "x", 2]}, "questions") == [{"a": 1}]
+    assert list_items([{"a": 1}], "questions") == [{"a": 1}]
+    assert list_items(None, "questions") == []
+
+
+class _StreamingLLM:
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def stream(self, prompt, **kwargs):
+        for piece in self.pieces:
+            yield piece
+
+
+def test_stream_json_reports_items_and_repairs_the_document():
+    seen = []
+
+    async def on_item(item):
+        seen.append(item)
+
+    pieces = ['{"questions": [{"q"', ': 1}, {"q": 2}', ', {"q": 3']
+    result, text = asyncio.run(stream_json(_StreamingLLM(pieces), "prompt", on_item, stage="test"))
+    assert seen == [{"q": 1}, {"q": 2}]
+    assert result == {"questions": [{"q": 1}, {"q": 2}, {"q": 3}]}
+    assert text == "".join(pieces)
@@ -0,0 +1,74 @@
+from src.load_policy import LoadPolicy
+
+
+def _policy(recover_seconds: float = 10.0) -> LoadPolicy:
+    policy = LoadPolicy()
+    policy.depth_thresholds = (4, 8)
+    policy.lag_thresholds = (0.1, 0.5)
+    policy.recover_seconds = recover_seconds
+    return policy
+
+
+def test_tier_follows_the_worse_signal():
+    policy = _policy()
+    assert policy.update(now=0).name == "full"
+    policy.depth = 5
+    assert policy.update(now=1).name == "reduced"
+    policy.depth, policy.lag = 0, 0.6
+    assert policy.update(now=2).name == "minimal"
+
+
+def test_tier_drops_at_once_and_recovers_one_step_at_a_time():
+    policy = _policy(recover_seconds=10)
+    policy.depth = 9
+    assert policy.update(now=0).name == "minimal"
+    policy.depth = 0
+    # Calm, but not for long enough yet
+    assert policy.update(now=1).name == "minimal"
+    assert policy.update(now=10).name == "minimal"
+    assert policy.update(now=11).name == "reduced"
+    assert policy.update(now=20).name == "reduced"
+    assert policy.update(now=21).name == "full"
+
+
+def test_a_spike_during_recovery_restarts_the_wait():
+    policy = _policy(recover_seconds=10)
+    policy.depth = 5
+    policy.update(now=0)
+    policy.depth = 0
+    policy.update(now=1)
+    policy.depth = 5
+    assert policy.update(now=8).name == "reduced"
+    policy.depth = 0
+    policy.update(now=9)
+    assert policy.update(now=15).name == "reduced"
+    assert policy.update(now=19).name == "full"
+
+
+def test_track_counts_windows_in_flight():
+    policy = _policy()
+    policy.depth_thresholds = (1, 8)
+    with policy.track() as first:
+        with policy.track() as second:
+            assert policy.depth == 2
+    assert (first.name, second.name) == ("full", "reduced")
+    assert policy.depth == 0
+
+
+def test_deferred_transcript_keeps_the_most_recent_words():
+    policy = _policy()
+    policy.defer_max_words = 10
+    for i in range(10):
+        policy.defer("s", f"window {i} has five words")
+    policy.defer("t", "other session")
+    assert policy.take_deferred("s") == ["window 8 has five words", "window 9 has five words"]
+    assert policy.take_deferred("s") == []
+    policy.forget("t")
+    assert policy.take_deferred("t") == []
+
+
+def test_one_long_window_is_kept_whole():
+    policy = _policy()
+    policy.defer_max_words = 3
+    policy.defer("s", "a window longer than the budget")
+    assert policy.take_deferred("s") == ["a window longer than the budget"]
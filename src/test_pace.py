@@ -0,0 +1,39 @@
+import pytest
+
+from src.audio_analyzer import PACE_MIN_SECONDS, PACE_MIN_WORDS, AudioAnalyzer
+
+
+def _words(count: int, spacing: float, length: float = 0.3):
+    return [{"start": i * spacing, "end": i * spacing + length} for i in range(count)]
+
+
+@pytest.fixture
+def analyzer():
+    return AudioAnalyzer()
+
+
+def test_steady_speech_gives_words_per_minute(analyzer):
+    # 10 words, one every 0.4 s: 3.9 s of speech
+    pace, speaking_time = analyzer._calculate_pace(_words(10, 0.4))
+    assert speaking_time == pytest.approx(3.9)
+    assert pace == pytest.approx(10 / (3.9 / 60))
+
+
+def test_one_or_two_words_have_no_pace(analyzer):
+    # A single short word would otherwise read as 200 WPM
+    assert analyzer._calculate_pace(_words(1, 0.4))[0] == 0.0
+    pace, speaking_time = analyzer._calculate_pace(_words(2, 0.2))
+    assert pace == 0.0
+    assert speaking_time == pytest.approx(0.5)
+
+
+def test_pace_needs_enough_words_and_enough_speech(analyzer):
+    assert analyzer._calculate_pace(_words(PACE_MIN_WORDS - 1, 1.0))[0] == 0.0
+    # Enough words, but crammed into too short a span
+    short = PACE_MIN_SECONDS / (PACE_MIN_WORDS + 1)
+    assert analyzer._calculate_pace(_words(PACE_MIN_WORDS, short, length=short / 2))[0] == 0.0
+    assert analyzer._calculate_pace(_words(PACE_MIN_WORDS, 0.5))[0] > 0
+
+
+def test_no_words_has_no_pace(analyzer):
+    assert analyzer._calculate_pace([]) == (0.0, 0.0)
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import pipeline
+from src.models import AudioMetrics, PresentationMode
+from src.pipeline import Recording, completed_paths, score_batch
+
+
+class FakePipeline:
+    """Scores without an LLM: the record carries the transcription it was given."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def score(self, audio_metrics, topic, mode):
+        return {"transcription": audio_metrics.transcription, "scores": {"overall": 0.5}}
+
+
+def _fake_analysis(path: str) -> AudioMetrics:
+    if path.endswith("broken.wav"):
+        raise ValueError("unreadable audio")
+    return AudioMetrics(transcription=f"words of {path}", pace=120.0, tone=0.0, filler_words=[], filler_count=0,
+                        intonation_variance=0.0, clarity_score=0.5)
+
+
+@pytest.fixture(autouse=True)
+def fake_workers(monkeypatch):
+    # Threads instead of processes: the fakes are patched into this process only
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pipeline, "_init_worker", lambda *args: None)
+    monkeypatch.setattr(pipeline, "_analyze_in_worker", _fake_analysis)
+    monkeypatch.setattr(pipeline, "FeedbackPipeline", FakePipeline)
+
+
+def _recordings(*names):
+    return [Recording(name, "T", PresentationMode.PROFESSIONAL) for name in names]
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _run(recordings, output):
+    return asyncio.run(score_batch(recordings, str(output), workers=2, llm_concurrency=2))
+
+
+def test_batch_writes_one_line_per_recording(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    counts = _run(_recordings("a.wav", "b.wav", "broken.wav"), output)
+    assert counts == {"skipped": 0, "scored": 2, "failed": 1}
+    records = {r["path"]: r for r in _lines(output)}
+    assert records["a.wav"]["transcription"] == "words of a.wav"
+    assert records["broken.wav"]["error"] == "unreadable audio"
+    assert completed_paths(str(output)) == {"a.wav", "b.wav"}
+
+
+def test_rerun_skips_scored_files_and_retries_failed_ones(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    _run(_recordings("a.wav", "broken.wav"), output)
+    counts = _run(_recordings("a.wav", "broken.wav", "c.wav"), output)
+    assert counts == {"skipped": 1, "scored": 1, "failed": 1}
+    paths = [r["path"] for r in _lines(output)]
+    assert paths.count("a.wav") == 1
+    assert paths.count("broken.wav") == 2
+
+
+def test_torn_last_line_is_retried_and_not_glued_to_new_output(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    good = {"path": "a.wav", "scores": {}}
+    output.write_text(json.dumps(good) + "\n" + '{"path": "b.wav", "transcr')
+    assert completed_paths(str(output)) == {"a.wav"}
+
+    counts = _run(_recordings("a.wav", "b.wav"), output)
+    assert counts == {"skipped": 1, "scored": 1, "failed": 0}
+    lines = output.read_text().splitlines()
+    assert lines[1] == '{"path": "b.wav", "transcr'
+    assert json.loads(lines[2])["path"] == "b.wav"
+    assert completed_paths(str(output)) == {"a.wav", "b.wav"}
+
+
+def test_nothing_to_do(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    assert completed_paths(str(output)) == set()
+    _run(_recordings("a.wav"), output)
+    before = output.read_text()
+    assert _run(_recordings("a.wav"), output) == {"skipped": 1, "scored": 0, "failed": 0}
+    assert output.read_text() == before
@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+from src.profiler import profile_for
+
+
+async def _burn_on_loop(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        # CPU-bound stretches between awaits, like an analysis step run on the loop
+        step = time.perf_counter() + 0.05
+        while time.perf_counter() < step:
+            sum(i * i for i in range(1000))
+        await asyncio.sleep(0)
+
+
+def test_profile_samples_coroutines_on_the_event_loop():
+    async def run():
+        burner = asyncio.create_task(_burn_on_loop(1.0))
+        collapsed = await profile_for(0.8, 0.005)
+        await burner
+        return collapsed
+
+    collapsed = asyncio.run(run())
+    assert "_burn_on_loop" in collapsed
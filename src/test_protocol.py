@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src.audio_ingest import resample
+from src.protocol import PROTOCOL_VERSION, FeedbackEncoder, FrameReader, ProtocolError, encode_frame
+
+
+@pytest.mark.parametrize("hello", [[], "hello", 1, None])
+def test_handshake_must_be_an_object(hello):
+    with pytest.raises(ProtocolError):
+        FeedbackEncoder.from_handshake(hello)
+
+
+def test_handshake_rejects_other_versions():
+    with pytest.raises(ProtocolError):
+        FeedbackEncoder.from_handshake({"protocol": PROTOCOL_VERSION + 1})
+
+
+def test_handshake_is_acknowledged():
+    encoder = FeedbackEncoder.from_handshake({"protocol": PROTOCOL_VERSION, "delta": True})
+    assert encoder.describe()["delta"] is True
+
+
+def test_frames_are_resampled_as_one_stream():
+    rate = 48000
+    t = np.arange(rate) / rate
+    pcm = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype("<i2")
+    reader = FrameReader()
+    frame = rate // 50  # 20 ms per frame
+    out = b"".join(reader.read(encode_frame(pcm[i:i + frame].tobytes(), seq, sample_rate=rate))[1]
+                   for seq, i in enumerate(range(0, len(pcm), frame)))
+    samples = np.frombuffer(out, dtype="<i2").astype(np.float32) / 32768.0
+    whole = resample(pcm.astype(np.float32) / 32768.0, rate)
+    # No click at the 20 ms frame boundaries: identical to resampling the whole second at once
+    assert np.abs(samples - whole[:len(samples)]).max() < 1e-3
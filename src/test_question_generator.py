@@ -0,0 +1,56 @@
+import asyncio
+
+from src.models import PresentationMode
+from src.question_generator import QuestionGenerator
+
+
+class BrokenStreamLLM:
+    """Streams the given pieces, then fails as a dropped connection would."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def stream(self, prompt, **kwargs):
+        for piece in self.pieces:
+            yield piece
+        raise ConnectionError("stream reset")
+
+
+def generate(llm):
+    sent = []
+
+    async def on_question(question):
+        sent.append(question)
+
+    questions = asyncio.run(QuestionGenerator(llm).generate_questions(
+        "We rank candidates by similarity.", "recommendations", PresentationMode.PROFESSIONAL,
+        on_question=on_question))
+    return questions, sent
+
+
+def test_failed_stream_keeps_questions_already_sent():
+    pieces = ['{"questions": [{"question": "Why rank?", "category": "application"}, ', '{"question": "How']
+    questions, sent = generate(BrokenStreamLLM(pieces))
+    assert [q.question for q in sent] == ["Why rank?"]
+    # The session records exactly what the client was shown
+    assert questions == sent
+
+
+def test_failed_expert_stream_keeps_questions_already_sent():
+    pieces = ['{"questions": [{"question": "Per the paper, why?"}, {"question": "And how?"}, ']
+    llm = BrokenStreamLLM(pieces)
+    sent = []
+
+    async def on_question(question):
+        sent.append(question)
+
+    questions = asyncio.run(QuestionGenerator(llm).generate_questions(
+        "We rank candidates by similarity.", "recommendations", PresentationMode.TECHNICAL,
+        expert_documents=["Collaborative filtering survey."], on_question=on_question))
+    assert [q.question for q in questions] == ["Per the paper, why?", "And how?"]
+    assert questions == sent
+
+
+def test_stream_failing_before_any_question_returns_nothing():
+    questions, sent = generate(BrokenStreamLLM(['{"questions": [']))
+    assert questions == [] and sent == []
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from src.scheduler import QUESTIONS, SCORING, SUGGESTIONS, TRANSCRIPT, JobDropped, JobScheduler
+
+
+def _job(order, name, seconds=0.0, result=None):
+    async def work():
+        order.append(name)
+        await asyncio.sleep(seconds)
+        return name if result is None else result
+    return work
+
+
+def test_most_urgent_priority_starts_first():
+    async def run():
+        scheduler = JobScheduler(concurrency=1, background_limit=1)
+        order = []
+        blocker = asyncio.create_task(scheduler.run("a", TRANSCRIPT, _job(order, "blocker", 0.05)))
+        await asyncio.sleep(0)
+        queued = [
+            scheduler.run("a", SUGGESTIONS, _job(order, "suggestions")),
+            scheduler.run("a", QUESTIONS, _job(order, "questions")),
+            scheduler.run("a", SCORING, _job(order, "scoring")),
+        ]
+        await asyncio.gather(blocker, *queued)
+        return order
+
+    assert asyncio.run(run()) == ["blocker", "scoring", "questions", "suggestions"]
+
+
+def test_sessions_take_turns_within_a_priority():
+    async def run():
+        scheduler = JobScheduler(concurrency=1)
+        order = []
+        blocker = asyncio.create_task(scheduler.run("x", TRANSCRIPT, _job(order, "blocker", 0.05)))
+        await asyncio.sleep(0)
+        queued = [scheduler.run("a", SCORING, _job(order, f"a{i}")) for i in range(3)]
+        queued.append(scheduler.run("b", SCORING, _job(order, "b0")))
+        await asyncio.gather(blocker, *queued)
+        return order
+
+    assert asyncio.run(run()) == ["blocker", "a0", "b0", "a1", "a2"]
+
+
+def test_queued_job_past_its_deadline_is_dropped():
+    async def run():
+        scheduler = JobScheduler(concurrency=1)
+        order = []
+        blocker = asyncio.create_task(scheduler.run("a", TRANSCRIPT, _job(order, "blocker", 0.1)))
+        await asyncio.sleep(0)
+        with pytest.raises(JobDropped) as dropped:
+            await scheduler.run("b", SCORING, _job(order, "late"), deadline=0.02)
+        await blocker
+        return order, dropped.value.reason
+
+    order, reason = asyncio.run(run())
+    assert order == ["blocker"]
+    assert reason == "expired"
+
+
+def test_running_job_past_its_deadline_is_cancelled():
+    async def run():
+        scheduler = JobScheduler(concurrency=1)
+        with pytest.raises(JobDropped) as dropped:
+            await scheduler.run("a", SCORING, _job([], "slow", 1.0), deadline=0.02)
+        return dropped.value.reason, len(scheduler._running)
+
+    assert asyncio.run(run()) == ("expired", 0)
+
+
+def test_newer_job_with_the_same_key_supersedes_a_queued_one():
+    async def run():
+        scheduler = JobScheduler(concurrency=1)
+        order = []
+        blocker = asyncio.create_task(scheduler.run("a", TRANSCRIPT, _job(order, "blocker", 0.05)))
+        await asyncio.sleep(0)
+        old = asyncio.create_task(scheduler.run("a", SCORING, _job(order, "old"), key="score"))
+        await asyncio.sleep(0)
+        new = await scheduler.run("a", SCORING, _job(order, "new"), key="score")
+        with pytest.raises(JobDropped) as dropped:
+            await old
+        await blocker
+        return order, new, dropped.value.reason
+
+    assert asyncio.run(run()) == (["blocker", "new"], "new", "superseded")
+
+
+def test_newer_background_job_cancels_a_running_one():
+    async def run():
+        scheduler = JobScheduler(concurrency=2, background_limit=2)
+        order = []
+        old = asyncio.create_task(scheduler.run("a", QUESTIONS, _job(order, "old", 1.0), key="questions"))
+        await asyncio.sleep(0.01)
+        new = await scheduler.run("a", QUESTIONS, _job(order, "new"), key="questions")
+        with pytest.raises(JobDropped) as dropped:
+            await old
+        return order, new, dropped.value.reason
+
+    assert asyncio.run(run()) == (["old", "new"], "new", "superseded")
+
+
+def test_background_work_leaves_slots_for_scoring():
+    async def run():
+        scheduler = JobScheduler(concurrency=2, background_limit=1)
+        order = []
+        first = asyncio.create_task(scheduler.run("a", QUESTIONS, _job(order, "q1", 0.05)))
+        second = asyncio.create_task(scheduler.run("b", QUESTIONS, _job(order, "q2", 0.05)))
+        await asyncio.sleep(0.01)
+        started_while_busy = list(order)
+        await scheduler.run("c", SCORING, _job(order, "scoring"))
+        await asyncio.gather(first, second)
+        return started_while_busy, order
+
+    started_while_busy, order = asyncio.run(run())
+    assert started_while_busy == ["q1"]
+    assert order.index("scoring") < order.index("q2")
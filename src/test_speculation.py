@@ -0,0 +1,147 @@
+import asyncio
+
+from src.models import Question
+from src.scheduler import JobScheduler
+from src.speculation import QuestionSpeculator
+
+WORDS = "one two three four five"
+
+
+class FakeGenerator:
+    """Two questions per call, numbered; ``gate`` holds calls until it is set."""
+
+    def __init__(self):
+        self.transcripts = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, session_id, transcript):
+        self.transcripts.append(transcript)
+        await self.gate.wait()
+        n = len(self.transcripts)
+        return [Question(question=f"q{n}.{i}", category="general", difficulty="medium") for i in (1, 2)]
+
+
+def _speculator(generate, **kwargs):
+    options = dict(enabled=True, min_words=10, busy_words=20, max_ready=3)
+    options.update(kwargs)
+    return QuestionSpeculator(JobScheduler(concurrency=2), generate, **options)
+
+
+async def _settle(speculator, session_id="s"):
+    task = speculator._sessions[session_id].task
+    if task is not None:
+        await task
+
+
+def test_idle_server_runs_once_enough_words_built_up():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate)
+        speculator.note("s", WORDS, idle=True)
+        await _settle(speculator)
+        assert generate.transcripts == []
+        speculator.note("s", WORDS, idle=True)
+        await _settle(speculator)
+        return generate.transcripts, [q.question for q in speculator.take("s")]
+
+    transcripts, questions = asyncio.run(run())
+    assert transcripts == [f"{WORDS} {WORDS}"]
+    assert questions == ["q1.1", "q1.2"]
+
+
+def test_degraded_server_waits_for_more_words():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate)
+        for _ in range(3):
+            speculator.note("s", WORDS, idle=False)
+        await _settle(speculator)
+        ran_early = bool(generate.transcripts)
+        speculator.note("s", WORDS, idle=False)
+        await _settle(speculator)
+        return ran_early, len(generate.transcripts)
+
+    assert asyncio.run(run()) == (False, 1)
+
+
+def test_pause_runs_on_whatever_was_said():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate)
+        speculator.note("s", "short", idle=False)
+        speculator.note("s", "", idle=False, paused=True)
+        await _settle(speculator)
+        # Nothing new since: another pause has nothing to run on
+        speculator.note("s", "", idle=False, paused=True)
+        await _settle(speculator)
+        return generate.transcripts
+
+    assert asyncio.run(run()) == ["short"]
+
+
+def test_ready_queue_is_capped_and_stops_new_runs():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate, max_ready=3)
+        speculator.note("s", "first", idle=True, paused=True)
+        await _settle(speculator)
+        speculator.note("s", "second", idle=True, paused=True)
+        await _settle(speculator)
+        # Full: the third stretch waits until questions are taken
+        speculator.note("s", "third", idle=True, paused=True)
+        await _settle(speculator)
+        runs = len(generate.transcripts)
+        questions = [q.question for q in speculator.take("s", limit=5)]
+        return runs, questions
+
+    runs, questions = asyncio.run(run())
+    assert runs == 2
+    # The oldest question was dropped to stay within max_ready
+    assert questions == ["q1.2", "q2.1", "q2.2"]
+
+
+def test_cancel_stops_the_run_but_keeps_ready_questions():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate)
+        speculator.note("s", "first", idle=True, paused=True)
+        await _settle(speculator)
+        generate.gate.clear()
+        speculator.note("s", "second", idle=True, paused=True)
+        await asyncio.sleep(0.01)
+        task = speculator._sessions["s"].task
+        speculator.cancel("s")
+        await asyncio.gather(task, return_exceptions=True)
+        kept = [q.question for q in speculator.take("s")]
+        speculator.forget("s")
+        return task.cancelled(), kept, speculator.take("s"), speculator.warm("s")
+
+    cancelled, kept, after_forget, warm = asyncio.run(run())
+    assert cancelled
+    assert kept == ["q1.1", "q1.2"]
+    assert after_forget == []
+    assert not warm
+
+
+def test_covered_transcript_warms_the_session_without_a_run():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate)
+        cold = speculator.warm("s")
+        speculator.note("s", WORDS * 3, idle=True, covered=True)
+        speculator.note("s", "", idle=True, paused=True)
+        await _settle(speculator)
+        return cold, speculator.warm("s"), generate.transcripts
+
+    assert asyncio.run(run()) == (False, True, [])
+
+
+def test_disabled_speculator_is_never_warm():
+    async def run():
+        generate = FakeGenerator()
+        speculator = _speculator(generate, enabled=False)
+        speculator.note("s", WORDS * 3, idle=True, paused=True)
+        return speculator.warm("s"), generate.transcripts
+
+    assert asyncio.run(run()) == (False, [])
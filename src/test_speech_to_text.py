@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from src.speech_to_text import SAMPLE_RATE, StreamingTranscriber
+
+
+class FakeModel:
+    """Returns the queued hypotheses in turn, one per ``transcribe`` call."""
+
+    def __init__(self, hypotheses):
+        self.hypotheses = list(hypotheses)
+
+    def transcribe(self, audio, **kwargs):
+        return [SimpleNamespace(text=self.hypotheses.pop(0))], SimpleNamespace(language="en")
+
+
+def _partials(hypotheses):
+    transcriber = StreamingTranscriber(SimpleNamespace(model=FakeModel(hypotheses)), window_seconds=60,
+                                       partial_interval=0.5)
+    chunk = b"\x00" * (SAMPLE_RATE // 2 * 2)
+    return [event for _ in hypotheses for event in transcriber.feed(chunk)]
+
+
+def test_agreeing_hypotheses_are_committed():
+    events = _partials(["the quick", "the quick brown", "the quick brown fox"])
+    assert [e["committed"] for e in events] == ["", "the quick", "the quick brown"]
+    assert events[-1]["uncommitted"] == "fox"
+
+
+def test_diverging_hypothesis_keeps_committed_words_and_reports_the_rest():
+    events = _partials(["the quick brown", "the quick brown fox", "the quack brown fox jumps",
+                        "the quick brown fox jumps over"])
+    assert events[1]["committed"] == "the quick brown"
+    # Diverges after "the": the rest of the new hypothesis is uncommitted, nothing is dropped
+    assert events[2]["committed"] == "the quick brown"
+    assert events[2]["uncommitted"] == "quack brown fox jumps"
+    # Matches the committed words again, but did not agree with the previous hypothesis beyond them
+    assert events[3]["committed"] == "the quick brown"
+    assert events[3]["uncommitted"] == "fox jumps over"
+
+
+def test_shorter_hypothesis_does_not_repeat_committed_words():
+    events = _partials(["one two three", "one two three", "one two"])
+    assert events[1]["committed"] == "one two three"
+    assert events[2]["uncommitted"] == ""
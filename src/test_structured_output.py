@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from src.structured_output import (ContentAnalysisResponse, QuestionsResponse, complete_structured,
+                                   stream_structured_items, validate)
+
+SCORES = {"clarity_score": 0.8, "flow_score": 0.7, "technical_accuracy": 0.9, "explanation_quality": 0.6}
+
+
+class FakeLLM:
+    """Answers ``complete`` calls with the queued responses in turn and records the prompts."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def complete(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+class FakeStreamingLLM(FakeLLM):
+    def __init__(self, pieces, *repairs):
+        super().__init__(*repairs)
+        self.pieces = pieces
+
+    async def stream(self, prompt, **kwargs):
+        for piece in self.pieces:
+            yield piece
+
+
+def test_validate_enforces_score_bounds():
+    assert validate(ContentAnalysisResponse, SCORES).clarity_score == 0.8
+    assert validate(ContentAnalysisResponse, {**SCORES, "flow_score": 1.5}) is None
+    assert validate(ContentAnalysisResponse, {"clarity_score": 0.5}) is None
+    assert validate(ContentAnalysisResponse, "not an object") is None
+
+
+def test_valid_response_needs_no_repair():
+    llm = FakeLLM(json.dumps(SCORES))
+    response = asyncio.run(complete_structured(llm, "prompt", ContentAnalysisResponse, stage="test"))
+    assert response.flow_score == 0.7
+    assert len(llm.prompts) == 1
+
+
+def test_truncated_response_is_repaired_locally():
+    llm = FakeLLM('```json\n{"clarity_score": 0.8, "flow_score": 0.7, "technical_accuracy": 0.9, '
+                  '"explanation_quality": 0.6, "suggestions": ["slow do')
+    response = asyncio.run(complete_structured(llm, "prompt", ContentAnalysisResponse, stage="test"))
+    assert response.suggestions == ["slow do"]
+    assert len(llm.prompts) == 1
+
+
+def test_invalid_response_gets_one_repair_call():
+    llm = FakeLLM('{"clarity_score": "high"}', json.dumps(SCORES))
+    response = asyncio.run(complete_structured(llm, "prompt", ContentAnalysisResponse, stage="test"))
+    assert response.technical_accuracy == 0.9
+    assert len(llm.prompts) == 2
+    assert '{"clarity_score": "high"}' in llm.prompts[1]
+
+
+def test_unrepairable_response_is_wasted():
+    llm = FakeLLM("I cannot help with that.", "Still no JSON.")
+    assert asyncio.run(complete_structured(llm, "prompt", ContentAnalysisResponse, stage="test")) is None
+
+
+def test_stream_keeps_valid_items_and_drops_invalid_ones():
+    seen = []
+
+    async def on_item(item):
+        seen.append(item.question)
+
+    pieces = ['{"questions": [{"question": "Why?"}, ', '{"difficulty": "hard"}, ', '{"question": "How?", "categ']
+    llm = FakeStreamingLLM(pieces)
+    items = asyncio.run(stream_structured_items(llm, "prompt", QuestionsResponse, "questions", on_item,
+                                                stage="test"))
+    assert [item.question for item in items] == ["Why?", "How?"]
+    assert items[0].category == "general"
+    # Only items that closed while streaming were forwarded early
+    assert seen == ["Why?"]
+    assert llm.prompts == []
+
+
+def test_stream_with_no_valid_item_is_repaired():
+    seen = []
+
+    async def on_item(item):
+        seen.append(item.question)
+
+    llm = FakeStreamingLLM(['{"questions": [{"q": "Why?"}]}'], '{"questions": [{"question": "Why?"}]}')
+    items = asyncio.run(stream_structured_items(llm, "prompt", QuestionsResponse, "questions", on_item,
+                                                stage="test"))
+    assert [item.question for item in items] == ["Why?"]
+    assert seen == ["Why?"]
+    assert len(llm.prompts) == 1
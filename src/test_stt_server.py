@@ -0,0 +1,119 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import stt_server as stt_server_module
+from src.stt_server import _LENGTH, RemoteWhisperModel, STTServer, _recv, _send
+
+
+class FakeWhisperModel:
+    """Describes the audio it was given instead of transcribing it."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        if options.get("beam_size") == 0:
+            raise ValueError("beam_size must be positive")
+        words = [SimpleNamespace(word=" peak", start=0.0, end=0.5, probability=0.9)]
+        segment = SimpleNamespace(text=f" {len(audio)} {float(audio.max()):.2f}", start=0.0,
+                                  end=len(audio) / 16000, words=words if options.get("word_timestamps") else None)
+        return iter([segment]), SimpleNamespace(language="en")
+
+
+def test_framing_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        message = {"text": "x" * 100_000, "nested": {"n": [1, 2.5, None]}}
+        sender = threading.Thread(target=_send, args=(left, message))
+        sender.start()
+        assert _recv(right) == message
+        sender.join()
+
+
+def test_frame_split_across_writes_is_reassembled():
+    left, right = socket.socketpair()
+    with left, right:
+        payload = b'{"a": 1}'
+        frame = _LENGTH.pack(len(payload)) + payload
+        for i in range(len(frame)):
+            left.sendall(frame[i:i + 1])
+        assert _recv(right) == {"a": 1}
+
+
+def test_closed_connection_mid_frame_raises():
+    left, right = socket.socketpair()
+    with right:
+        left.sendall(_LENGTH.pack(10) + b"{")
+        left.close()
+        with pytest.raises(ConnectionError):
+            _recv(right)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # Client and server share this process's resource tracker; the server must not drop the client's entry
+    monkeypatch.setattr(stt_server_module, "resource_tracker", SimpleNamespace(unregister=lambda *args: None))
+    stt_server = STTServer(str(tmp_path / "stt.sock"), workers=2)
+    stt_server.models["fake"] = FakeWhisperModel()
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(stt_server.serve())
+    # gather() so the cancellation at teardown is not raised in the thread
+    thread = threading.Thread(target=loop.run_until_complete, args=(asyncio.gather(task, return_exceptions=True),),
+                              daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(stt_server.socket_path):
+        assert time.monotonic() < deadline, "STT server did not start"
+        time.sleep(0.01)
+    yield stt_server
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+    loop.close()
+
+
+def test_remote_model_round_trips_audio_through_shared_memory(server):
+    model = RemoteWhisperModel(server.socket_path, "fake")
+    try:
+        audio = np.zeros(16000 * 3, dtype=np.float32)
+        audio[123] = 0.75
+        segments, info = model.transcribe(audio, beam_size=1, word_timestamps=True)
+        assert info.language == "en"
+        assert segments[0].text == " 48000 0.75"
+        assert segments[0].end == 3.0
+        assert segments[0].words[0].word == " peak"
+
+        # A longer window grows the segment; the same connection is reused
+        long_audio = np.full(16000 * 12, 0.25, dtype=np.float32)
+        segments, _ = model.transcribe(long_audio, beam_size=1)
+        assert segments[0].text == " 192000 0.25"
+        assert segments[0].words is None
+        assert model._idle.qsize() == 1
+        assert server.models["fake"].calls[0] == {"beam_size": 1, "word_timestamps": True,
+                                                  "condition_on_previous_text": True}
+    finally:
+        model.close()
+
+
+def test_server_errors_reach_the_client(server):
+    model = RemoteWhisperModel(server.socket_path, "fake")
+    try:
+        with pytest.raises(RuntimeError, match="beam_size must be positive"):
+            model.transcribe(np.zeros(1600, dtype=np.float32), beam_size=0)
+        # The connection stays usable after an error answer
+        segments, _ = model.transcribe(np.ones(1600, dtype=np.float32), beam_size=1)
+        assert segments[0].text == " 1600 1.00"
+    finally:
+        model.close()
+
+
+def test_remote_model_rejects_encoded_audio():
+    with pytest.raises(TypeError):
+        RemoteWhisperModel("/nonexistent.sock", "fake").transcribe(b"RIFF")
@@ -0,0 +1,53 @@
+from src.models import ContentAnalysis
+from src.transcript_buffer import TranscriptBuffer
+
+
+def _analysis(score: float) -> ContentAnalysis:
+    return ContentAnalysis(clarity_score=score, flow_score=score, technical_accuracy=score,
+                           explanation_quality=score, suggested_improvements=[])
+
+
+def test_first_analysis_is_shown_as_is():
+    buffer = TranscriptBuffer(window=90, interval=30)
+    buffer.append("Hello there.", 5)
+    buffer.record(_analysis(0.4))
+    assert buffer.current().clarity_score == 0.4
+
+
+def test_fresh_analysis_moves_the_shown_scores_immediately():
+    buffer = TranscriptBuffer(window=90, interval=30)
+    buffer.append("First.", 5)
+    buffer.record(_analysis(0.0))
+    for _ in range(6):
+        buffer.append("More.", 5)
+    assert buffer.due()
+    buffer.record(_analysis(0.6))
+    # The chunk that triggered the analysis is one 5 s step of the 30 s blend
+    assert abs(buffer.current().clarity_score - 0.1) < 1e-9
+    for _ in range(5):
+        buffer.append("More.", 5)
+    assert abs(buffer.current().clarity_score - 0.6) < 1e-9
+
+
+def test_blend_starts_from_the_scores_shown():
+    buffer = TranscriptBuffer(window=90, interval=30)
+    buffer.append("First.", 5)
+    buffer.record(_analysis(0.0))
+    buffer.append("More.", 5)
+    buffer.record(_analysis(0.6))
+    buffer.append("More.", 5)
+    shown = buffer.current().clarity_score
+    buffer.record(_analysis(0.0))
+    # No jump back to the older analysis: the blend continues from what was on screen
+    assert 0.0 < buffer.current().clarity_score < shown
+
+
+def test_skipped_chunks_keep_elapsed_time():
+    buffer = TranscriptBuffer(window=90, interval=30)
+    buffer.append("Speech.", 5)
+    buffer.record(_analysis(0.5))
+    for _ in range(6):
+        buffer.append("", 5)
+    assert buffer.elapsed == 35
+    assert buffer.due()
+    assert buffer.text() == "Speech."
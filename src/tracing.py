@@ -0,0 +1,154 @@
+"""Request-scoped tracing for the chunk pipeline.
+
+A trace is opened per WebSocket window with :func:`start_trace`; everything
+timed inside it (``metrics.timed`` blocks, LLM calls, explicit :func:`span`
+blocks) becomes a span. The current span lives in a ``contextvars`` variable,
+so it follows ``await``, ``asyncio.create_task`` and ``anyio.to_thread`` calls.
+Finished traces are kept in an in-memory ring buffer and exported as JSON or
+in the Chrome trace-event format (load it in ``chrome://tracing`` or Perfetto).
+"""
+
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '200'))
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "thread_id", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.wall_start = time.time()
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = [self.root]
+
+    @property
+    def duration(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return end - self.root.start
+
+    def _wall_us(self, perf: float) -> float:
+        return (self.wall_start + (perf - self.root.start)) * 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": self.wall_start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.root.attributes,
+            "spans": [
+                {
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "offset_ms": round((s.start - self.root.start) * 1000, 3),
+                    "duration_ms": round(((s.end or s.start) - s.start) * 1000, 3),
+                    "thread_id": s.thread_id,
+                    "attributes": s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+    def to_chrome_events(self, pid: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": s.name,
+                "cat": self.root.name,
+                "ph": "X",
+                "ts": self._wall_us(s.start),
+                "dur": ((s.end or s.start) - s.start) * 1e6,
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": dict(s.attributes, trace_id=self.trace_id),
+            }
+            for s in self.spans
+        ]
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+TRACES: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """Open a new trace; it is added to the ring buffer when the block exits."""
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.attributes["error"] = repr(e)
+        raise
+    finally:
+        trace.root.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        TRACES.append(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current span; a no-op outside of a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = repr(e)
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def export_json(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    traces = list(TRACES)
+    if limit:
+        traces = traces[-limit:]
+    return [trace.to_dict() for trace in traces]
+
+
+def export_chrome(limit: Optional[int] = None) -> Dict[str, Any]:
+    traces = list(TRACES)
+    if limit:
+        traces = traces[-limit:]
+    pid = os.getpid()
+    events = [event for trace in traces for event in trace.to_chrome_events(pid)]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,95 @@
+"""Session-level rolling transcript used for windowed content analysis.
+
+Chunks are appended as they are transcribed and split into sentences; an
+unterminated tail is held until the next chunk completes it. Content analysis
+reads the sentences of the last ``window`` seconds and runs every ``interval``
+seconds of speech instead of on each 5 s chunk. A new result is blended in
+from the scores shown when it arrived: the chunk it was taken in already moves
+one step toward it, and it is reached fully ``interval`` seconds later.
+"""
+
+import os
+import re
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .models import ContentAnalysis
+
+CONTENT_INTERVAL_SECONDS = float(os.getenv('CONTENT_INTERVAL_SECONDS', '30'))
+CONTENT_WINDOW_SECONDS = float(os.getenv('CONTENT_WINDOW_SECONDS', '90'))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> Tuple[list, str]:
+    """Split into complete sentences and the unterminated remainder."""
+    parts = [part.strip() for part in _SENTENCE_END.split(text.strip()) if part.strip()]
+    if parts and not parts[-1].endswith((".", "!", "?")):
+        return parts[:-1], parts[-1]
+    return parts, ""
+
+
+class TranscriptBuffer:
+    def __init__(self, window: float = CONTENT_WINDOW_SECONDS, interval: float = CONTENT_INTERVAL_SECONDS):
+        self.window = window
+        self.interval = interval
+        self.elapsed = 0.0  # seconds of session audio seen so far
+        self.sentences: Deque[Tuple[float, str]] = deque()  # (end time, sentence)
+        self.tail = ""
+        self.last_duration = 0.0
+        # (time, analysis) of the last two content analyses
+        self.analyses: Deque[Tuple[float, ContentAnalysis]] = deque(maxlen=2)
+        # (time, scores shown) the latest analysis is blended from
+        self.blend_from: Optional[Tuple[float, ContentAnalysis]] = None
+
+    def append(self, text: str, duration: float):
+        """Add a chunk's transcript; skipped chunks pass ``""`` so elapsed time keeps up."""
+        self.elapsed += duration
+        self.last_duration = duration
+        sentences, self.tail = split_sentences(f"{self.tail} {text}")
+        for sentence in sentences:
+            self.sentences.append((self.elapsed, sentence))
+        while self.sentences and self.sentences[0][0] < self.elapsed - self.window:
+            self.sentences.popleft()
+
+    def text(self) -> str:
+        """Transcript of the last ``window`` seconds, including the unfinished sentence."""
+        return " ".join([sentence for _, sentence in self.sentences] + ([self.tail] if self.tail else []))
+
+    def due(self, every: int = 1) -> bool:
+        """True when ``every`` intervals have passed since the last analysis (or there was none)."""
+        if not self.analyses:
+            return True
+        return self.elapsed - self.analyses[-1][0] >= self.interval * every
+
+    def record(self, analysis: ContentAnalysis):
+        shown = self.current()
+        if shown is not None:
+            # Start one chunk back so the chunk that produced the analysis already shows it
+            self.blend_from = (self.elapsed - self.last_duration, shown)
+        self.analyses.append((self.elapsed, analysis))
+
+    def current(self) -> Optional[ContentAnalysis]:
+        """Content scores for now, moving linearly from the scores shown before the latest analysis to it."""
+        if not self.analyses:
+            return None
+        _, latest = self.analyses[-1]
+        if self.blend_from is None:
+            return latest
+        start_at, start = self.blend_from
+        fraction = min(1.0, (self.elapsed - start_at) / self.interval) if self.interval > 0 else 1.0
+        return interpolate_content(start, latest, fraction)
+
+
+def interpolate_content(previous: ContentAnalysis, latest: ContentAnalysis, fraction: float) -> ContentAnalysis:
+    def blend(field: str) -> float:
+        start, end = getattr(previous, field), getattr(latest, field)
+        return start + (end - start) * fraction
+
+    return ContentAnalysis(
+        clarity_score=blend("clarity_score"),
+        flow_score=blend("flow_score"),
+        technical_accuracy=blend("technical_accuracy"),
+        explanation_quality=blend("explanation_quality"),
+        suggested_improvements=latest.suggested_improvements
+    )